@@ -1,69 +1,100 @@
 import numpy as np
-from scipy.ndimage import convolve
+from numba import njit  # type: ignore
 
 from utils import read_input
+from utils.bitgrid import (
+    bit_add,
+    bit_sum,
+    count_at_least,
+    moore_planes,
+    pack_bits,
+    popcount,
+)
+
+# Energy levels above 9 all mean "flashing", so they are capped to 10 (4 bits)
+FLASH_LEVEL = 10
+N_BITS = 4
+
+
+@njit(cache=True)
+def add_energy(
+    energy: np.ndarray, increment: np.ndarray, mask: np.ndarray
+) -> tuple[np.ndarray, np.ndarray]:
+    """Add a bit-sliced increment to the bit-sliced energy levels, capped to
+    FLASH_LEVEL. Returns the new energy levels and the flashing octopuses."""
+    total = bit_add(energy, increment)
+    flashing = count_at_least(total, FLASH_LEVEL)
+    capped = np.empty_like(energy)
+    for row in range(mask.shape[0]):
+        for j in range(mask.shape[1]):
+            flashing[row, j] &= mask[row, j]
+            for i in range(N_BITS):
+                word = total[i, row, j] & mask[row, j] & ~flashing[row, j]
+                if (FLASH_LEVEL >> i) & 1:
+                    word |= flashing[row, j]
+                capped[i, row, j] = word
+    return capped, flashing
+
+
+@njit(cache=True)
+def run_day(energy: np.ndarray, mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Run a single day. Returns the new energy levels and the octopuses that
+    flashed"""
+    # Update timers
+    energy, flashing = add_energy(energy, mask.reshape((1,) + mask.shape), mask)
+    flashed = np.zeros_like(mask)
+    # Loop over the flashing events (ignore entries who have already flashed)
+    padded = np.zeros((mask.shape[0] + 2, mask.shape[1]), dtype=mask.dtype)
+    rows = np.arange(1, mask.shape[0] + 1)
+    while True:
+        any_flashing = False
+        for row in range(mask.shape[0]):
+            for j in range(mask.shape[1]):
+                padded[row + 1, j] = flashing[row, j] & ~flashed[row, j]
+                flashed[row, j] |= padded[row + 1, j]
+                any_flashing |= padded[row + 1, j] != 0
+        if not any_flashing:
+            break
+        # Count the flashing neighbours of each octopus, and add to its energy
+        energy, flashing = add_energy(energy, bit_sum(moore_planes(padded, rows)), mask)
+    # Set the flashing octopuses to 0
+    for i in range(N_BITS):
+        for row in range(mask.shape[0]):
+            for j in range(mask.shape[1]):
+                energy[i, row, j] &= ~flashed[row, j]
+    return energy, flashed
 
 
 class FlashySystem:
+    """Energy levels are stored bit-sliced: one bit-packed grid per bit"""
+
     def __init__(self, X: np.ndarray):
-        # Define convolution filter
-        self.conv_filter = np.ones(shape=(3, 3), dtype=int)
-        self.conv_filter[1, 1] = 0
-        #  Initialize
+        # Cells of the grid (without the padding rows)
+        self.mask = pack_bits(np.ones(X.shape, dtype=bool))[1:-1]
+        #  Initialize
         self._reset(X)
 
     def _reset(self, X: np.ndarray):
         """Reset the system"""
-        self.X = X.copy()
+        self.energy = np.stack(
+            [pack_bits((X >> i) & 1 == 1)[1:-1] for i in range(N_BITS)]
+        )
         # Initialise flash counter
         self.count_flashes = 0
         # Initialize mask of occurred flashes
-        self.mask_past_flashes = np.zeros(shape=self.X.shape, dtype=int)
+        self.mask_past_flashes = np.zeros_like(self.mask)
         # Initialize internal day counter
         self._i = 0
 
-    def _zero_mask(self):
-        """Zero the mask of occurred flashes"""
-        self.mask_past_flashes[:] = 0
-        return self
-
-    def _update_array(self):
-        """Update timers"""
-        self.X += 1
-        return self
-
-    def _flash_loop(self):
-        """At each day, simulate flashes"""
-        # Create mask for marking the flashing octopuses
-        mask_flashing = np.where(self.X > 9, 1, 0)
-        # Ignore entries who have already flashed
-        mask_flashing[self.mask_past_flashes == 1] = 0
-        # Calculate how many flashes there are
-        Y = convolve(mask_flashing, self.conv_filter, mode="constant")
-        # Add to array
-        self.X = self.X + Y
-        # Update the mask of past flashes with those flashing this round
-        self.mask_past_flashes[mask_flashing == 1] = 1
-        # Return the number of occurred flashes
-        return Y.sum()
-
     def check_syncro(self):
         """Check if we reached syncronization"""
-        return self.mask_past_flashes.sum() == self.X.shape[0] * self.X.shape[1]
+        return np.array_equal(self.mask_past_flashes, self.mask)
 
     def run_day(self):
         """Run a single day"""
-        # Update array
-        self._update_array()
-        # Reset the mask
-        self._zero_mask()
-        # Loop over the flashing events
-        while self._flash_loop():
-            continue
-        # Set the flashing octopuses to 0
-        self.X[self.mask_past_flashes == 1] = 0
+        self.energy, self.mask_past_flashes = run_day(self.energy, self.mask)
         # Count the number of flashes
-        self.count_flashes += self.mask_past_flashes.sum()
+        self.count_flashes += popcount(self.mask_past_flashes)
 
         return self
 
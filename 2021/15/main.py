@@ -1,90 +1,19 @@
-import heapq
-import itertools
-import math
-from collections import defaultdict
-from typing import Optional
-
 import numpy as np
 
-from utils import read_input, DijkstraDistances, CoordTuple, CoordGenerator
-
-
-def shortest_path_dijkstra(
-    start: CoordTuple,
-    grid: np.ndarray,
-    dict_nn: dict[CoordTuple, list[CoordTuple]],
-    end: Optional[CoordTuple] = None,
-) -> DijkstraDistances:
-    """Dijkstra's algo for shortest path calculation between a start node and any other
-     node in a grid.
-    Returns a dictionary of {node: distance} from the source node.
-
-    `grid` specifies the weights associated to each node (here, a coordinate tuple)
-    `dict_nn` contains the list of neighbors for each node
-    If an optional `end` node is specified, calculation is performed down to the `end`
-     node only (ignoring the rest of the grid for efficiency) and a single-element
-      dictionary is returned.
-    """
-
-    # Initialise distance dictionary and visited set
-    dists: DijkstraDistances = defaultdict(lambda: math.inf, {start: 0})
-    visited = set()
-
-    # Initialise queue
-    queue = [(0, start)]
-
-    while queue:
-        # Pop the element of the queue with the shortest distance
-        current_dist, current_node = heapq.heappop(queue)
-
-        # If we arrived at the end node, return the dists dictionary
-        if current_node == end:
-            return defaultdict(lambda: math.inf, {end: current_dist})
-
-        # Nodes can get added to the priority queue multiple times. We only
-        # process a node the first time we remove it from the priority queue.
-        if current_node in visited:
-            continue
-
-        visited.add(current_node)
+from utils import read_input
+from utils.grid import GridGraph
+from utils.search import StateGraph, shortest_paths
 
-        for neighbor in dict_nn[current_node]:
-            new_dist = current_dist + grid[neighbor]
-            # Only consider this new path if it's better than any path we've
-            # already found
-            if new_dist < dists[neighbor]:
-                dists[neighbor] = new_dist
-                heapq.heappush(queue, (new_dist, neighbor))
 
-    return dists
-
-
-def _get_neighbors(node: CoordTuple, bounds: dict[str, CoordTuple]) -> CoordGenerator:
-    """Simple function to obtain the neighbors coordinates of a point on a grid.
-    The grid bounds are considered."""
-    x, y = node
-    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-        xx, yy = (x + dx, y + dy)
-        if (
-            bounds["x"][0] <= xx < bounds["x"][1]
-            and bounds["y"][0] <= yy < bounds["y"][1]
-        ):
-            yield xx, yy
-
-
-def create_neighbors_dict(
-    grid: np.ndarray,
-) -> dict[CoordTuple, list[CoordTuple]]:
-    """Create dictionary of neighbors for a grid"""
-    dict_nn: dict[CoordTuple, list[CoordTuple]] = {
-        node: []
-        for node in list(itertools.product(range(grid.shape[0]), range(grid.shape[1])))
-    }
-    bounds = {"x": (0, grid.shape[0]), "y": (0, grid.shape[1])}
-    for node in dict_nn.keys():
-        dict_nn[node] = list(_get_neighbors(node, bounds))
-
-    return dict_nn
+def lowest_total_risk(grid: np.ndarray) -> int:
+    """Shortest path from the top left to the bottom right corner, where entering
+    a cell costs its risk level. Risks are single digits, hence the bucket queue"""
+    grid_graph = GridGraph(grid.shape)
+    graph = StateGraph.from_grid(grid_graph, costs=grid)
+    targets = np.zeros(len(grid_graph), dtype=bool)
+    targets[-1] = True
+    dists, end = shortest_paths(graph, [0], targets, queue="bucket")
+    return int(dists[end])
 
 
 def enlarge_grid(grid: np.ndarray) -> np.ndarray:
@@ -111,27 +40,11 @@ def enlarge_grid(grid: np.ndarray) -> np.ndarray:
 def main():
     input_file = read_input("2021/15/input.txt")
     grid = np.array([[int(num) for num in line] for line in input_file], dtype=int)
-
-    # Create neighbour dictionary
-    dict_nn = create_neighbors_dict(grid)
-
-    # Perform shortest path search
-    start = (0, 0)
-    end = (grid.shape[0] - 1, grid.shape[1] - 1)
-    res_dict = shortest_path_dijkstra(start, grid, dict_nn, end)
-    print(f"Result of part 1: {res_dict[end]}")
+    print(f"Result of part 1: {lowest_total_risk(grid)}")
 
     # For part 2, enlarge the grid
     large_grid = enlarge_grid(grid)
-
-    # Create neighbour dictionary
-    dict_nn = create_neighbors_dict(large_grid)
-
-    # Perform shortest path search
-    start = (0, 0)
-    end = (large_grid.shape[0] - 1, large_grid.shape[1] - 1)
-    res_dict = shortest_path_dijkstra(start, large_grid, dict_nn, end)
-    print(f"Result of part 2: {res_dict[end]}")
+    print(f"Result of part 2: {lowest_total_risk(large_grid)}")
 
 
 if __name__ == "__main__":
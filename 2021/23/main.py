@@ -1,130 +1,165 @@
-# TODO: THIS IS STILL WORK IN PROGRESS!!!!
+import heapq
+from typing import Iterator
 
 from utils import read_input
 
-# Distance travelled and corridors traversed to get from corridor C to room R
-paths = {  # (C, R): (distance, cells)
-    (0, 0): (3, [1]),
-    (0, 1): (5, [1, 2]),
-    (0, 2): (7, [1, 2, 3]),
-    (0, 3): (9, [1, 2, 3, 4]),
-    (1, 0): (2, []),
-    (1, 1): (4, [2]),
-    (1, 2): (6, [2, 3]),
-    (1, 3): (8, [2, 4]),
-    (2, 0): (2, []),
-    (2, 1): (2, []),
-    (2, 2): (4, [3]),
-    (2, 3): (6, [3, 4]),
-    (3, 0): (4, [2]),
-    (3, 1): (2, []),
-    (3, 2): (2, []),
-    (3, 3): (4, [4]),
-    (4, 0): (6, [2, 3]),
-    (4, 1): (4, [3]),
-    (4, 2): (2, []),
-    (4, 3): (2, []),
-    (5, 0): (8, [2, 3, 4]),
-    (5, 1): (6, [3, 4]),
-    (5, 2): (4, [4]),
-    (5, 3): (2, []),
-    (6, 0): (9, [2, 3, 4, 5]),
-    (6, 1): (7, [3, 4, 5]),
-    (6, 2): (5, [4, 5]),
-    (6, 3): (3, [5]),
-}
-
-
-class State:
-    def __init__(self, rooms, corridors=None, score=0):
-        self.rooms = tuple(tuple(room) for room in rooms)
-        self.corridors = tuple(corridors or (0,) * 7)
-        self.score = score or 0
-
-    def __repr__(self):
-        return repr((self.rooms, self.corridors, self.score))
-
-    def move(self, corr_i, corr_val, room_i, room_pos, room_val, score):
-        rooms = [list(room) for room in self.rooms]
-        rooms[room_i][room_pos] = room_val
-        corridors = list(self.corridors)
-        corridors[corr_i] = corr_val
-        return State(rooms, corridors, self.score + score)
-
-
-def valid_moves(state):
-    for corr_i, mover in enumerate(state.corridors):
-        if mover:
-            room_i = mover - 1
-            if all(cell in (0, mover) for cell in state.rooms[room_i]):
-                distance, cells = paths[(corr_i, room_i)]
-                if not any(state.corridors[cell] for cell in cells):
-                    room_pos = state.rooms[room_i].count(0) - 1
-                    score = (distance + room_pos) * (10 ** (mover - 1))
-                    yield state.move(corr_i, 0, room_i, room_pos, mover, score)
-
-    for room_i in range(4):
-        room = state.rooms[room_i]
-        if all(cell in (room_i + 1, 0) for cell in room):
+# Hallway positions where amphipods can stop, and hallway positions of the rooms
+CORRIDOR = (0, 1, 3, 5, 7, 9, 10)
+ROOMS_X = (2, 4, 6, 8)
+ENERGY = (0, 1, 10, 100, 1000)
+AMPHIPODS = {"A": 1, "B": 2, "C": 3, "D": 4}
+# Lines inserted in the burrow for part 2
+UNFOLDED = ["  #D#C#B#A#", "  #D#B#A#C#"]
+# Each cell takes 3 bits: 0 if empty, else the amphipod type (1 to 4)
+CELL_BITS = 3
+CELL_MASK = (1 << CELL_BITS) - 1
+
+
+class Burrow:
+    """Cells are the 7 corridor cells, followed by the rooms (from the top).
+    A state is packed into a single integer, 3 bits per cell."""
+
+    def __init__(self, depth: int):
+        self.depth = depth
+        self.n_cells = len(CORRIDOR) + len(ROOMS_X) * depth
+
+    def room_cell(self, room: int, slot: int) -> int:
+        return len(CORRIDOR) + room * self.depth + slot
+
+    def encode(self, cells: list[int]) -> int:
+        state = 0
+        for i, cell in enumerate(cells):
+            state |= cell << (CELL_BITS * i)
+        return state
+
+    def decode(self, state: int) -> list[int]:
+        return [(state >> (CELL_BITS * i)) & CELL_MASK for i in range(self.n_cells)]
+
+    def goal(self) -> int:
+        cells = [0] * len(CORRIDOR)
+        for room in range(len(ROOMS_X)):
+            cells += [room + 1] * self.depth
+        return self.encode(cells)
+
+    def settled(self, cells: list[int], room: int) -> int:
+        """Number of amphipods at the bottom of a room that are already home"""
+        n_settled = 0
+        for slot in range(self.depth - 1, -1, -1):
+            if cells[self.room_cell(room, slot)] != room + 1:
+                break
+            n_settled += 1
+        return n_settled
+
+    def heuristic(self, cells: list[int]) -> int:
+        """Minimum remaining energy: every amphipod that isn't home moves
+        horizontally to its room (stepping aside if it must leave its own room),
+        and the rooms are filled from the bottom"""
+        energy = 0
+        for i, x in enumerate(CORRIDOR):
+            if cells[i]:
+                energy += abs(x - ROOMS_X[cells[i] - 1]) * ENERGY[cells[i]]
+        for room in range(len(ROOMS_X)):
+            n_settled = self.settled(cells, room)
+            for slot in range(self.depth - n_settled):
+                mover = cells[self.room_cell(room, slot)]
+                if mover:
+                    distance = abs(ROOMS_X[room] - ROOMS_X[mover - 1]) or 2
+                    energy += (slot + 1 + distance) * ENERGY[mover]
+            # Amphipods entering the room
+            missing = self.depth - n_settled
+            energy += missing * (missing + 1) // 2 * ENERGY[room + 1]
+        return energy
+
+    def corridor_clear(self, cells: list[int], start: int, end: int) -> bool:
+        """Check that the corridor cells strictly between hallway positions
+        `start` and `end` are free"""
+        low, high = min(start, end), max(start, end)
+        return not any(cells[i] for i, x in enumerate(CORRIDOR) if low < x < high)
+
+    def moves(self, cells: list[int]) -> Iterator[tuple[int, int, int]]:
+        """Valid moves as (source cell, target cell, energy)"""
+        # From the corridor to the amphipod's room, once it only has its own type
+        for i, mover in enumerate(cells[: len(CORRIDOR)]):
+            if not mover:
+                continue
+            room = mover - 1
+            n_settled = self.settled(cells, room)
+            if any(
+                cells[self.room_cell(room, slot)]
+                for slot in range(self.depth - n_settled)
+            ):
+                continue
+            if self.corridor_clear(cells, CORRIDOR[i], ROOMS_X[room]):
+                slot = self.depth - n_settled - 1
+                distance = abs(CORRIDOR[i] - ROOMS_X[room]) + slot + 1
+                yield i, self.room_cell(room, slot), distance * ENERGY[mover]
+
+        # From the top of a room that has amphipods to move out, to the corridor
+        for room in range(len(ROOMS_X)):
+            n_settled = self.settled(cells, room)
+            slot = 0
+            while (
+                slot < self.depth - n_settled and not cells[self.room_cell(room, slot)]
+            ):
+                slot += 1
+            if slot == self.depth - n_settled:
+                continue
+            mover = cells[self.room_cell(room, slot)]
+            for i, x in enumerate(CORRIDOR):
+                if not cells[i] and self.corridor_clear(cells, x, ROOMS_X[room]):
+                    distance = abs(x - ROOMS_X[room]) + slot + 1
+                    yield self.room_cell(room, slot), i, distance * ENERGY[mover]
+
+
+def organise(rooms: list[list[int]]) -> int:
+    """A* search of the minimum energy needed to organise the amphipods.
+    `rooms` lists the amphipods of each room, from the top (any depth).
+    Distances are kept in a dict keyed by the packed states."""
+    burrow = Burrow(len(rooms[0]))
+    cells = [0] * len(CORRIDOR) + [amphipod for room in rooms for amphipod in room]
+    start, goal = burrow.encode(cells), burrow.goal()
+
+    dists = {start: 0}
+    queue = [(burrow.heuristic(cells), 0, start)]
+    while queue:
+        _, dist, state = heapq.heappop(queue)
+        if state == goal:
+            return dist
+        # States can get added to the queue multiple times
+        if dist > dists[state]:
             continue
-        room_pos = room.count(0)
-        mover = room[room_pos]
-        for corr_i, occupant in enumerate(state.corridors):
-            if not occupant:
-                distance, cells = paths[(corr_i, room_i)]
-                if not any(state.corridors[cell] for cell in cells):
-                    score = (distance + room_pos) * (10 ** (mover - 1))
-                    yield state.move(corr_i, mover, room_i, room_pos, 0, score)
-
-
-def done(state):
-    for room_i, cells in enumerate(state.rooms):
-        if not all(cell == room_i + 1 for cell in cells):
-            return False
-    return True
-
-
-def prune_states(states):
-    scores = {}
-    for state in states:
-        key = (state.rooms, state.corridors)
-        if key in scores:
-            existing = scores[key]
-            if existing.score > state.score:
-                existing.score = state.score
-        else:
-            scores[key] = state
-    return scores.values()
-
-
-def play_game(initial_state):
-    done_states = []
-    states = [initial_state]
-    while states:
-        new_states = []
-        for state in states:
-            for new_state in valid_moves(state):
-                if done(new_state):
-                    done_states.append(new_state)
-                else:
-                    new_states.append(new_state)
-        states = prune_states(new_states)
-    return min(state.score for state in done_states)
+        cells = burrow.decode(state)
+        for source, target, energy in burrow.moves(cells):
+            shift_source, shift_target = CELL_BITS * source, CELL_BITS * target
+            new_state = state & ~(CELL_MASK << shift_source) | (
+                cells[source] << shift_target
+            )
+            new_dist = dist + energy
+            if new_dist < dists.get(new_state, new_dist + 1):
+                dists[new_state] = new_dist
+                cells[source], cells[target] = 0, cells[source]
+                priority = new_dist + burrow.heuristic(cells)
+                cells[source], cells[target] = cells[target], 0
+                heapq.heappush(queue, (priority, new_dist, new_state))
+
+    return -1
+
+
+def parse_rooms(lines: list[str]) -> list[list[int]]:
+    """Amphipods of each room, from the top"""
+    rows = [
+        [AMPHIPODS[line[x + 1]] for x in ROOMS_X]
+        for line in lines[2:]
+        if line.strip("# ")
+    ]
+    return [list(room) for room in zip(*rows)]
 
 
 def main():
-    input_file = read_input("2021/23/example.txt")
-    letters = list(zip(input_file[2][3:10:2], input_file[3][3:10:2]))
-    d = {"A": 1, "B": 2, "C": 3, "D": 4}
-    rooms = [[d[x] for x in row] for row in letters]
-    state = State(rooms)
-    print(state.rooms)
-    print("Part 1:", play_game(state))
-    # additions = [(4, 4), (3, 2), (2, 1), (1, 3)]
-    # state.rooms = tuple(
-    #     (a,) + cells + (b,) for (a, b), cells in zip(state.rooms, additions)
-    # )
-    # print("Part 2:", play_game(state))
+    lines = read_input("2021/23/input.txt", line_strip=False)
+    print(f"Result of part 1: {organise(parse_rooms(lines))}")
+    unfolded = lines[:3] + UNFOLDED + lines[3:]
+    print(f"Result of part 2: {organise(parse_rooms(unfolded))}")
 
 
 if __name__ == "__main__":
@@ -1,88 +1,210 @@
 import re
-from math import floor, lcm, prod
-from typing import List
+from math import isqrt, lcm, prod
+from typing import List, Optional
 
-from utils import read_input_batch
-
-
-class Monkey:
-    def __init__(self, params: List[str]) -> None:
-        # Query monkey parameters
-        search_int = re.compile(r"\d+")
-
-        match = search_int.search(params[0])
-        self.num = int(match.group()) if match else 0
-        self.items = list(map(int, re.findall(r"\d+", params[1])))
-        self.operation = eval("lambda old: " + params[2].split("=")[1])
+import numpy as np
+from numba import njit  # type: ignore
 
-        match = search_int.search(params[3])
-        self.divisor = int(match.group()) if match else 1
-        self.test = lambda x: x % self.divisor == 0
-        match = search_int.search(params[4])
-        self.throw_true = int(match.group()) if match else 0
-        match = search_int.search(params[5])
-        self.throw_false = int(match.group()) if match else 0
-
-        self.inspected = 0
-
-
-class MonkeyBusiness:
-    def __init__(self, raw_monkeys) -> None:
-        # Initialise monkeys and least common multiple
-        self.monkeys = [Monkey(monkey) for monkey in raw_monkeys]
-        self.maximum_divisor = lcm(*(monkey.divisor for monkey in self.monkeys))
-
-    def inspect(self, monkey: Monkey, is_first_part=True):
-        try:
-            # Inspect the first element in line
-            monkey.inspected += 1
-            element = monkey.items.pop(0)
-
-            # Apply worry level control
-            if is_first_part:
-                level = floor(monkey.operation(element) / 3)
-            else:
-                level = monkey.operation(element) % self.maximum_divisor
+from utils import read_input_batch
 
-            # Perform test and throw
-            test = monkey.test(level)
-            if test:
-                idx = monkey.throw_true
+# Opcodes of the operations, with their argument
+ADD, MULTIPLY, SQUARE = 0, 1, 2
+# Worry returned when an operation would overflow int64
+OVERFLOW = -1
+MAX_WORRY = np.iinfo(np.int64).max
+MAX_SQUARED = isqrt(MAX_WORRY)
+
+
+def compile_operation(operation: str) -> tuple[int, int]:
+    """Opcode and argument of an operation such as "new = old * 19" """
+    _, left, operator, right = operation.split("=")[1].split(" ")
+    if left == right == "old":
+        return (SQUARE, 0) if operator == "*" else (MULTIPLY, 2)
+    return (MULTIPLY if operator == "*" else ADD), int(right)
+
+
+@njit(cache=True)
+def play_round(
+    monkey: int,
+    worry: int,
+    table: np.ndarray,
+    relief: int,
+    modulus: int,
+    counts: np.ndarray,
+) -> tuple[int, int]:
+    """Follow an item during a round, adding the inspections to `counts`.
+    Monkeys play in order, so the item keeps moving while it is thrown forward.
+    The worry is OVERFLOW if it stops fitting in an int64."""
+    while True:
+        counts[monkey] += 1
+        opcode, argument = table[monkey, 0], table[monkey, 1]
+        if opcode == ADD:
+            if worry > MAX_WORRY - argument:
+                return monkey, OVERFLOW
+            worry += argument
+        elif opcode == MULTIPLY:
+            if worry > MAX_WORRY // argument:
+                return monkey, OVERFLOW
+            worry *= argument
+        else:
+            if worry > MAX_SQUARED:
+                return monkey, OVERFLOW
+            worry *= worry
+        worry //= relief
+        if modulus:
+            worry %= modulus
+        target = table[monkey, 3] if worry % table[monkey, 2] == 0 else table[monkey, 4]
+        if target < monkey:
+            return target, worry
+        monkey = target
+
+
+@njit(cache=True)
+def count_inspections(
+    owners: np.ndarray,
+    worries: np.ndarray,
+    table: np.ndarray,
+    n_rounds: int,
+    relief: int,
+    modulus: int,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Number of inspections of each monkey. Items are independent, so each of them
+    is followed separately: the cycle of its (monkey, worry) state at the start of
+    rounds is found with Brent's algorithm, and the rounds after the first cycle
+    are extrapolated.
+    Items whose worry overflows are flagged, and left out of the counts."""
+    n_monkeys = len(table)
+    counts = np.zeros(n_monkeys, dtype=np.int64)
+    scratch = np.zeros(n_monkeys, dtype=np.int64)
+    overflowed = np.zeros(len(owners), dtype=np.bool_)
+    for item in range(len(owners)):
+        start = (owners[item], worries[item])
+
+        # Brent's algorithm: find the cycle length (giving up after n_rounds)
+        power, length, steps = 1, 1, 1
+        tortoise = start
+        hare = play_round(start[0], start[1], table, relief, modulus, scratch)
+        while tortoise != hare and steps < n_rounds and hare[1] != OVERFLOW:
+            if power == length:
+                tortoise = hare
+                power *= 2
+                length = 0
+            hare = play_round(hare[0], hare[1], table, relief, modulus, scratch)
+            length += 1
+            steps += 1
+        # The other phases only replay the states reached by the hare
+        if hare[1] == OVERFLOW:
+            overflowed[item] = True
+            continue
+
+        # Find the start of the cycle
+        if tortoise == hare:
+            tortoise = hare = start
+            for _ in range(length):
+                hare = play_round(hare[0], hare[1], table, relief, modulus, scratch)
+            offset = 0
+            while tortoise != hare:
+                tortoise = play_round(
+                    tortoise[0], tortoise[1], table, relief, modulus, scratch
+                )
+                hare = play_round(hare[0], hare[1], table, relief, modulus, scratch)
+                offset += 1
+        else:
+            offset, length = n_rounds, 1
+
+        # Play the rounds before the cycle, then a single cycle and the remainder
+        state = start
+        for _ in range(min(offset, n_rounds)):
+            state = play_round(state[0], state[1], table, relief, modulus, counts)
+        if offset < n_rounds:
+            n_cycles, remainder = divmod(n_rounds - offset, length)
+            cycle = np.zeros(n_monkeys, dtype=np.int64)
+            for _ in range(length):
+                state = play_round(state[0], state[1], table, relief, modulus, cycle)
+            counts += n_cycles * cycle
+            for _ in range(remainder):
+                state = play_round(state[0], state[1], table, relief, modulus, counts)
+    return counts, overflowed
+
+
+def follow_item(
+    monkey: int,
+    worry: int,
+    table: list[list[int]],
+    n_rounds: int,
+    relief: int,
+    modulus: int,
+    counts: np.ndarray,
+):
+    """Play the rounds of an item with Python integers (which can't overflow),
+    adding the inspections to `counts`"""
+    for _ in range(n_rounds):
+        while True:
+            counts[monkey] += 1
+            opcode, argument, divisor, if_true, if_false = table[monkey]
+            if opcode == ADD:
+                worry += argument
+            elif opcode == MULTIPLY:
+                worry *= argument
             else:
-                idx = monkey.throw_false
-            self.monkeys[idx].items.append(level)
-
-        except IndexError:
-            pass
+                worry *= worry
+            worry //= relief
+            if modulus:
+                worry %= modulus
+            target = if_true if worry % divisor == 0 else if_false
+            if target < monkey:
+                monkey = target
+                break
+            monkey = target
 
-    def round(self, is_first_part=True):
-        # Iterate over all monkeys
-        for i in range(len(self.monkeys)):
-            # Iterate over all items in a monkey' possession
-            for _ in range(len(self.monkeys[i].items)):
-                self.inspect(self.monkeys[i], is_first_part)
 
-    def play(self, is_first_part=True):
-        # Simulate the game
+class MonkeyBusiness:
+    def __init__(self, raw_monkeys: List[List[str]]) -> None:
+        """Each monkey is compiled to a row of the table:
+        (opcode, argument, divisor, throw if true, throw if false)"""
+        search_int = re.compile(r"\d+")
+        owners, worries, table = [], [], []
+        for i, params in enumerate(raw_monkeys):
+            items = list(map(int, search_int.findall(params[1])))
+            owners += [i] * len(items)
+            worries += items
+            table.append(
+                compile_operation(params[2])
+                + tuple(int(search_int.findall(line)[0]) for line in params[3:6])
+            )
+        self.owners = np.array(owners, dtype=np.int64)
+        self.worries = np.array(worries, dtype=np.int64)
+        self.table = np.array(table, dtype=np.int64)
+        self.maximum_divisor = lcm(*self.table[:, 2])
+
+    def play(self, is_first_part=True, n_rounds: Optional[int] = None) -> list[int]:
+        """Number of inspections of each monkey"""
         if is_first_part:
-            num_round = 20
+            relief, modulus = 3, 0
+            if n_rounds is None:
+                n_rounds = 20
         else:
-            num_round = 10000
-
-        for _ in range(num_round):
-            self.round(is_first_part)
+            relief, modulus = 1, self.maximum_divisor
+            if n_rounds is None:
+                n_rounds = 10000
+        counts, overflowed = count_inspections(
+            self.owners, self.worries, self.table, n_rounds, relief, modulus
+        )
+        # Worries can outgrow int64 without a modulus, or with a large one
+        table = self.table.tolist()
+        for item in np.flatnonzero(overflowed):
+            owner, worry = int(self.owners[item]), int(self.worries[item])
+            follow_item(owner, worry, table, n_rounds, relief, modulus, counts)
+        return counts.tolist()
 
 
 def main(filename: str):
     monkeys_raw = read_input_batch(filename, line_split=False)
     monkey_problem = MonkeyBusiness(monkeys_raw)
-    monkey_problem.play()
-    times_inspected = [monkey.inspected for monkey in monkey_problem.monkeys]
+    times_inspected = monkey_problem.play()
     print(f"Result of part 1: {prod(sorted(times_inspected)[-2:])}")
 
-    monkey_problem = MonkeyBusiness(monkeys_raw)
-    monkey_problem.play(is_first_part=False)
-    times_inspected = [monkey.inspected for monkey in monkey_problem.monkeys]
+    times_inspected = monkey_problem.play(is_first_part=False)
     print(f"Result of part 2: {prod(sorted(times_inspected)[-2:])}")
 
 
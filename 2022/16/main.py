@@ -3,6 +3,9 @@ import math
 import re
 from collections import defaultdict
 
+import numpy as np
+from numba import njit  # type: ignore
+
 from utils import read_input
 
 
@@ -57,71 +60,76 @@ def compute_all_paths(start_node, nodes):
     return costs
 
 
-def compute_all_scenarios(dists, start_node, candidate_nodes, visited_nodes, t):
-    # Recursively compute all possible paths from start_node
-    #  to any node with a valve to open
-    for node in candidate_nodes:
-        # The +1 is for opening the valve
-        length = dists[start_node][node] + 1
-        # If we make it in time, recurse
-        if length < t:
-            yield from compute_all_scenarios(
-                dists,
-                node,
-                candidate_nodes - {node},
-                visited_nodes + [node],
-                t - length,
-            )
-    # Return the sequence of visited nodes (the path)
-    yield visited_nodes
-
-
-def pressure_release(lengths, nodes, start_node, trajectory, t):
-    # Compute the pressure release for a certain trajectory
-    current = start_node
-    pressure = 0
-    for node in trajectory:
-        # The +1 is for opening the valve
-        length = lengths[current][node] + 1
-        t -= length
-        pressure += t * nodes[node].rate
-        current = node
-    return pressure
+@njit(cache=True)
+def best_releases(dists: np.ndarray, rates: np.ndarray, t: int) -> np.ndarray:
+    """Compute the best pressure release for each set of opened valves, encoded as a
+    bitmask over the valves with non-zero rate.
+    `dists[i, j]` is the length of the path from valve i to valve j; the last row
+    corresponds to the start node."""
+    n_valves = rates.shape[0]
+    best = np.zeros(1 << n_valves, dtype=np.int64)
+    # Best pressure of the explored states at each (node, opened valves), which all
+    # have at least the current time left: a state that doesn't beat it is dominated,
+    # since more time left can't release less pressure
+    record = np.full((n_valves + 1, 1 << n_valves), -1, dtype=np.int64)
+    # (node, opened valves, pressure) states by time left, explored from the start:
+    # opening a valve always takes time, so each bucket is complete when reached
+    buckets = [[(n_valves, 0, 0)] for _ in range(t + 1)]
+    for time_left in range(t):
+        buckets[time_left].clear()
+    for time_left in range(t, 0, -1):
+        for node, mask, pressure in buckets[time_left]:
+            if record[node, mask] >= pressure:
+                continue
+            record[node, mask] = pressure
+            best[mask] = max(best[mask], pressure)
+            for valve in range(n_valves):
+                if mask & (1 << valve):
+                    continue
+                # The +1 is for opening the valve
+                new_time_left = time_left - dists[node, valve] - 1
+                # If we make it in time, open the valve
+                if new_time_left > 0:
+                    new_mask = mask | (1 << valve)
+                    new_pressure = pressure + new_time_left * rates[valve]
+                    if record[valve, new_mask] < new_pressure:
+                        buckets[new_time_left].append((valve, new_mask, new_pressure))
+        buckets[time_left].clear()
+    return best
+
+
+def subset_max(values: np.ndarray) -> np.ndarray:
+    """Sum-over-subsets (SOS) transform with max: for each mask, the max of
+    `values` over all its submasks"""
+    result = values.copy()
+    n_bits = result.shape[0].bit_length() - 1
+    for bit in range(n_bits):
+        # Pair each mask having `bit` set with the same mask without it
+        view = result.reshape(-1, 2, 1 << bit)
+        np.maximum(view[:, 1, :], view[:, 0, :], out=view[:, 1, :])
+    return result
 
 
 def main(filename: str):
     raw_input = [parse_input(line) for line in read_input(filename, line_strip=True)]
     nodes = {node.name: node for node in raw_input}
-    dists = compute_all_paths("AA", nodes)
-
-    candidate_nodes = set(dists.keys()) - {"AA"}
-    scenarios = compute_all_scenarios(dists, "AA", candidate_nodes, [], 30)
-    optimised_release = max(
-        pressure_release(dists, nodes, "AA", scenario, 30) for scenario in scenarios
+    lengths = compute_all_paths("AA", nodes)
+
+    # Index valves with non-zero rate, with the start node last
+    valves = sorted(set(lengths.keys()) - {"AA"})
+    rates = np.array([nodes[valve].rate for valve in valves], dtype=np.int64)
+    dists = np.array(
+        [[lengths[source][valve] for valve in valves] for source in valves + ["AA"]],
+        dtype=np.int64,
     )
-    print(f"Result of part 1: {optimised_release}")
-
-    scenarios = compute_all_scenarios(dists, "AA", candidate_nodes, [], 26)
-    # Calculate all possible release scenarios, sorting them (highest first)
-    releases = sorted(
-        [
-            (pressure_release(dists, nodes, "AA", scenario, 26), set(scenario))
-            for scenario in scenarios
-        ]
-    )[::-1]
-
-    # Check pairs
-    max_score = 0
-    for i, (p1, path_1) in enumerate(releases):
-        # Stopping criterion
-        if p1 * 2 < max_score:
-            break
-        for p2, path_2 in releases[i + 1 :]:
-            # Check if paths overlap
-            if len(path_1 & path_2) == 0:
-                pair_release = p1 + p2
-                max_score = max(max_score, pair_release)
-    print(f"Result of part 2: {max_score}")
+
+    print(f"Result of part 1: {best_releases(dists, rates, 30).max()}")
+
+    # The elephant and I open disjoint sets of valves: combine each set with the best
+    # release among the subsets of its complement (the complement of a mask m is
+    # full - m, hence the reversal)
+    releases = best_releases(dists, rates, 26)
+    print(f"Result of part 2: {(releases + subset_max(releases)[::-1]).max()}")
 
 
 if __name__ == "__main__":
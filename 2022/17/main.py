@@ -1,7 +1,6 @@
-import itertools
-from collections import defaultdict
-from dataclasses import dataclass
-from typing import List
+import numpy as np
+from numba import njit, types  # type: ignore
+from numba.typed import Dict  # type: ignore
 
 from utils import read_input, timefunc
 
@@ -12,133 +11,159 @@ SHAPES = [
     [(0, 0), (0, 1), (0, 2), (0, 3)],
     [(0, 0), (0, 1), (1, 0), (1, 1)],
 ]
-
-
-@dataclass
-class Rock:
-    # Define a rock as a list of integers
-    # Each integer represents a row of the rock, in binary
-    # Rocks are created already shifted by 2 to the right (as they would appear)
-    rows: List[int]
-
-    def create_rock(shape, width):
-        # Get boundaries
-        x_b, y_b = max(x for (x, _) in shape), max(y for (_, y) in shape)
-        # Iterate over all possible coordinates
-        matrix = [[(i, j) in shape for i in range(x_b + 1)] for j in range(y_b + 1)]
-        # Convert to bit format
-        rows = []
-        for row in matrix:
-            x = 0
-            for i, v in enumerate(row):
-                x += v << ((width - 1) - 2 - i)
-            rows.append(x)
-        return Rock(rows)
-
-    def jet_move_rock(self, direction, width):
-        if direction > 0:
-            # Check move is possible (right shift)
-            if any(row & 1 for row in self.rows):
-                return self
-            else:
-                return Rock([row >> 1 for row in self.rows])
-
-        else:
-            # Check move is possible (left shift)
-            if any(row & (1 << (width - 1)) for row in self.rows):
-                return self
-            else:
-                return Rock([row << 1 for row in self.rows])
-
-
-class RockSystem:
-    def __init__(self, jet_streams, shapes):
-        # Initialize params
-        self.width = 7
-        self.max_h = 0
-        self.period_h = 0
-
-        # Create rocks
-        rocks = [Rock.create_rock(shape, self.width) for shape in shapes]
-
-        # Create cyclic arrays
-        self.streams = itertools.cycle(jet_streams)
-        self.shapes = itertools.cycle(rocks)
-        self.len_streams = len(jet_streams)
-        self.len_shapes = len(shapes)
-
-        # Create grid
-        self.grid = defaultdict(int)
-        self.grid[-1] = 2**self.width - 1
-
-        # Create cache
-        self.cache = {}
-        self._last_jet = jet_streams[-1]
-
-    def check_intersect(self, shape, h):
-        # Check if intersects grid
-        return any(row & self.grid[h + i] for i, row in enumerate(shape.rows))
-
-    def update_grid(self, shape, h):
-        for i, row in enumerate(shape.rows):
-            self.grid[h + i + 1] |= row
-        return self
-
-    def push_or_fall(self, shape):
-        # Define vertical "floor" of shape
-        h = 3 + self.max_h
+WIDTH = 7
+# Rocks appear 3 rows above the tower, and are at most 4 rows tall
+SPAWN_ROWS = 8
+# Cycle cache: (shape index, jet index, skyline) -> (rock index, height)
+KEY_TYPE = types.UniTuple(types.int64, 3)
+VALUE_TYPE = types.UniTuple(types.int64, 2)
+
+
+def create_rocks(shapes: list[list[tuple[int, int]]], width: int) -> np.ndarray:
+    """Rocks as arrays of rows (from the bottom up, padded with zeros).
+    Each row is a bitmask, where bit `width - 1` is the leftmost column.
+    Rocks are created already shifted by 2 to the right (as they would appear)"""
+    rocks = np.zeros((len(shapes), 4), dtype=np.int64)
+    for k, shape in enumerate(shapes):
+        for x, y in shape:
+            rocks[k, y] |= 1 << ((width - 1) - 2 - x)
+    return rocks
+
+
+@njit(cache=True)
+def _collides(ring, rows, height, h, mask):
+    for i in range(height):
+        if ring[(h + i) & mask] & rows[i]:
+            return True
+    return False
+
+
+@njit(cache=True)
+def _grow_ring(ring, top, size):
+    """Copy the rows below `top` into a ring buffer of `size` rows"""
+    old_mask, mask = ring.shape[0] - 1, size - 1
+    grown = np.zeros(size, dtype=np.uint8)
+    for row in range(max(top - ring.shape[0], 0), top):
+        grown[row & mask] = ring[row & old_mask]
+    return grown
+
+
+@njit(cache=True)
+def simulate_tower(
+    rocks: np.ndarray,
+    rock_heights: np.ndarray,
+    jets: np.ndarray,
+    num: int,
+    ring_size: int = 256,
+) -> int:
+    """Drop `num` rocks and return the height of the tower.
+
+    The tower lives in a ring buffer of byte rows (`ring_size` must be a power of 2):
+    rows below the lowest column top can't be reached by falling rocks, so they
+    get overwritten as the tower grows. If the surface gets deeper than the ring,
+    the ring is doubled until it fits.
+    The skyline (depth of each column below the top, capped to a byte) is updated
+    incrementally, and cycles are detected on (shape index, jet index, skyline).
+    """
+    mask = ring_size - 1
+    full = (1 << WIDTH) - 1
+    ring = np.zeros(ring_size, dtype=np.uint8)
+    col_heights = np.zeros(WIDTH, dtype=np.int64)
+    rows = np.empty(4, dtype=np.int64)
+    cache = Dict.empty(key_type=KEY_TYPE, value_type=VALUE_TYPE)
+
+    max_h, period_h, jet, i = 0, 0, 0, 0
+    skipped = False
+    while i < num:
+        shape = i % rocks.shape[0]
+        height = rock_heights[shape]
+        rows[:] = rocks[shape]
         # Do push and fall
-        while not self.check_intersect(shape, h):
-            jet = next(self.streams)
-            jetted_shape = shape.jet_move_rock(jet, self.width)
-            if not self.check_intersect(jetted_shape, h):
-                shape = jetted_shape
+        h = max_h + 3
+        while True:
+            if jets[jet] > 0:
+                # Check move is possible (right shift)
+                edge = 0
+                for k in range(height):
+                    edge |= rows[k] & 1
+                if not edge:
+                    for k in range(height):
+                        rows[k] >>= 1
+                    if _collides(ring, rows, height, h, mask):
+                        for k in range(height):
+                            rows[k] <<= 1
+            else:
+                # Check move is possible (left shift)
+                edge = 0
+                for k in range(height):
+                    edge |= rows[k] & (1 << (WIDTH - 1))
+                if not edge:
+                    for k in range(height):
+                        rows[k] <<= 1
+                    if _collides(ring, rows, height, h, mask):
+                        for k in range(height):
+                            rows[k] >>= 1
+            jet = (jet + 1) % jets.shape[0]
+            if h == 0 or _collides(ring, rows, height, h - 1, mask):
+                break
             h -= 1
-        self.update_grid(shape, h)
-        self.max_h = max(self.max_h, h + len(shape.rows) + 1)
-
-        self._last_jet = jet
-
-        return self
-
-    def create_periodic(self, idx_c, maxh_c, i, num):
-        dh = self.max_h - maxh_c
-        dt = i - idx_c
 
-        n = (num - i) // dt
-        self.period_h += dh * n
-        i += dt * n
-
-        return i
-
-    def simulate(self, num):
-        i = 0
-        while i < num:
-            shape = next(self.shapes)
-            self.push_or_fall(shape)
-
-            status = tuple(self.grid[self.max_h - i] for i in range(0, 21))
-            pattern = (i % self.len_shapes, self._last_jet, status)
-            if pattern in self.cache:
-                idx_c, maxh_c = self.cache[pattern]
-                i = self.create_periodic(idx_c, maxh_c, i, num)
-            self.cache[pattern] = (i, self.max_h)
+        # Update the grid & the skyline
+        for k in range(height):
+            ring[(h + k) & mask] |= rows[k]
+            for col in range(WIDTH):
+                if rows[k] & (1 << (WIDTH - 1 - col)):
+                    col_heights[col] = max(col_heights[col], h + k + 1)
+        # Full rows also block everything below them
+        for k in range(height - 1, -1, -1):
+            if ring[(h + k) & mask] == full:
+                for col in range(WIDTH):
+                    col_heights[col] = max(col_heights[col], h + k + 1)
+                break
+        new_max_h = max(max_h, h + height)
+        # Grow the ring before clearing, so that reachable rows aren't overwritten
+        size = ring.shape[0]
+        while new_max_h - col_heights.min() + SPAWN_ROWS + 1 > size:
+            size *= 2
+        if size > ring.shape[0]:
+            ring = _grow_ring(ring, max_h + SPAWN_ROWS, size)
+            mask = size - 1
+        # Clear the rows that new rocks will fall through
+        for row in range(max_h + SPAWN_ROWS, new_max_h + SPAWN_ROWS):
+            ring[row & mask] = 0
+        max_h = new_max_h
+        i += 1
+
+        # Look for a cycle (only once)
+        if not skipped:
+            skyline = 0
+            for col in range(WIDTH):
+                skyline = (skyline << 8) | min(max_h - col_heights[col], 255)
+            pattern = (i % rocks.shape[0], jet, skyline)
+            if pattern in cache:
+                idx_c, maxh_c = cache[pattern]
+                n = (num - i) // (i - idx_c)
+                period_h = (max_h - maxh_c) * n
+                i += (i - idx_c) * n
+                skipped = True
+            else:
+                cache[pattern] = (i, max_h)
 
-            i += 1
+    return max_h + period_h
 
 
 @timefunc
 def main(filename: str):
     map_jet = {">": 1, "<": -1}
-    jet_streams = [*map(map_jet.get, read_input(filename, line_strip=True)[0])]
-
-    rock_system = RockSystem(jet_streams, SHAPES)
-    rock_system.simulate(2022)
-    print(f"Result of part 1: {rock_system.period_h + rock_system.max_h}")
-
-    rock_system = RockSystem(jet_streams, SHAPES)
-    rock_system.simulate(1000000000000)
-    print(f"Result of part 2: {rock_system.period_h + rock_system.max_h}")
+    jets = np.array(
+        [*map(map_jet.get, read_input(filename, line_strip=True)[0])], dtype=np.int8
+    )
+    rocks = create_rocks(SHAPES, WIDTH)
+    rock_heights = (rocks > 0).sum(axis=1)
+
+    print(f"Result of part 1: {simulate_tower(rocks, rock_heights, jets, 2022)}")
+    res = simulate_tower(rocks, rock_heights, jets, 1000000000000)
+    print(f"Result of part 2: {res}")
 
 
 if __name__ == "__main__":
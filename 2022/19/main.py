@@ -1,7 +1,13 @@
+import os
 import re
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from typing import Any
+from typing import Optional
+
+import numpy as np
+from numba import njit  # type: ignore
+
 from utils import read_input, timefunc
 
 
@@ -63,163 +69,108 @@ class Robot:
         self.ob_cost = costs["obsidian"]
 
 
-TRI_NUMBERS = [(i - 1) * i // 2 for i in range(33)]
-
-
-# Operations have been optimised by avoiding lists
-class MiningOp:
-    def __init__(self, blueprint, time) -> None:
-        self.time = time
-        # Order is: ore, clay, obsidian, geode
-        self.active_robots = (1, 0, 0, 0)
-        self.resources = (0, 0, 0, 0)
-        self.max_requirements = tuple(
-            list(
-                max(getattr(robot, key) for robot in blueprint)
-                for key in ["oe_cost", "c_cost", "ob_cost"]
-            )
-            + [self.time]
-        )
-        self.blueprint = blueprint
-        self.max_geodes = 0
-        self.best_geodes: defaultdict[Any, int] = defaultdict(int)
-        pass
-
-    def op_potential(self, time, *args):
-        _, _, _, g, _, _, _, g_r = args
-        return g + g_r * time + TRI_NUMBERS[time]
-
-    def too_many_robots(self, robot, *args):
-        oe_max, c_max, ob_max, _ = self.max_requirements
-        _, _, _, _, oe_r, c_r, ob_r, _ = args
-        if (
-            robot.type == 0
-            and oe_r >= oe_max
-            or robot.type == 1
-            and c_r >= c_max
-            or robot.type == 2
-            and (ob_r >= ob_max or c_r == 0)
-            or robot.type == 3
-            and ob_r == 0
-        ):
-            return True
-        return False
-
-    def augment_ore(self, *args):
-        oe_cost, oe, c, ob, g, oe_r, c_r, ob_r, g_r = args
-        return (
-            oe - oe_cost + oe_r,
-            c + c_r,
-            ob + ob_r,
-            g + g_r,
-            oe_r + 1,
-            c_r,
-            ob_r,
-            g_r,
-        )
-
-    def augment_clay(self, *args):
-        oe_cost, oe, c, ob, g, oe_r, c_r, ob_r, g_r = args
-        return (
-            oe - oe_cost + oe_r,
-            c + c_r,
-            ob + ob_r,
-            g + g_r,
-            oe_r,
-            c_r + 1,
-            ob_r,
-            g_r,
-        )
-
-    def augment_obsidian(self, *args):
-        oe_cost, c_cost, oe, c, ob, g, oe_r, c_r, ob_r, g_r = args
-        return (
-            oe - oe_cost + oe_r,
-            c - c_cost + c_r,
-            ob + ob_r,
-            g + g_r,
-            oe_r,
-            c_r,
-            ob_r + 1,
-            g_r,
-        )
-
-    def augment_geode(self, *args):
-        oe_cost, ob_cost, oe, c, ob, g, oe_r, c_r, ob_r, g_r = args
-        return (
-            oe - oe_cost + oe_r,
-            c + c_r,
-            ob - ob_cost + ob_r,
-            g + g_r,
-            oe_r,
-            c_r,
-            ob_r,
-            g_r + 1,
-        )
-
-    def target_op(self, time, robot, *args):
-        oe, c, ob, g, oe_r, c_r, ob_r, g_r = args
+def blueprint_costs(blueprint: list[Robot]) -> np.ndarray:
+    """Costs (ore, clay, obsidian) of each robot type, as a (4, 3) array"""
+    costs = np.zeros((4, 3), dtype=np.int64)
+    for robot in blueprint:
+        costs[robot.type] = robot.oe_cost, robot.c_cost, robot.ob_cost
+    return costs
+
+
+@njit(cache=True)
+def op_potential(time: int, g: int, g_r: int) -> int:
+    """Geodes collected if a geode robot was built at every remaining step"""
+    return g + g_r * time + (time - 1) * time // 2
+
+
+@njit(cache=True)
+def too_many_robots(
+    robot: int, c_r: int, oe_r: int, ob_r: int, max_requirements: np.ndarray
+) -> bool:
+    """More robots than any build can consume (or no way to build the robot)"""
+    oe_max, c_max, ob_max = max_requirements
+    return (
+        robot == 0
+        and oe_r >= oe_max
+        or robot == 1
+        and c_r >= c_max
+        or robot == 2
+        and (ob_r >= ob_max or c_r == 0)
+        or robot == 3
+        and ob_r == 0
+    )
+
+
+@njit(cache=True)
+def max_geodes(costs: np.ndarray, time: int) -> int:
+    """Branch & bound DFS, where each branch targets the next robot to build and
+    waits until it can be built. Frames of the explicit stack are:
+    (time, robot, ore, clay, obsidian, geodes, and the 4 robot counts)"""
+    max_requirements = np.array([costs[:, k].max() for k in range(3)])
+    best_geodes = np.zeros(time + 1, dtype=np.int64)
+    best = 0
+    # Each frame pushes at most 4 frames, with less time left
+    stack = np.zeros((4 * (time + 2), 10), dtype=np.int64)
+    n_frames = 0
+    for robot in range(3, -1, -1):
+        stack[n_frames, :2] = time, robot
+        stack[n_frames, 6] = 1
+        n_frames += 1
+
+    while n_frames > 0:
+        n_frames -= 1
+        t, robot, oe, c, ob, g, oe_r, c_r, ob_r, g_r = stack[n_frames]
         # Pruning operations
         # 1. Check if branch is underperforming
-        if self.best_geodes[time] > g:
-            return None
-        else:
-            self.best_geodes[time] = g
+        if best_geodes[t] > g:
+            continue
+        best_geodes[t] = g
         # 2. Check if branch has low potential
-        if self.op_potential(time, *args) <= self.max_geodes:
-            return None
+        if op_potential(t, g, g_r) <= best:
+            continue
         # 3. Check if we have too many robots
-        if self.too_many_robots(robot, *args):
-            return None
-
-        # If branch survives, enter time loop
-        while time > 0:
-            # Check if you can build the target robot
-            # If you can, perform the necessary agumentation
-            # Then, recurse all possible robots as new targets
-
-            if robot.type == 0 and oe >= (oe_cost := getattr(robot, "oe_cost")):
-                new_args = self.augment_ore(oe_cost, *args)
-                for new_robot in self.blueprint:
-                    self.target_op(time - 1, new_robot, *new_args)
-                return None
-
-            elif robot.type == 1 and oe >= (oe_cost := getattr(robot, "oe_cost")):
-                new_args = self.augment_clay(oe_cost, *args)
-                for new_robot in self.blueprint:
-                    self.target_op(time - 1, new_robot, *new_args)
-                return None
-
-            elif (
-                robot.type == 2
-                and oe >= (oe_cost := getattr(robot, "oe_cost"))
-                and c >= (c_cost := getattr(robot, "c_cost"))
-            ):
-                new_args = self.augment_obsidian(oe_cost, c_cost, *args)
-                for new_robot in self.blueprint:
-                    self.target_op(time - 1, new_robot, *new_args)
-                return None
-
-            elif (
-                robot.type == 3
-                and oe >= (oe_cost := getattr(robot, "oe_cost"))
-                and ob >= (ob_cost := getattr(robot, "ob_cost"))
-            ):
-                new_args = self.augment_geode(oe_cost, ob_cost, *args)
-                for new_robot in self.blueprint:
-                    self.target_op(time - 1, new_robot, *new_args)
-                return None
-
-            time, oe, c, ob, g = time - 1, oe + oe_r, c + c_r, ob + ob_r, g + g_r
-            args = oe, c, ob, g, oe_r, c_r, ob_r, g_r
-
-        self.max_geodes = max(self.max_geodes, g)
-        return None
-
-    def optimise_op(self):
-        for robot in self.blueprint:
-            self.target_op(self.time, robot, *self.resources, *self.active_robots)
-        return None
+        if too_many_robots(robot, c_r, oe_r, ob_r, max_requirements):
+            continue
+
+        # If branch survives, wait until the target robot can be built
+        built = False
+        while t > 0:
+            oe_cost, c_cost, ob_cost = costs[robot]
+            t, g = t - 1, g + g_r
+            if oe >= oe_cost and c >= c_cost and ob >= ob_cost:
+                oe, c, ob = oe - oe_cost + oe_r, c - c_cost + c_r, ob - ob_cost + ob_r
+                robots = np.array([oe_r, c_r, ob_r, g_r])
+                robots[robot] += 1
+                # Then, explore all possible robots as new targets (in order)
+                for new_robot in range(3, -1, -1):
+                    stack[n_frames, :6] = t, new_robot, oe, c, ob, g
+                    stack[n_frames, 6:] = robots
+                    n_frames += 1
+                built = True
+                break
+            oe, c, ob = oe + oe_r, c + c_r, ob + ob_r
+
+        if not built:
+            best = max(best, g)
+
+    return best
+
+
+def _max_geodes_task(args: tuple) -> int:
+    return max_geodes(*args)
+
+
+def evaluate_blueprints(
+    blueprints: list[list[Robot]], time: int, n_workers: Optional[int] = None
+) -> list[int]:
+    """Maximum number of geodes for each blueprint. Blueprints are independent, so
+    they are evaluated in parallel over a process pool."""
+    tasks = [(blueprint_costs(blueprint), time) for blueprint in blueprints]
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1 or len(tasks) == 1:
+        return [_max_geodes_task(task) for task in tasks]
+    with ProcessPoolExecutor(max_workers=min(n_workers, len(tasks))) as executor:
+        return list(executor.map(_max_geodes_task, tasks))
 
 
 @timefunc
@@ -227,21 +178,13 @@ def main(filename: str):
     blueprints = create_blueprints(
         [line.split(": ")[1] for line in read_input(filename, line_strip=True)]
     )
-    res = 0
-    for id, blueprint in blueprints.items():
-        op = MiningOp(blueprint, 24)
-        op.optimise_op()
-        res += op.max_geodes * (id + 1)
-
+    geodes = evaluate_blueprints(list(blueprints.values()), 24)
+    res = sum(max_geodes * (id + 1) for id, max_geodes in enumerate(geodes))
     print(f"Result of part 1: {res}")
 
     res = 1
-    subset_blueprints = {k: blueprints[k] for k in range(3)}
-    for id, blueprint in subset_blueprints.items():
-        op = MiningOp(blueprint, 32)
-        op.optimise_op()
-        res *= op.max_geodes
-
+    for max_geodes in evaluate_blueprints([blueprints[k] for k in range(3)], 32):
+        res *= max_geodes
     print(f"Result of part 2: {res}")
 
 
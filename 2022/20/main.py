@@ -1,37 +1,100 @@
-from collections import deque
+import numpy as np
+from numba import njit  # type: ignore
 
-from utils import read_input, timefunc
+from utils import timefunc
+from utils.parsing import read_integers
 
+DECRYPTION_KEY = 811589153
+GROVE_OFFSETS = (1000, 2000, 3000)
+
+
+@njit(cache=True)
+def _fill_blocks(
+    order: np.ndarray, blocks: np.ndarray, sizes: np.ndarray, block_of: np.ndarray
+):
+    """Spread the ids (in the order of the file) evenly over the blocks"""
+    n_blocks = len(sizes)
+    start = 0
+    for b in range(n_blocks):
+        end = (b + 1) * len(order) // n_blocks
+        sizes[b] = end - start
+        blocks[b, : end - start] = order[start:end]
+        block_of[order[start:end]] = b
+        start = end
+
+
+@njit(cache=True)
+def _flatten_blocks(blocks: np.ndarray, sizes: np.ndarray) -> np.ndarray:
+    order = np.empty(sizes.sum(), dtype=np.int64)
+    start = 0
+    for b in range(len(sizes)):
+        order[start : start + sizes[b]] = blocks[b, : sizes[b]]
+        start += sizes[b]
+    return order
+
+
+@njit(cache=True)
+def mix(values: np.ndarray, n_mix: int) -> np.ndarray:
+    """Mix the numbers n_mix times, and return the final order of their ids.
+    The file is kept as a blocked list of ids (about sqrt(n) blocks of about sqrt(n)
+    ids), with the block of each id, so that finding, removing and inserting an id
+    cost O(sqrt(n)). Blocks are rebalanced whenever one of them gets full."""
+    n = len(values)
+    order = np.arange(n)
+    if n < 2:
+        return order
+    block_size = max(1, int(np.sqrt(n)))
+    n_blocks = -(-n // block_size)
+    blocks = np.empty((n_blocks, 2 * block_size), dtype=np.int64)
+    sizes = np.empty(n_blocks, dtype=np.int64)
+    block_of = np.empty(n, dtype=np.int64)
+    _fill_blocks(order, blocks, sizes, block_of)
+    shifts = values % (n - 1)
 
-def mix_match(dict_input, n_mix):
-    mix_X = deque((k, v) for k, v in dict_input.items())
     for _ in range(n_mix):
-        for k, v in dict_input.items():
-            # Rotate list left by the amount corresponding to
-            #  the index of the (k,v) tuple
-            mix_X.rotate(-mix_X.index((k, v)))
-            # Pop the (k,v) element and rotate left by v
-            mix_X.rotate(-mix_X.popleft()[1])
-            # Insert the (k,v) element at the left end
-            mix_X.appendleft((k, v))
+        for i in range(n):
+            # Find and remove the id
+            b = block_of[i]
+            j = 0
+            while blocks[b, j] != i:
+                j += 1
+            position = j
+            for k in range(b):
+                position += sizes[k]
+            for k in range(j, sizes[b] - 1):
+                blocks[b, k] = blocks[b, k + 1]
+            sizes[b] -= 1
 
-    # Obtain the index of the target element (0)
-    target_idx = [v for _, v in mix_X].index(0)
-    # Return
-    return sum(mix_X[(target_idx + k) % len(mix_X)][1] for k in [1000, 2000, 3000])
+            # Insert it at its new position among the n - 1 other numbers
+            position = (position + shifts[i]) % (n - 1)
+            b = 0
+            while position > sizes[b]:
+                position -= sizes[b]
+                b += 1
+            for k in range(sizes[b], position, -1):
+                blocks[b, k] = blocks[b, k - 1]
+            blocks[b, position] = i
+            sizes[b] += 1
+            block_of[i] = b
 
+            if sizes[b] == blocks.shape[1]:
+                _fill_blocks(_flatten_blocks(blocks, sizes), blocks, sizes, block_of)
+
+    return _flatten_blocks(blocks, sizes)
 
-@timefunc
-def main(filename: str):
-    X = list(map(int, read_input(filename, line_strip=True)))
-    Y = list(range(len(X)))
 
-    dict_input = {k: v for k, v in zip(Y, X)}
-    print(f"Result of part 1: {mix_match(dict_input, 1)}")
+def mix_match(values: np.ndarray, n_mix: int) -> int:
+    """Sum of the grove coordinates after mixing"""
+    mixed = values[mix(values, n_mix)]
+    target_idx = np.flatnonzero(mixed == 0)[0]
+    return int(sum(mixed[(target_idx + k) % len(mixed)] for k in GROVE_OFFSETS))
 
-    dec_key = 811589153
-    dict_input = {k: v * dec_key for k, v in zip(Y, X)}
-    print(f"Result of part 2: {mix_match(dict_input, 10)}")
+
+@timefunc
+def main(filename: str):
+    X = read_integers(filename)
+    print(f"Result of part 1: {mix_match(X, 1)}")
+    print(f"Result of part 2: {mix_match(X * DECRYPTION_KEY, 10)}")
 
 
 if __name__ == "__main__":
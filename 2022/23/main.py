@@ -1,109 +1,116 @@
-from collections import Counter, deque
-
 import numpy as np
-from scipy.ndimage import convolve
-
-from utils import CoordTuple, timefunc
-
-CONV_FILTER = np.array([[1, 1, 1], [1, 0, 1], [1, 1, 1]], dtype=int)
-S_FILTER = np.array([[1, 1, 1], [0, 0, 0], [0, 0, 0]], dtype=int)
-N_FILTER = np.array([[0, 0, 0], [0, 0, 0], [1, 1, 1]], dtype=int)
-E_FILTER = np.array([[1, 0, 0], [1, 0, 0], [1, 0, 0]], dtype=int)
-W_FILTER = np.array([[0, 0, 1], [0, 0, 1], [0, 0, 1]], dtype=int)
-
-
-def trim_zeros(arr: np.ndarray) -> np.ndarray:
-    slices = tuple(slice(idx.min(), idx.max() + 1) for idx in np.nonzero(arr))
-    return arr[slices]
-
 
-def add_tuples(t1: CoordTuple, t2: CoordTuple) -> CoordTuple:
-    return (t1[0] + t2[0], t1[1] + t2[1])
-
-
-def perform_convolutions(grid: np.ndarray) -> tuple[dict[str, np.ndarray], np.ndarray]:
-    # Perform 4 directional convolutions and a full one
-    convs = {
-        move: convolve(grid, d_filter, mode="constant")
-        for move, d_filter in zip(
-            ["N", "S", "W", "E"], [N_FILTER, S_FILTER, W_FILTER, E_FILTER]
+from utils import read_input, timefunc
+
+# Neighbours of an elf, and for each direction (in the initial order) the
+# neighbours that must be free and the move
+NEIGHBORS = np.array(
+    [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+)
+DIRECTIONS = [
+    ("N", [0, 1, 2], (-1, 0)),
+    ("S", [5, 6, 7], (1, 0)),
+    ("W", [0, 3, 5], (0, -1)),
+    ("E", [2, 4, 7], (0, 1)),
+]
+# Padding added around the elves whenever they get close to the border
+PADDING = 10
+
+
+class ElfDiffusion:
+    """Elves positions are kept in an array of flat cell indices, along with an
+    occupancy grid and the number of neighbours of each cell. After each round,
+    these are only updated around the elves that actually moved."""
+
+    def __init__(self, positions: np.ndarray):
+        self.idx = 0
+        self._allocate(positions.astype(np.int64))
+
+    @property
+    def positions(self) -> np.ndarray:
+        return np.stack(np.divmod(self.cells, self.shape[1]), axis=1)
+
+    def _allocate(self, positions: np.ndarray):
+        """(Re)create the grids around the elves, with some padding"""
+        positions = positions + PADDING - positions.min(axis=0)
+        self.shape = tuple(positions.max(axis=0) + PADDING + 1)
+        # Flat offsets of the neighbours and of the moves
+        self.offsets = NEIGHBORS @ np.array([self.shape[1], 1])
+        self.moves = np.array([move for _, _, move in DIRECTIONS]) @ np.array(
+            [self.shape[1], 1]
+        )
+        self.cells = positions[:, 0] * self.shape[1] + positions[:, 1]
+        self.occupied = np.zeros(self.shape[0] * self.shape[1], dtype=bool)
+        self.occupied[self.cells] = True
+        self.n_neighbors = np.zeros(self.shape[0] * self.shape[1], dtype=np.int64)
+        np.add.at(self.n_neighbors, (self.cells[:, None] + self.offsets).ravel(), 1)
+
+    def round(self) -> int:
+        """Perform a round. Returns the number of elves that moved"""
+        # Only elves with neighbours propose a move
+        active = np.flatnonzero(self.n_neighbors[self.cells] > 0)
+        free = ~self.occupied[self.cells[active, None] + self.offsets]
+
+        # First half of round: propose the first free direction (rotating order)
+        order = [(self.idx + k) % len(DIRECTIONS) for k in range(len(DIRECTIONS))]
+        possible = np.stack(
+            [free[:, DIRECTIONS[k][1]].all(axis=1) for k in order], axis=1
         )
-    }
-    # Store sum of all directions - we don't care about double summations
-    full_conv = np.array(sum(conv for conv in convs.values()))
-    return convs, full_conv
-
-
-def enlarge_grid(grid):
-    # Pad grid by 10
-    grid = np.pad(grid, ((10, 10), (10, 10)))
-    # Elves pos
-    x_e, y_e = np.nonzero(grid)
-    # Initialise lookup for elves
-    lookup_elves = dict()
-    for i, (x, y) in enumerate(zip(x_e, y_e)):
-        lookup_elves[i] = (x, y)
-    # Initialise convolutions
-    convs, full_conv = perform_convolutions(grid)
-
-    return grid, lookup_elves, convs, full_conv
-
-
-def diffuse_elves(grid: np.ndarray) -> tuple[np.ndarray, int]:
-    grid, lookup_elves, convs, full_conv = enlarge_grid(grid)
-    # Direction queue
-    directions = deque([("N", (-1, 0)), ("S", (1, 0)), ("W", (0, -1)), ("E", (0, 1))])
-
-    step = 0
-    while any(full_conv[c] > 0 for c in lookup_elves.values()):
-        step += 1
-        # First half of round: propose move
-        moves = []
-        for i in lookup_elves:
-            if full_conv[lookup_elves[i]] == 0:
-                # Don't move
-                moves.append((i, lookup_elves[i]))
-            else:
-                # Check which of the direction convolution filters returns 0
-                # Use the direction queue
-                for move, direction in directions:
-                    if convs[move][lookup_elves[i]] == 0:
-                        # Add move and break loop
-                        moves.append((i, add_tuples(lookup_elves[i], direction)))
-                        break
-        # Second half of round: move
-        # Filter move list so that only unique elements are preserved
-        overlaps = Counter(t for _, t in moves)
-        for e_id, t in moves:
-            if overlaps[t] == 1:
-                # Update grid as well
-                grid[lookup_elves[e_id]] = 0
-                lookup_elves[e_id] = t
-                grid[lookup_elves[e_id]] = 1
-
-        # Perform convolutions
-        convs, full_conv = perform_convolutions(grid)
-        # Rotate queue
-        directions.rotate(-1)
-
-        if step == 10:
-            # Store result for part 1
-            part_1_grid = trim_zeros(grid).copy()
-        # If we reached the boundary, re-enlarge
-        if any(
-            [grid[0, :].sum(), grid[:, 0].sum(), grid[-1, :].sum(), grid[:, -1].sum()]
+        proposing = possible.any(axis=1)
+        movers = active[proposing]
+        targets = (
+            self.cells[movers] + self.moves[order][possible[proposing].argmax(axis=1)]
+        )
+
+        # Second half of round: move if no other elf proposed the same target
+        _, inverse, counts = np.unique(targets, return_inverse=True, return_counts=True)
+        unique = counts[inverse] == 1
+        movers, targets = movers[unique], targets[unique]
+        sources = self.cells[movers]
+        self.cells[movers] = targets
+        self.idx += 1
+
+        # If we reached the boundary, re-enlarge (which recreates the grids)
+        rows, cols = np.divmod(targets, self.shape[1])
+        if len(targets) and (
+            rows.min() < 1
+            or cols.min() < 1
+            or rows.max() >= self.shape[0] - 1
+            or cols.max() >= self.shape[1] - 1
         ):
-            grid, lookup_elves, convs, full_conv = enlarge_grid(grid)
+            self._allocate(self.positions)
+            return len(movers)
+
+        # Otherwise only update the grids around the moves
+        self.occupied[sources] = False
+        self.occupied[targets] = True
+        # (elves are on distinct cells, so indices are unique for each offset)
+        for offset in self.offsets:
+            self.n_neighbors[sources + offset] -= 1
+            self.n_neighbors[targets + offset] += 1
+        return len(movers)
 
-    return part_1_grid, step + 1
+    def empty_ground(self) -> int:
+        """Empty tiles in the smallest rectangle containing all the elves"""
+        positions = self.positions
+        size = positions.max(axis=0) - positions.min(axis=0) + 1
+        return int(size.prod()) - len(positions)
 
 
 @timefunc
 def main(filename: str):
-    grid = np.where(np.genfromtxt(filename, delimiter="", dtype=str) == "#", 1, 0)
-    part_1_grid, part_2_num = diffuse_elves(grid)
-    print(f"Result of part 1: {(part_1_grid == 0).sum()}")
-    print(f"Result of part 2: {part_2_num}")
+    grid = np.array([list(line) for line in read_input(filename)])
+    elves = ElfDiffusion(np.argwhere(grid == "#"))
+    # Keep track of the first round where no elf moves (it may be within 10 rounds)
+    last_round = 0
+    while elves.idx < 10:
+        if not elves.round() and not last_round:
+            last_round = elves.idx
+    print(f"Result of part 1: {elves.empty_ground()}")
+    while not last_round:
+        if not elves.round():
+            last_round = elves.idx
+    print(f"Result of part 2: {last_round}")
 
 
 if __name__ == "__main__":
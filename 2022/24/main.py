@@ -1,142 +1,98 @@
-import heapq
-import itertools
-import math
-from collections import defaultdict
-from functools import lru_cache
-
 import numpy as np
 
-from utils import CoordTuple, timefunc
+from utils import CoordTuple, read_input, timefunc
+from utils.grid import GridGraph
+from utils.search import StateGraph, shortest_paths
+
+DICT_DIRECTIONS = {">": (0, 1), "v": (1, 0), "<": (0, -1), "^": (-1, 0)}
+
+
+def create_blizzards_lookups(grid: np.ndarray, grid_period: int) -> np.ndarray:
+    """Create a boolean array with the blizzards position for each time step.
+    Since we have periodicity over the valley, lcm(grid_x - 2, grid_y - 2)
+    gives the number of unique maps possible (since it guarantees we have
+    cycled over all possible xy options)"""
+    blizzards = np.zeros((grid_period, *grid.shape), dtype=bool)
+    times = np.arange(grid_period)[:, np.newaxis]
+    for arrow, (dx, dy) in DICT_DIRECTIONS.items():
+        # Get blizzard positions and move them periodically inside the valley
+        x_b, y_b = (grid == arrow).nonzero()
+        x_t = (x_b - 1 + times * dx) % (grid.shape[0] - 2) + 1
+        y_t = (y_b - 1 + times * dy) % (grid.shape[1] - 2) + 1
+        blizzards[np.broadcast_to(times, x_t.shape), x_t, y_t] = True
+
+    return blizzards
 
 
-@lru_cache(maxsize=None)
-def manhattan(point: CoordTuple, source: CoordTuple) -> float:
-    return sum(abs(val1 - val2) for val1, val2 in zip(point, source))
+def create_state_graph(grid: np.ndarray, blizzards: np.ndarray) -> StateGraph:
+    """Graph of the (time, node) states of the expedition, encoded as
+    time * n_nodes + node (time is periodic). At each step, the expedition moves to
+    a neighbor or waits, as long as the destination is free from blizzards."""
+    grid_period = blizzards.shape[0]
+    grid_graph = GridGraph(grid.shape, mask=grid != "#")
+    n_nodes = len(grid_graph)
+
+    # Moves (including waiting), sorted by source node
+    sources = np.concatenate(
+        (np.repeat(np.arange(n_nodes), grid_graph.degree()), np.arange(n_nodes))
+    )
+    targets = np.concatenate((grid_graph.indices, np.arange(n_nodes)))
+    open_sources = (grid != "#").ravel()[sources]
+    order = np.argsort(sources[open_sources], kind="stable")
+    sources, targets = sources[open_sources][order], targets[open_sources][order]
+
+    # Replicate the moves for every time step, dropping those ending on a blizzard
+    next_times = (np.arange(grid_period)[:, np.newaxis] + 1) % grid_period
+    free = ~blizzards.reshape(grid_period, n_nodes)[next_times, targets]
+    indices = (next_times * n_nodes + targets)[free]
+    state_sources = (np.arange(grid_period)[:, np.newaxis] * n_nodes + sources)[free]
+    indptr = np.zeros(grid_period * n_nodes + 1, dtype=np.int64)
+    np.cumsum(
+        np.bincount(state_sources, minlength=grid_period * n_nodes), out=indptr[1:]
+    )
+    return StateGraph(indptr, indices, np.ones(len(indices), dtype=np.int64))
 
 
 def shortest_path_astar(
     start: CoordTuple,
-    dict_nn: dict[CoordTuple, list[CoordTuple]],
-    dict_blizzards: dict[int, set[CoordTuple]],
-    grid_period: int,
+    graph: StateGraph,
+    grid: np.ndarray,
     end: CoordTuple,
     start_time: int,
 ) -> int:
-    # A node is a tuple (t,pos)
-    start_node = (0, start)
-    # Dictionary keeping track of the best guess
-    #  as to how cheap a path could be from start to finish if it goes through node
-    #  use Manhattan distance to end as heuristic
-    heur_dict = defaultdict(lambda: math.inf, {start_node: manhattan(start, end)})
-    # Min-Heap queue of nodes to process
-    queue = [(heur_dict[start_node], start_node)]
-    # Points (t,pos) already visited
-    visited = set()
-    while queue:
-        # Pop the element of the queue with the shortest
-        # estimated distance to goal - ignore if already visited
-        _, (current_time, current_node) = heapq.heappop(queue)
-        if (current_time, current_node) in visited:
-            continue
-        visited.add((current_time, current_node))
-        # If we arrived at the end node,
-        # return the shortest time
-        if current_node == end:
-            return current_time
-
-        # Advance time
-        new_time = current_time + 1
-
-        # Check all neighbors & the current node (in case we wait)
-        for neighbor in dict_nn[current_node] + [current_node]:
-            # Only consider candidate if not on a blizzard
-            if neighbor not in dict_blizzards[(start_time + new_time) % grid_period]:
-                heur_dict[(new_time, neighbor)] = new_time + manhattan(neighbor, end)
-                # Add to queue
-                heapq.heappush(
-                    queue,
-                    (
-                        heur_dict[(new_time, neighbor)],
-                        (new_time, neighbor),
-                    ),
-                )
-    return -1
-
-
-def _create_periodic(x, i, vec, bound):
-    x_t = (x + i * vec) % bound
-    if x_t < 1:
-        x_t += bound
-    return x_t
-
-
-def create_blizzards_lookups(
-    grid: np.ndarray, grid_period: int
-) -> dict[int, set[CoordTuple]]:
-    # Create a dictionary with the blizzards position for each time step
-    # Since we have periodicity over the valley, lcm(grid_x - 2, grid_y - 2)
-    # gives the number of unique maps possible (since it guarantees we have
-    #  cycled over all possible xy options)
-    dict_blizzards = defaultdict(set)
-    for arrow, vector in zip([">", "v", "<", "^"], [(0, 1), (1, 0), (0, -1), (-1, 0)]):
-        # Get blizzard positions
-        x_b, y_b = (grid == arrow).nonzero()
-        for x, y in zip(x_b, y_b):
-            for i in range(grid_period):
-                x_t = _create_periodic(x, i, vector[0], grid.shape[0] - 2)
-                y_t = _create_periodic(y, i, vector[1], grid.shape[1] - 2)
-                dict_blizzards[i].add((x_t, y_t))
-
-    return dict_blizzards
-
-
-def _get_neighbors(
-    node: CoordTuple, bounds: dict[str, CoordTuple], grid: np.ndarray
-) -> list[CoordTuple]:
-    """Simple function to obtain the neighbors coordinates of a point on a grid.
-    The grid bounds are considered."""
-    x, y = node
-    list_nn = []
-    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-        xx, yy = (x + dx, y + dy)
-        if (
-            bounds["x"][0] <= xx < bounds["x"][1]
-            and bounds["y"][0] <= yy < bounds["y"][1]
-            and grid[(xx, yy)] != "#"
-        ):
-            list_nn.append((xx, yy))
-    return list_nn
-
-
-def create_neighbors_dict(
-    grid: np.ndarray,
-) -> dict[CoordTuple, list[CoordTuple]]:
-    """Create dictionary of neighbors for a grid"""
-    dict_nn: dict[CoordTuple, list[CoordTuple]] = {
-        node: []
-        for node in list(itertools.product(range(grid.shape[0]), range(grid.shape[1])))
-    }
-    bounds = {"x": (0, grid.shape[0]), "y": (0, grid.shape[1])}
-    for node in dict_nn.keys():
-        dict_nn[node] = _get_neighbors(node, bounds, grid)
-
-    return dict_nn
+    """A* search over the (time, node) states, using the Manhattan distance to the
+    end as heuristic. Returns the time needed to reach the end."""
+    n_nodes = grid.size
+    grid_period = graph.n_states // n_nodes
+    x, y = np.indices(grid.shape)
+    heuristic = np.abs(x - end[0]) + np.abs(y - end[1])
+    end_node = end[0] * grid.shape[1] + end[1]
+
+    # Any time is fine to reach the end
+    targets = np.zeros((grid_period, n_nodes), dtype=bool)
+    targets[:, end_node] = True
+    start_state = (start_time % grid_period) * n_nodes + start[0] * grid.shape[1]
+    dists, target = shortest_paths(
+        graph,
+        [start_state + start[1]],
+        targets.ravel(),
+        heuristic=np.tile(heuristic.ravel(), grid_period),
+    )
+    return int(dists[target]) if target != -1 else -1
 
 
 @timefunc
 def main(filename: str):
-    grid = np.genfromtxt(filename, delimiter=None, dtype=str)
+    grid = np.array([list(line) for line in read_input(filename)])
     grid_period = np.lcm(grid.shape[0] - 2, grid.shape[1] - 2)
-    dict_blizzards = create_blizzards_lookups(grid, grid_period)
-    dict_nn = create_neighbors_dict(grid)
+    blizzards = create_blizzards_lookups(grid, grid_period)
+    graph = create_state_graph(grid, blizzards)
     start = (0, 1)
     end = (grid.shape[0] - 1, grid.shape[1] - 2)
-    res_1 = shortest_path_astar(start, dict_nn, dict_blizzards, grid_period, end, 0)
+    res_1 = shortest_path_astar(start, graph, grid, end, 0)
     print(f"Result of part 1: {res_1}")
-    res_2 = shortest_path_astar(end, dict_nn, dict_blizzards, grid_period, start, res_1)
-    res_3 = shortest_path_astar(
-        start, dict_nn, dict_blizzards, grid_period, end, res_1 + res_2
-    )
+    res_2 = shortest_path_astar(end, graph, grid, start, res_1)
+    res_3 = shortest_path_astar(start, graph, grid, end, res_1 + res_2)
     print(f"Result of part 2: {res_1 + res_2 + res_3}")
 
 
@@ -1,4 +1,5 @@
-from collections import defaultdict, deque
+import numpy as np
+from numba import njit  # type: ignore
 
 from utils import read_input, timefunc
 
@@ -8,63 +9,85 @@ class Record:
         self.record = record
         self.groups = tuple(map(int, groups.split(",")))
 
-    def count_configs(self):
-        # Initialize count dict
-        init = (0, 0)
-        cache_dict = defaultdict(int)
-        cache_dict[init] = 1
-        for c in self.record:
-            # For each new letter, keep queue of:
-            # - group_id (group of #)
-            # - group size (how many #)
-            # - group count (how many permutations have reached this group)
-            queue = deque([])
-            # Iterate over cache_dict
-            for (group_id, group_size), group_count in cache_dict.items():
-                if c in "?.":
-                    # If c is (possibly) '.',
-                    #  test if group is empty or group is correct
-                    if group_size == 0:
-                        queue.append((group_id, group_size, group_count))
-                    elif group_size == self.groups[group_id]:
-                        queue.append((group_id + 1, 0, group_count))
-                if c in "?#":
-                    # If c is (possibly) '#',
-                    #  test if group can keep growing
-                    if (
-                        group_id < len(self.groups)
-                        and group_size < self.groups[group_id]
-                    ):
-                        queue.append((group_id, group_size + 1, group_count))
 
-            # Clear the dictionary to remove invalid paths
-            cache_dict.clear()
-            for group_id, group_size, group_count in queue:
-                cache_dict[(group_id, group_size)] += group_count
+# Character codes of the springs ("." is also used as padding)
+OPERATIONAL, DAMAGED, UNKNOWN = 0, 1, 2
+CODES = {".": OPERATIONAL, "#": DAMAGED, "?": UNKNOWN}
+
+
+def count_configs_batch(records: list[Record]) -> np.ndarray:
+    """Count the configurations of many records at once, in a single pass over
+    integer arrays"""
+    return _count_configs_arrays(*encode_records(records))
+
+
+def encode_records(records: list[Record]) -> tuple[np.ndarray, np.ndarray]:
+    """Springs as a (record, position) array of codes, padded with "." (which
+    doesn't change the counts), and groups as a (record, group) array of lengths,
+    padded with zeros"""
+    n_positions = max(len(record.record) for record in records)
+    n_groups = max(len(record.groups) for record in records)
+    springs = np.zeros((len(records), n_positions), dtype=np.int8)
+    lengths = np.zeros((len(records), n_groups), dtype=np.int64)
+    for k, record in enumerate(records):
+        springs[k, : len(record.record)] = [CODES[c] for c in record.record]
+        lengths[k, : len(record.groups)] = record.groups
+    return springs, lengths
+
 
-        return sum(
-            count
-            for (gid, size), count in cache_dict.items()
-            if gid == len(self.groups)
-            or (gid == len(self.groups) - 1 and size == self.groups[gid])
-        )
+@njit(cache=True)
+def _count_configs_arrays(springs: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """DP table over (position, groups placed) for each record: number of ways to
+    place the first groups in the springs before a position, with that position
+    free to start a new group. At each position, either leave the spring
+    operational, or start the next group there (which also takes the operational
+    spring after it). The table is reused from one record to the next."""
+    n_records, n_positions = springs.shape
+    counts = np.zeros(n_records, dtype=np.int64)
+    # Run of (possibly) damaged springs starting at each position
+    runs = np.zeros(n_positions + 2, dtype=np.int64)
+    table = np.zeros((n_positions + 2, lengths.shape[1] + 1), dtype=np.int64)
+
+    for r in range(n_records):
+        n_groups = 0
+        while n_groups < lengths.shape[1] and lengths[r, n_groups] > 0:
+            n_groups += 1
+        # The last position is always free (operational)
+        runs[n_positions] = 0
+        for i in range(n_positions - 1, -1, -1):
+            runs[i] = runs[i + 1] + 1 if springs[r, i] != OPERATIONAL else 0
+
+        table[:, : n_groups + 1] = 0
+        table[0, 0] = 1
+        for i in range(n_positions):
+            for g in range(n_groups + 1):
+                current = table[i, g]
+                if current == 0:
+                    continue
+                # Spring i is operational
+                if springs[r, i] != DAMAGED:
+                    table[i + 1, g] += current
+                # The next group covers springs i to i + length - 1
+                if g < n_groups:
+                    end = i + lengths[r, g]
+                    if runs[i] >= lengths[r, g] and (
+                        end == n_positions or springs[r, end] != DAMAGED
+                    ):
+                        table[min(end + 1, n_positions), g + 1] += current
+        counts[r] = table[n_positions, n_groups]
+
+    return counts
 
 
 @timefunc
 def main(filename: str):
     records = [Record(*line.split()) for line in read_input(filename)]
-    total_n = 0
-    for record in records:
-        total_n += record.count_configs()
-    print(f"Result of part 1: {total_n}")
+    print(f"Result of part 1: {count_configs_batch(records).sum()}")
 
     for record in records:
         record.record = "?".join([record.record for _ in range(5)])
         record.groups *= 5
-    total_n = 0
-    for record in records:
-        total_n += record.count_configs()
-    print(f"Result of part 2: {total_n}")
+    print(f"Result of part 2: {count_configs_batch(records).sum()}")
 
 
 if __name__ == "__main__":
@@ -2,7 +2,8 @@ import numpy as np
 from numba import int64  # type: ignore
 from numba.experimental import jitclass  # type: ignore
 
-from utils import read_input, timefunc
+from utils import timefunc
+from utils.parsing import read_char_grid
 
 DICT_ROCKS = {".": 0, "O": 1, "#": 2}
 
@@ -91,12 +92,7 @@ def calculate_load(platform):
 
 @timefunc
 def main(filename: str):
-    platform = Platform(
-        np.array(
-            [[DICT_ROCKS[rock] for rock in line] for line in read_input(filename)],
-            dtype=int,
-        )
-    )
+    platform = Platform(read_char_grid(filename, DICT_ROCKS).astype(np.int64))
     platform.tilt_platform(0)
     print(f"Result of part 1: {calculate_load(platform.platform)}")
     platform.reset()
@@ -1,61 +1,82 @@
-from collections import deque
+import numpy as np
+from numba import njit  # type: ignore
 
-from utils import read_input, timefunc
+from utils import timefunc
+from utils.parsing import read_char_grid
 
+EMPTY, BACKSLASH, SLASH, VERTICAL, HORIZONTAL = range(5)
+MIRRORS = {
+    ".": EMPTY,
+    "\\": BACKSLASH,
+    "/": SLASH,
+    "|": VERTICAL,
+    "-": HORIZONTAL,
+}
+# Headings: right, down, left, up
+DX = np.array([0, 1, 0, -1])
+DY = np.array([1, 0, -1, 0])
+RIGHT, DOWN, LEFT, UP = range(4)
 
-def encounter(x, y, hx, hy, grid):
-    element = grid[x][y]
-    if element == "\\":
-        return [(hy, hx)]
-    elif element == "/":
-        return [(-hy, -hx)]
-    elif element == "|" and (hx == 0):
-        return [(1, 0), (-1, 0)]
-    elif element == "-" and (hy == 0):
-        return [(0, 1), (0, -1)]
-    else:
-        return [(hx, hy)]
 
+@njit(cache=True)
+def laser_walk(grid: np.ndarray, x: int, y: int, heading: int) -> int:
+    """Number of energized tiles when the beam enters (x, y) with the heading.
+    Each tile keeps one visited bit per heading"""
+    rows, cols = grid.shape
+    visited = np.zeros((rows, cols), dtype=np.uint8)
+    stack = np.empty((4 * rows * cols, 3), dtype=np.int64)
+    stack[0] = x, y, heading
+    visited[x, y] |= 1 << heading
+    size = 1
+    new_headings = np.empty(2, dtype=np.int64)
 
-def check_bounds(x, y, xg, yg):
-    return x >= 0 and x < xg and y >= 0 and y < yg
+    while size > 0:
+        size -= 1
+        x, y, heading = stack[size]
+        element = grid[x, y]
+        n_new = 1
+        if element == BACKSLASH:
+            new_headings[0] = heading ^ 1
+        elif element == SLASH:
+            new_headings[0] = 3 - heading
+        elif element == VERTICAL and (heading == RIGHT or heading == LEFT):
+            new_headings[0], new_headings[1] = DOWN, UP
+            n_new = 2
+        elif element == HORIZONTAL and (heading == DOWN or heading == UP):
+            new_headings[0], new_headings[1] = RIGHT, LEFT
+            n_new = 2
+        else:
+            new_headings[0] = heading
 
+        for k in range(n_new):
+            new_heading = new_headings[k]
+            xn, yn = x + DX[new_heading], y + DY[new_heading]
+            if 0 <= xn < rows and 0 <= yn < cols:
+                if not visited[xn, yn] & (1 << new_heading):
+                    visited[xn, yn] |= 1 << new_heading
+                    stack[size] = xn, yn, new_heading
+                    size += 1
 
-def laser_walk(grid, start, head):
-    xg, yg = len(grid), len(grid[0])
-    queue = deque([start + head])
-    visited = {start + head}
-
-    while queue:
-        x, y, hx, hy = queue.pop()
-        new_heads = encounter(x, y, hx, hy, grid)
-        for hnx, hny in new_heads:
-            xn = x + hnx
-            yn = y + hny
-            if (xn, yn, hnx, hny) not in visited and check_bounds(xn, yn, xg, yg):
-                queue.append((xn, yn, hnx, hny))
-                visited.add((xn, yn, hnx, hny))
-
-    return len(set([(x, y) for x, y, _, _ in visited]))
+    return np.count_nonzero(visited)
 
 
 def generate_starts(grid):
-    shape = len(grid), len(grid[0])
+    shape = grid.shape
     for i in range(shape[0]):
-        yield ((i, 0), (0, 1))
-        yield ((i, shape[1] - 1), (0, -1))
+        yield i, 0, RIGHT
+        yield i, shape[1] - 1, LEFT
     for i in range(shape[1]):
-        yield ((0, i), (1, 0))
-        yield ((shape[0] - 1, i), (-1, 0))
+        yield 0, i, DOWN
+        yield shape[0] - 1, i, UP
 
 
 @timefunc
 def main(filename: str):
-    grid = read_input(filename)
-    print(f"Result of part 1: {laser_walk(grid, start=(0, 0), head=(0, 1))}")
+    grid = read_char_grid(filename, MIRRORS)
+    print(f"Result of part 1: {laser_walk(grid, 0, 0, RIGHT)}")
     configs = []
-    for start, head in generate_starts(grid):
-        configs.append(laser_walk(grid, start, head))
+    for x, y, heading in generate_starts(grid):
+        configs.append(laser_walk(grid, x, y, heading))
     print(f"Result of part2: {max(configs)}")
 
 
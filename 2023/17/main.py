@@ -1,12 +1,20 @@
 import heapq
 import itertools
 import math
+import sys
+import time
 from collections import defaultdict
-from typing import Optional
 
 import numpy as np
+from numba import njit  # type: ignore
 
 from utils import read_input, timefunc, CoordTuple
+from utils.grid import DIRECTIONS_4, GridGraph
+from utils.search import StateGraph, shortest_paths
+
+# Directions in opposite pairs (same order as DIRECTIONS_4)
+DX = np.array([dx for dx, _ in DIRECTIONS_4])
+DY = np.array([dy for _, dy in DIRECTIONS_4])
 
 
 def _get_neighbors(node: CoordTuple, bounds: dict[str, CoordTuple]) -> list[CoordTuple]:
@@ -39,25 +47,28 @@ def create_neighbors_dict(
     return dict_nn
 
 
-def shortest_path_dijkstra(
-    start: CoordTuple,
+def update_straights(neighbor, previous_node, straights):
+    # If current node is on a straight course, the difference between the
+    # previous and next node on one coordinate is always gonna be 0
+    if neighbor[0] == previous_node[0] or neighbor[1] == previous_node[1]:
+        return straights + 1
+    # If not straight, reset count
+    else:
+        return 1
+
+
+def crucible_heapq(
     grid: np.ndarray,
-    dict_nn: dict[CoordTuple, list[CoordTuple]],
+    start: CoordTuple,
     max_straight: int,
     min_straights: int,
-    end: Optional[CoordTuple] = None,
+    end: CoordTuple,
 ) -> int:
-    """Dijkstra's algo for shortest path calculation between a start node and any other
-     node in a grid.
-    Returns a dictionary of {node: distance} from the source node.
-
-    `grid` specifies the weights associated to each node (here, a coordinate tuple)
-    `dict_nn` contains the list of neighbors for each node
-    `max_straight` and `min_straight` are the requirements for the problem
-    If an optional `end` node is specified, calculation is performed down to the `end`
-     node only (ignoring the rest of the grid for efficiency) and a single-element
-      dictionary is returned.
-    """
+    """Original Dijkstra's algo for the crucible problem: a heapq priority queue over
+    (node, previous node, straights) tuples, with dictionaries of distances and
+    neighbors. Kept as the baseline for the other engines.
+    Returns the minimum heat loss."""
+    dict_nn = create_neighbors_dict(grid)
 
     # Initialise distance dictionary and visited set
     dists = defaultdict(lambda: math.inf, {(start, start, 0): 0.0})
@@ -70,10 +81,10 @@ def shortest_path_dijkstra(
         # Pop the element of the queue with the shortest distance
         current_dist, current_node, previous_node, straights = heapq.heappop(queue)
 
-        # If we arrived at the end node, return the dists dictionary
+        # If we arrived at the end node, return the distance
         if current_node == end:
             if straights >= min_straights:
-                return current_dist
+                return int(current_dist)
             else:
                 continue
 
@@ -101,18 +112,219 @@ def shortest_path_dijkstra(
     return -1
 
 
-def add_tuples(x, y):
-    return (x[0] + x[1], y[0] + y[1])
+def create_state_graph(
+    grid: np.ndarray, start: CoordTuple, max_straight: int, min_straights: int
+) -> StateGraph:
+    """Graph of the (node, direction, straights) states of the crucible, encoded as
+    (4 * node + direction) * max_straight + straights - 1.
+    The last state is the start, where the crucible has no direction yet.
+    Entering a node costs its heat loss."""
+    grid_graph = GridGraph(grid.shape)
+    n_states = 4 * len(grid_graph) * max_straight + 1
+
+    # All the moves on the grid, with their direction
+    nodes = np.repeat(np.arange(len(grid_graph)), grid_graph.degree())
+    neighbors = grid_graph.indices.astype(np.int64)
+    moves = neighbors - nodes
+    directions = np.select(
+        [moves == dx * grid.shape[1] + dy for dx, dy in DIRECTIONS_4],
+        range(len(DIRECTIONS_4)),
+    )
 
+    def encode(node, direction, straights):
+        return (4 * node + direction) * max_straight + straights - 1
 
-def update_straights(neighbor, previous_node, straights):
-    # If current node is on a straight course, the difference between the
-    # previous and next node on one coordinate is always gonna be 0
-    if neighbor[0] == previous_node[0] or neighbor[1] == previous_node[1]:
-        return straights + 1
-    # If not straight, reset count
-    else:
-        return 1
+    sources, targets = [], []
+    for direction in range(len(DIRECTIONS_4)):
+        # Directions are ordered in opposite pairs: (1, 0), (-1, 0), (0, 1), (0, -1)
+        turns = (directions != direction) & (directions != direction ^ 1)
+        for straights in range(1, max_straight + 1):
+            # Keep going straight (check max straight constraint)
+            if straights < max_straight:
+                go = directions == direction
+                sources.append(encode(nodes[go], direction, straights))
+                targets.append(encode(neighbors[go], direction, straights + 1))
+            # Turn (check min straights constraint)
+            if straights >= min_straights:
+                sources.append(encode(nodes[turns], direction, straights))
+                targets.append(encode(neighbors[turns], directions[turns], 1))
+
+    # From the start, any direction is possible
+    go = nodes == grid_graph.index(start)
+    sources.append(np.full(go.sum(), n_states - 1))
+    targets.append(encode(neighbors[go], directions[go], 1))
+
+    all_targets = np.concatenate(targets)
+    weights = grid.ravel()[all_targets // (4 * max_straight)]
+    return StateGraph.from_edges(
+        n_states, np.concatenate(sources), all_targets, weights
+    )
+
+
+@njit(cache=True)
+def crucible_dial(
+    grid: np.ndarray,
+    start: CoordTuple,
+    max_straight: int,
+    min_straights: int,
+    end: CoordTuple,
+) -> int:
+    """Dial's algo for the crucible problem: a Dijkstra where the priority queue is
+    a circular array of buckets, one per distance modulo (max weight + 1).
+    Distances live in a dense (x, y, direction, straights - 1) array, and states are
+    encoded as their flat index in it. Returns the minimum heat loss."""
+    rows, cols = grid.shape
+    n_buckets = grid.max() + 1
+    dists = np.full((rows, cols, 4, max_straight), np.iinfo(np.int32).max, np.int32)
+    flat_dists = dists.reshape(-1)
+    settled = np.zeros(flat_dists.shape[0], dtype=np.bool_)
+
+    # Buckets are linked lists over a pool of entries. Entries are only pushed when
+    # a state is settled, and each settled state has at most 3 outgoing moves, which
+    # bounds the number of entries (a turn state may have up to 2 * max_straight
+    # predecessors, so counting incoming relaxations wouldn't)
+    pool_state = np.empty(3 * flat_dists.shape[0] + 4, dtype=np.int64)
+    pool_next = np.empty_like(pool_state)
+    heads = np.full(n_buckets, -1, dtype=np.int64)
+    n_entries = 0
+    pending = 0
+
+    # From the start, any direction is possible
+    for direction in range(4):
+        x, y = start[0] + DX[direction], start[1] + DY[direction]
+        if 0 <= x < rows and 0 <= y < cols:
+            dist = grid[x, y]
+            state = ((x * cols + y) * 4 + direction) * max_straight
+            flat_dists[state] = dist
+            pool_state[n_entries] = state
+            pool_next[n_entries] = heads[dist % n_buckets]
+            heads[dist % n_buckets] = n_entries
+            n_entries += 1
+            pending += 1
+
+    current = 0
+    while pending > 0:
+        # Move to the next non-empty bucket
+        bucket = current % n_buckets
+        while heads[bucket] == -1:
+            current += 1
+            bucket = current % n_buckets
+        entry = heads[bucket]
+        heads[bucket] = pool_next[entry]
+        pending -= 1
+
+        state = pool_state[entry]
+        if settled[state] or flat_dists[state] != current:
+            continue
+        settled[state] = True
+
+        # Decode the state
+        straights = state % max_straight + 1
+        direction = (state // max_straight) % 4
+        node = state // (4 * max_straight)
+        x, y = node // cols, node % cols
+        if x == end[0] and y == end[1] and straights >= min_straights:
+            return current
+
+        for new_direction in range(4):
+            # Directions are ordered in opposite pairs
+            if new_direction == direction ^ 1:
+                continue
+            if new_direction == direction:
+                # Check max straight constraint
+                if straights >= max_straight:
+                    continue
+                new_straights = straights + 1
+            else:
+                # Check min straights constraint
+                if straights < min_straights:
+                    continue
+                new_straights = 1
+            xx, yy = x + DX[new_direction], y + DY[new_direction]
+            if 0 <= xx < rows and 0 <= yy < cols:
+                new_dist = current + grid[xx, yy]
+                new_state = (
+                    ((xx * cols + yy) * 4 + new_direction) * max_straight
+                    + new_straights
+                    - 1
+                )
+                if new_dist < flat_dists[new_state]:
+                    flat_dists[new_state] = new_dist
+                    bucket = new_dist % n_buckets
+                    pool_state[n_entries] = new_state
+                    pool_next[n_entries] = heads[bucket]
+                    heads[bucket] = n_entries
+                    n_entries += 1
+                    pending += 1
+
+    return -1
+
+
+def crucible_graph_search(
+    grid: np.ndarray,
+    start: CoordTuple,
+    max_straight: int,
+    min_straights: int,
+    end: CoordTuple,
+) -> int:
+    """Crucible problem as a search on an explicit state graph (generic engine)"""
+    graph = create_state_graph(grid, start, max_straight, min_straights)
+    # Any direction is fine at the end, as long as the crucible can stop
+    targets = np.zeros((grid.size, 4, max_straight), dtype=bool)
+    targets[end[0] * grid.shape[1] + end[1], :, max(min_straights, 1) - 1 :] = True
+    targets = np.append(targets.ravel(), False)
+    dists, target = shortest_paths(graph, [graph.n_states - 1], targets, queue="bucket")
+    return int(dists[target]) if target != -1 else -1
+
+
+ENGINES = {
+    "dial": crucible_dial,
+    "graph": crucible_graph_search,
+    "heapq": crucible_heapq,
+}
+
+
+def shortest_path_dijkstra(
+    start: CoordTuple,
+    grid: np.ndarray,
+    max_straight: int,
+    min_straights: int,
+    end: CoordTuple,
+    engine: str = "dial",
+) -> int:
+    """Shortest path calculation between a start node and an end node in a grid,
+     where the crucible must move at least `min_straights` and at most
+     `max_straight` blocks in a straight line.
+    Returns the minimum heat loss.
+
+    `grid` specifies the weights associated to each node (here, a coordinate tuple)
+    `engine` is either "dial" (dense state array & bucket queue), "graph"
+     (explicit state graph & generic search engine) or "heapq" (the original
+     tuple-keyed Dijkstra)
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Engine {engine} is not supported.")
+    return ENGINES[engine](grid, start, max_straight, min_straights, end)
+
+
+def benchmark(size: int = 500, seed: int = 0):
+    """Compare the engines on a large synthetic grid of random heat losses.
+    The "heapq" baseline takes a few minutes on the default grid."""
+    grid = np.random.default_rng(seed).integers(1, 10, size=(size, size))
+    end = (size - 1, size - 1)
+    for engine in ENGINES:
+        # Warm up the numba compilation on a small grid
+        shortest_path_dijkstra((0, 0), grid[:10, :10], 3, 0, (9, 9), engine)
+        for max_straight, min_straights in ((3, 0), (10, 4)):
+            start_time = time.perf_counter()
+            res = shortest_path_dijkstra(
+                (0, 0), grid, max_straight, min_straights, end, engine
+            )
+            print(
+                f"Engine: {engine}, Grid: {size}x{size}, "
+                f"Straights: {min_straights}-{max_straight}, Result: {res}, "
+                f"Time: {time.perf_counter() - start_time:.3f}s"
+            )
 
 
 @timefunc
@@ -121,17 +333,15 @@ def main(filename: str):
         list(list(map(int, row)) for row in read_input(filename)),
         dtype=int,
     )
-    dict_nn = create_neighbors_dict(grid)
     # Perform shortest path search
     start = (0, 0)
     end = (grid.shape[0] - 1, grid.shape[1] - 1)
-    print(
-        f"Result of part 1: {shortest_path_dijkstra(start, grid, dict_nn, 3, 0, end)}"
-    )
-    print(
-        f"Result of part 2: {shortest_path_dijkstra(start, grid, dict_nn, 10, 4, end)}"
-    )
+    print(f"Result of part 1: {shortest_path_dijkstra(start, grid, 3, 0, end)}")
+    print(f"Result of part 2: {shortest_path_dijkstra(start, grid, 10, 4, end)}")
 
 
 if __name__ == "__main__":
-    main("2023/17/input.txt")
+    if sys.argv[1:] == ["benchmark"]:
+        benchmark()
+    else:
+        main("2023/17/input.txt")
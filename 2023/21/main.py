@@ -1,161 +1,55 @@
-from __future__ import annotations
-
-import itertools
-from collections import defaultdict
-from typing import Callable, Generator
-
 import numpy as np
-
-from utils import read_input, CoordTuple
-
-
-class Point:
-    def __init__(self, x, y) -> None:
-        self.x = x
-        self.y = y
-
-    @property
-    def coord(self):
-        return (self.x, self.y)
-
-    def add(self, other: Point):
-        return Point(self.x + other.x, self.y + other.y)
-
-
-def _get_neighbors(
-    node: Point, bounds: dict[str, CoordTuple]
-) -> Generator[Point, None, None]:
-    """Simple function to obtain the neighbors coordinates of a point on a grid.
-    The grid bounds are considered."""
-    for move in (Point(1, 0), Point(-1, 0), Point(0, 1), Point(0, -1)):
-        neighbor = node.add(move)
-        if (
-            bounds["x"][0] <= neighbor.x < bounds["x"][1]
-            and bounds["y"][0] <= neighbor.y < bounds["y"][1]
-        ):
-            yield neighbor
-
-
-def _get_neighbors_infinite(
-    node: Point, bounds: dict[str, CoordTuple]
-) -> Generator[Point, None, None]:
-    """Simple function to obtain the neighbors coordinates of a point on a grid.
-    The grid is supposed to be periodic"""
-    for move in (Point(1, 0), Point(-1, 0), Point(0, 1), Point(0, -1)):
-        neighbor = node.add(move)
-        # Scale
-        neighbor.x -= bounds["x"][0]
-        neighbor.y -= bounds["y"][0]
-        # Shift
-        neighbor.x %= bounds["x"][1] - bounds["x"][0]
-        neighbor.y %= bounds["y"][1] - bounds["y"][0]
-        # Return
-        neighbor.x += bounds["x"][0]
-        neighbor.y += bounds["y"][0]
-
-        yield neighbor
-
-
-def create_neighbors_dict(
-    grid: np.ndarray, method: Callable
-) -> dict[CoordTuple, list[CoordTuple]]:
-    """Create dictionary of neighbors for a grid"""
-    dict_nn: dict[CoordTuple, list[CoordTuple]] = {
-        node: []
-        for node in list(itertools.product(range(grid.shape[0]), range(grid.shape[1])))
-    }
-    bounds = {"x": (0, grid.shape[0]), "y": (0, grid.shape[1])}
-    for node in dict_nn.keys():
-        dict_nn[node] = [
-            nn.coord for nn in method(Point(*node), bounds) if grid[nn.coord] != "#"
-        ]
-
-    return dict_nn
-
-
-def is_even(i):
-    return i % 2 == 0
-
-
-def check_plane(dp, p):
-    if dp > 1:
-        return p - 1
-    elif dp < -1:
-        return p + 1
-    else:
-        return p
-
-
-def augment_plane(n_x, n_y, x, y, p_x, p_y):
-    p_x = check_plane(n_x - x, p_x)
-    p_y = check_plane(n_y - y, p_y)
-    return p_x, p_y
-
-
-def walk_loop(dict_nn, start, n_steps):
-    # Walk the loop with constraints
-    visited_even = set()
-    visited_odd = set()
-    dict_counts = defaultdict(list)
-    # Each state is represented by the hyperplane coordinates and grid coordinates
-    start_state = (0, 0, start.x, start.y)
-    queue = {start_state}
-
-    i = 0
-    output_list = []
-    # Loop until queue exhausts
-    #  (no more possible new moves, relevant for a finite grid)
-    while queue:
-        i += 1
-        # Break loop if exceeding problem steps
-        if i > n_steps:
-            i -= 1
-            break
-        next_queue = set()
-        for px, py, x, y in queue:
-            point = (x, y)
-            # Examine neighbors
-            for neigh in dict_nn[point]:
-                nx, ny = neigh
-                # Check if moving to next map (relevant for infinite grid)
-                pxx, pyy = augment_plane(nx, ny, x, y, px, py)
-                new_state = (pxx, pyy, nx, ny)
-                # Split between even and odd
-                if is_even(i):
-                    if new_state not in visited_even:
-                        next_queue.add(new_state)
-                        visited_even.add(new_state)
-                        dict_counts[(new_state, True)] = i
-                else:
-                    if new_state not in visited_odd:
-                        next_queue.add(new_state)
-                        visited_odd.add(new_state)
-                        dict_counts[(new_state, False)] = i
-
-        queue = next_queue
-        if is_even(i):
-            output_list.append(len(visited_even))
-        else:
-            output_list.append(len(visited_odd))
-
-    return i, visited_even, visited_odd, dict_counts, output_list
-
-
-def walk_grid(dict_nn, start, n_steps):
-    i, visited_even, visited_odd, _, _ = walk_loop(dict_nn, start, n_steps)
-    if is_even(i):
-        return len(visited_even)
-    else:
-        return len(visited_odd)
-
-
-def walk_infinite_grid(dict_nn, start, n_steps):
-    _, _, _, dict_counts, output_list = walk_loop(dict_nn, start, n_steps)
-    dict_result = defaultdict(list)
-    for ((px, py, x, y), t), value in dict_counts.items():
-        dict_result[(x, y)].append((px, py, t, value))
-
-    return output_list
+from numba import njit  # type: ignore
+
+from utils.parsing import find_markers, read_char_grid
+
+ROCK = ord("#")
+
+
+@njit(cache=True)
+def distance_field(
+    free: np.ndarray, start_x: int, start_y: int, max_steps: int
+) -> np.ndarray:
+    """BFS distances from the start to the free cells, up to max_steps
+    (-1 if not reached)"""
+    height, width = free.shape
+    dist = np.full((height, width), -1, dtype=np.int64)
+    queue = np.empty(height * width, dtype=np.int64)
+    dist[start_x, start_y] = 0
+    queue[0] = start_x * width + start_y
+    head, tail = 0, 1
+    while head < tail:
+        x, y = divmod(queue[head], width)
+        head += 1
+        if dist[x, y] == max_steps:
+            continue
+        for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+            xn, yn = x + dx, y + dy
+            if 0 <= xn < height and 0 <= yn < width and free[xn, yn]:
+                if dist[xn, yn] < 0:
+                    dist[xn, yn] = dist[x, y] + 1
+                    queue[tail] = xn * width + yn
+                    tail += 1
+    return dist
+
+
+def reachable_counts(dist: np.ndarray, n_steps: int) -> np.ndarray:
+    """Number of plots reachable in exactly k steps, for k up to n_steps: plots at
+    distance at most k with the same parity (walking back and forth)"""
+    counts = np.bincount(dist[dist >= 0], minlength=n_steps + 1)[: n_steps + 1]
+    counts[0::2] = counts[0::2].cumsum()
+    counts[1::2] = counts[1::2].cumsum()
+    return counts
+
+
+def walk_infinite_grid(free: np.ndarray, start: np.ndarray, n_steps: int) -> np.ndarray:
+    """Number of plots reachable in exactly k steps on the infinite (periodic) grid,
+    for k up to n_steps. The grid is tiled enough times to contain all the plots
+    within n_steps, and a single BFS is run on the tiled grid."""
+    n_copies = 2 * -(-n_steps // min(free.shape)) + 1
+    tiled = np.tile(free, (n_copies, n_copies))
+    start = start + n_copies // 2 * np.array(free.shape)
+    return reachable_counts(distance_field(tiled, *start, n_steps), n_steps)
 
 
 def search_result(period: int, steps: int, offset: int, y: np.ndarray):
@@ -186,23 +80,17 @@ def search_result(period: int, steps: int, offset: int, y: np.ndarray):
 
 
 def main(filename: str):
-    grid = np.array([[c for c in line] for line in read_input(filename)], dtype=str)
-    x_0, y_0 = (grid == "S").nonzero()
-    start = Point(x_0[0], y_0[0])
-    # Create neighbour dictionary
-    dict_nn = create_neighbors_dict(grid, method=_get_neighbors)
+    grid = read_char_grid(filename)
+    start = find_markers(grid, "S")["S"][0]
+    free = grid != ROCK
     # Number of iterations changes based on example/input
     if grid.shape[0] < 20:
         i = 6
     else:
         i = 64
-    print(f"Result of part 1: {walk_grid(dict_nn, start, i)}")
-    dict_nn_infinite = create_neighbors_dict(grid, method=_get_neighbors_infinite)
-    y = np.insert(
-        np.array(walk_infinite_grid(dict_nn_infinite, start, 400), dtype=int),
-        0,
-        0,
-    )
+    counts = reachable_counts(distance_field(free, *start, i), i)
+    print(f"Result of part 1: {counts[i]}")
+
     # The second part relies on finding the periodic pattern.
     # The number of occupied tiles scales quadratically, given an offset and a base
     # These values have been found by investigating the input (see attached images)
@@ -214,6 +102,7 @@ def main(filename: str):
         base = 131
         steps = 26501365
         offset = 65
+    y = walk_infinite_grid(free, start, offset + 2 * base)
 
     print(f"Result of part 2: {search_result(base, steps, offset, y)}")
 
@@ -1,18 +1,23 @@
-import itertools
 import math
+import os
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 
 import numpy as np
+from numba import njit  # type: ignore
 
-from utils import read_input, timefunc, CoordTuple, CoordGenerator
+from utils import read_input, timefunc, CoordTuple
+from utils.grid import GridGraph
 
 DICT_DIRECTIONS = {">": (0, 1), "v": (1, 0), "<": (0, -1), "^": (-1, 0)}
+DIRECTION_SLOPES = {v: k for k, v in DICT_DIRECTIONS.items()}
 
 
 def longest_path_dfs(
     start: int,
     end: int,
-    dict_nn: dict[int, list[int]],
+    dict_nn: list[list[int]],
 ) -> float:
     """DFS algo for longest path calculation between a start node and
         and end node
@@ -40,41 +45,215 @@ def longest_path_dfs(
     return max_length
 
 
-def longest_path_dfs_compressed(
+def junction_arrays(
+    start: int, end: int, graph_edges: dict[int, list[CoordTuple]]
+) -> tuple[np.ndarray, np.ndarray, int, int]:
+    """Relabel the junctions of a compressed graph as 0..n-1 (so that a set of
+    junctions fits in an integer bitmask) and store the edges in padded arrays.
+    Returns neighbors & weights arrays (padded with -1) and the new start & end."""
+    junctions = sorted(set(graph_edges) | {start, end})
+    if len(junctions) > 63:
+        raise ValueError("Too many junctions for a 64-bit mask.")
+    labels = {junction: i for i, junction in enumerate(junctions)}
+    max_degree = max(len(edges) for edges in graph_edges.values())
+    neighbors = np.full((len(junctions), max_degree), -1, dtype=np.int64)
+    weights = np.zeros((len(junctions), max_degree), dtype=np.int64)
+    for junction, edges in graph_edges.items():
+        for k, (dest, dist) in enumerate(edges):
+            neighbors[labels[junction], k] = labels[dest]
+            weights[labels[junction], k] = dist
+    return neighbors, weights, labels[start], labels[end]
+
+
+def outer_boundary(free: np.ndarray) -> list[int]:
+    """Tiles along the outer face of the grid paths, in walking order. The walk
+    starts from the top-left free tile and keeps the outside on its left (left-hand
+    wall following), until it takes its first step again."""
+    height, width = free.shape
+    if not free.any():
+        return []
+    start = int(np.flatnonzero(free)[0])
+    x, y = divmod(start, width)
+    # North, east, south, west: turning right moves to the next heading.
+    # Nothing is free above or on the left of the first tile, so we face east
+    headings = ((-1, 0), (0, 1), (1, 0), (0, -1))
+    heading = 1
+    walk: list[int] = []
+    first_step = None
+    while True:
+        # Left, straight, right, back
+        for turn in (-1, 0, 1, 2):
+            new_heading = (heading + turn) % 4
+            xn, yn = x + headings[new_heading][0], y + headings[new_heading][1]
+            if 0 <= xn < height and 0 <= yn < width and free[xn, yn]:
+                break
+        else:
+            # Isolated tile
+            return [start]
+        step = (x * width + y, new_heading)
+        if step == first_step:
+            return walk
+        if first_step is None:
+            first_step = step
+        walk.append(x * width + y)
+        x, y, heading = xn, yn, new_heading
+
+
+def perimeter_arcs(
+    start: int, end: int, boundary: list[int], nodes: set[int]
+) -> list[list[int]]:
+    """The two arcs of the outer face of a compressed graph from start to end, as
+    simple paths of nodes. `boundary` is the outer face walk over all the tiles, and
+    only the tiles that are `nodes` of the compressed graph are kept. Returns no arcs
+    if start and end are not both on the outer face."""
+    walk = [tile for tile in boundary if tile in nodes]
+    if start == end or start not in walk or end not in walk:
+        return []
+    # Rotate the (cyclic) walk to begin at the start: one arc goes forward to the
+    # end, the other one goes backward
+    walk = walk[walk.index(start) :] + walk[: walk.index(start)]
+    i_end = walk.index(end)
+    arcs = []
+    for arc in (walk[: i_end + 1], walk[:1] + walk[: i_end - 1 : -1]):
+        # Erase the loops (excursions into dead ends or parts of the graph hanging
+        # from a single node), so that the arc is a simple path
+        path: list[int] = []
+        positions: dict[int, int] = {}
+        for node in arc:
+            if node in positions:
+                for erased in path[positions[node] + 1 :]:
+                    del positions[erased]
+                del path[positions[node] + 1 :]
+            else:
+                positions[node] = len(path)
+                path.append(node)
+        arcs.append(path)
+    return arcs
+
+
+def prune_perimeter(
     start: int,
     end: int,
     graph_edges: dict[int, list[CoordTuple]],
-) -> float:
-    """DFS algo for longest path calculation between a start node and
-        and end node, on a compressed graph
-    Returns the length of the longest path
+    boundary: list[int],
+) -> dict[int, list[CoordTuple]]:
+    """Prune the moves along the outer face of a planar graph that can't be part of
+    a path from start to end. Both arcs of the outer face go from the start to the
+    end: stepping backwards along an arc encloses the path in the region delimited
+    by the path so far and the arc, and cuts it off from the end. Only the moves
+    heading towards the end along each arc are thus kept."""
+    nodes = set(graph_edges) | {start, end}
+    backwards = {
+        (arc[k + 1], arc[k])
+        for arc in perimeter_arcs(start, end, boundary, nodes)
+        for k in range(len(arc) - 1)
+    }
+    return {
+        node: [(dest, dist) for dest, dist in edges if (node, dest) not in backwards]
+        for node, edges in graph_edges.items()
+    }
 
-    `graph_edges` contains the list of neighbors for each node
-    """
-    # Initialise queue & max length
-    stack = [(0, {start}, start)]
-    max_length = -math.inf
 
-    while stack:
-        dist, path, node = stack.pop()
-        # Add current path to visited
-        # Find neighbors
-        for dest, new_dist in graph_edges[node]:
-            # If we reached the end, update dist
-            if dest == end:
-                max_length = max(max_length, dist + new_dist)
-                continue
-            # Push adjacents to stack if they don't intersect
-            if dest not in path:
-                stack.append((dist + new_dist, path | {dest}, dest))
+@njit(cache=True)
+def longest_path_bitmask(
+    neighbors: np.ndarray,
+    weights: np.ndarray,
+    start: int,
+    end: int,
+    visited: int,
+    dist: int,
+) -> int:
+    """Iterative DFS for the longest path from `start` to `end`, avoiding the
+    junctions in the `visited` bitmask. `dist` is the length of the path so far.
+    Returns the length of the longest path (-1 if the end can't be reached)."""
+    n_junctions, max_degree = neighbors.shape
+    stack_node = np.empty(n_junctions + 1, dtype=np.int64)
+    stack_edge = np.zeros(n_junctions + 1, dtype=np.int64)
+    stack_dist = np.empty(n_junctions + 1, dtype=np.int64)
+    max_length = -1
+
+    depth = 0
+    stack_node[0] = start
+    stack_dist[0] = dist
+    visited |= 1 << start
+    while depth >= 0:
+        node = stack_node[depth]
+        edge = stack_edge[depth]
+        # All branches explored: backtrack
+        if edge == max_degree:
+            visited &= ~(1 << node)
+            depth -= 1
+            continue
+        stack_edge[depth] += 1
+        dest = neighbors[node, edge]
+        if dest < 0:
+            continue
+        # If we reached the end, update dist
+        if dest == end:
+            max_length = max(max_length, stack_dist[depth] + weights[node, edge])
+            continue
+        # Go deeper if dest is not already in path
+        if not visited & (1 << dest):
+            visited |= 1 << dest
+            depth += 1
+            stack_node[depth] = dest
+            stack_edge[depth] = 0
+            stack_dist[depth] = stack_dist[depth - 1] + weights[node, edge]
 
     return max_length
 
 
+def _longest_path_task(args: tuple) -> int:
+    return longest_path_bitmask(*args)
+
+
+def longest_path_parallel(
+    start: int,
+    end: int,
+    graph_edges: dict[int, list[CoordTuple]],
+    boundary: Optional[list[int]] = None,
+    n_workers: Optional[int] = None,
+    tasks_per_worker: int = 8,
+) -> int:
+    """Longest path on a compressed graph with bitmask DFS. If the outer face walk
+    of the grid paths (`boundary`) is given, the moves along it are pruned first.
+    The top levels of the DFS tree are expanded breadth-first, and the resulting
+    branches are explored in parallel over a process pool."""
+    if boundary is not None:
+        graph_edges = prune_perimeter(start, end, graph_edges, boundary)
+    neighbors, weights, start, end = junction_arrays(start, end, graph_edges)
+    n_workers = n_workers or os.cpu_count() or 1
+    if n_workers == 1:
+        return longest_path_bitmask(neighbors, weights, start, end, 0, 0)
+
+    # Expand the DFS tree until there are enough branches: (node, visited, dist)
+    max_length = -1
+    branches = [(start, 0, 0)]
+    while 0 < len(branches) < n_workers * tasks_per_worker:
+        new_branches = []
+        for node, visited, dist in branches:
+            visited |= 1 << node
+            for dest, weight in zip(neighbors[node], weights[node]):
+                if dest == end:
+                    max_length = max(max_length, dist + weight)
+                elif dest >= 0 and not visited & (1 << dest):
+                    new_branches.append((dest, visited, dist + weight))
+        branches = new_branches
+
+    tasks = [
+        (neighbors, weights, node, end, visited, dist)
+        for node, visited, dist in branches
+    ]
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        for length in executor.map(_longest_path_task, tasks):
+            max_length = max(max_length, length)
+    return int(max_length)
+
+
 def compress_graph(
     start: int,
     end: int,
-    dict_nn: dict[int, list[int]],
+    dict_nn: list[list[int]],
 ) -> dict[int, list[CoordTuple]]:
     """Compress a graph between start and end node.
     Calculate edges between grid junctions and transform grid
@@ -125,71 +304,41 @@ def compress_graph(
     return graph
 
 
-def conv_func(coord: CoordTuple, grid: np.ndarray) -> int:
-    """Convert a coord tuple into a single int"""
-    return grid.shape[1] * coord[0] + coord[1]
-
+def slope_constraint(
+    source: np.ndarray, target: np.ndarray, direction: CoordTuple
+) -> np.ndarray:
+    """Slopes can only be entered along their direction"""
+    return ~np.isin(target, list(DICT_DIRECTIONS.keys())) | (
+        target == DIRECTION_SLOPES[direction]
+    )
 
-def convert_coords_to_int(
-    dict_nn: dict[CoordTuple, list[CoordTuple]], grid: np.ndarray
-) -> dict[int, list[int]]:
-    """Convert a dictionary of nn as Coord into single int"""
-    return {
-        conv_func(key, grid): [conv_func(el, grid) for el in value]
-        for key, value in dict_nn.items()
-    }
-
-
-def _get_neighbors(node: CoordTuple, grid: np.ndarray) -> CoordGenerator:
-    """Simple function to obtain the neighbors coordinates of a point on a grid.
-    The grid bounds are considered. Obstacles/constraints are considered"""
-    x, y = node
-    for dx, dy in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-        xx, yy = (x + dx, y + dy)
-        # Check if out of bounds
-        if 0 <= xx < grid.shape[0] and 0 <= yy < grid.shape[1]:
-            # Check if not a a wall or direction if compatible with slope
-            if not (
-                grid[xx, yy] == "#"
-                or (
-                    grid[xx, yy] in DICT_DIRECTIONS
-                    and DICT_DIRECTIONS[grid[xx, yy]] != (dx, dy)
-                )
-            ):
-                yield (xx, yy)
-
-
-def create_neighbors_dict(
-    grid: np.ndarray,
-) -> dict[CoordTuple, list[CoordTuple]]:
-    """Create dictionary of neighbors for a grid"""
-    dict_nn: dict[CoordTuple, list[CoordTuple]] = {
-        node: []
-        for node in list(itertools.product(range(grid.shape[0]), range(grid.shape[1])))
-    }
-    for node in dict_nn.keys():
-        dict_nn[node] = list(_get_neighbors(node, grid))
 
-    return dict_nn
+def create_grid_graph(grid: np.ndarray) -> GridGraph:
+    """Create the graph of the grid paths. Forests are not traversable"""
+    return GridGraph(
+        grid.shape, mask=grid != "#", constraint=slope_constraint, values=grid
+    )
 
 
 @timefunc
 def main(filename: str):
     grid = np.array([[c for c in row] for row in read_input(filename)])
-    # Create neighbour dictionary
-    dict_nn = convert_coords_to_int(create_neighbors_dict(grid), grid)
+    # Create neighbour lists
+    grid_graph = create_grid_graph(grid)
+    dict_nn = grid_graph.to_lists()
 
     # Perform shortest path search
-    start = conv_func((0, 1), grid)
-    end = conv_func((grid.shape[0] - 1, grid.shape[1] - 2), grid)
+    start = grid_graph.index((0, 1))
+    end = grid_graph.index((grid.shape[0] - 1, grid.shape[1] - 2))
     print(f"Result of part 1: {longest_path_dfs(start, end, dict_nn)}")
     for slope in DICT_DIRECTIONS.keys():
         grid[grid == slope] = "."
-    dict_nn = convert_coords_to_int(create_neighbors_dict(grid), grid)
+    dict_nn = create_grid_graph(grid).to_lists()
     graph = compress_graph(start, end, dict_nn)
     # We can further limit the search to the last junction before end
     new_end, dist_end = graph[end][0]
-    max_dist = longest_path_dfs_compressed(start, new_end, graph)
+    boundary = outer_boundary(grid != "#")
+    max_dist = longest_path_parallel(start, new_end, graph, boundary)
     print(f"Result of part 2: {dist_end + max_dist}")
 
 
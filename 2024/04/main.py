@@ -1,6 +1,6 @@
 import numpy as np
 
-from utils import read_input
+from utils.parsing import read_char_grid
 
 
 def part_1(grid: np.ndarray) -> int:
@@ -9,16 +9,16 @@ def part_1(grid: np.ndarray) -> int:
     # Iterate over 4 rotations of the grid (to catch all directions)
     for matrix in (np.rot90(grid, k=i) for i in range(4)):
         # Find valid seeds
-        seeds = np.argwhere(matrix == "X")
+        seeds = np.argwhere(matrix == ord("X"))
         seeds = seeds[(seeds[:, 1] <= y_size - 4)]
         for seed in seeds:
             # Check that the row is XMAS
             x, y = seed
-            if "".join(matrix[x, y : y + 4]) == "XMAS":
+            if matrix[x, y : y + 4].tobytes() == b"XMAS":
                 sum += 1
             # Check that the diagonal of the 4x4 matrix is XMAS
             if x <= x_size - 4:
-                if "".join(np.diag(matrix[x : x + 4, y : y + 4])) == "XMAS":
+                if np.diag(matrix[x : x + 4, y : y + 4]).tobytes() == b"XMAS":
                     sum += 1
     return sum
 
@@ -27,7 +27,7 @@ def part_2(grid: np.ndarray) -> int:
     x_size, y_size = grid.shape
     sum = 0
     # Find valid seeds
-    seeds = np.argwhere(grid == "A")
+    seeds = np.argwhere(grid == ord("A"))
     seeds = seeds[
         (seeds[:, 1] <= y_size - 1)
         & (seeds[:, 1] >= 1)
@@ -39,16 +39,15 @@ def part_2(grid: np.ndarray) -> int:
         # Define 3x3 subgrid centered in A and the lr flip
         sub = grid[x - 1 : x + 2, y - 1 : y + 2]
         # Check that the two diagonals of sub are SAM or MAS
-        if (("".join(np.diag(sub)) == "MAS") | ("".join(np.diag(sub)) == "SAM")) & (
-            ("".join(np.diag(np.fliplr(sub))) == "MAS")
-            | ("".join(np.diag(np.fliplr(sub))) == "SAM")
-        ):
+        if np.diag(sub).tobytes() in (b"MAS", b"SAM") and np.diag(
+            np.fliplr(sub)
+        ).tobytes() in (b"MAS", b"SAM"):
             sum += 1
     return sum
 
 
 def main(filename: str):
-    grid = np.array(list(map(list, read_input(filename))), dtype="U1")
+    grid = read_char_grid(filename)
     print(f"Result of part 1: {part_1(grid)}")
     print(f"Result of part 2: {part_2(grid)}")
 
@@ -1,113 +1,158 @@
-from typing import Optional
-
-from utils import CoordTuple, read_input, timefunc
-
-DirTuple = tuple[int, int, int, int]
-
-
-def initialize_guard(grid: list[list[str]]) -> CoordTuple:
-    for i, line in enumerate(grid):
-        for j, c in enumerate(line):
-            if c == "^":
-                return (i, j)
-    return -1, -1
-
-
-class GridWalker:
-    VECTORS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
-    SIZE_V = len(VECTORS)
-
-    def __init__(
-        self,
-        start: CoordTuple,
-        grid: list[list[str]],
-    ) -> None:
-        self.grid = grid
-        self.guard = start
-        self.xg = len(grid)
-        self.yg = len(grid[0])
-        self.i = 0
-
-    def next_vector(self) -> CoordTuple:
-        # Return next direction
-        return self.VECTORS[self.i % self.SIZE_V]
-
-    def encounter(self, move: DirTuple) -> Optional[DirTuple]:
-        # Unpack move & check if result is in bounds
-        x, y, hx, hy = move
-        xn = x + hx
-        yn = y + hy
-        if not self.check_bounds(xn, yn):
-            return None
-
-        # If the result is an obstacle, increase obstacle counter
-        # and change direction. Keep existing position
-        elif self.grid[xn][yn] == "#":
-            self.i += 1
-            return (x, y) + self.next_vector()
-        # Otherwise, return the result and existing direction
-        else:
-            return (xn, yn, hx, hy)
-
-    def check_bounds(self, x: int, y: int) -> bool:
-        return x >= 0 and x < self.xg and y >= 0 and y < self.yg
-
-    def grid_walk(self, move: DirTuple, path: set[DirTuple]) -> bool:
-        while move := self.encounter(move):  # type: ignore
-            # If the move was already performed,
-            # it's a loop
-            if move in path:
-                return True
-            path.add(move)
-        return False
-
-    def obtain_positions(self, path: set[DirTuple]) -> int:
-        return len(set((x, y) for x, y, _, _ in path))
-
-    def simulate(self, move: DirTuple, xn: int, yn: int, path: set[DirTuple]) -> bool:
-        # Keep original i & change grid
-        old_i = self.i
-        self.grid[xn][yn] = "#"
-        # Simulate if loop, then restore
-        loop = self.grid_walk(move, path | set())
-        self.i = old_i
-        self.grid[xn][yn] = "."
-        return loop
-
-    def explore_grid(self) -> tuple[int, int]:
-        # Initialize
-        self.i = 0
-        path: set[DirTuple] = set()
-        move = self.guard + self.next_vector()
-        checked = set([self.guard])
-        loops = 0
-        # Loop over moves
-        new_move = self.encounter(move)
-        while new_move:
-            # Check if the new_move position has been checked
-            x, y, _, _ = new_move
-            if (x, y) not in checked:
-                # Change grid and simulate if there is a loop
-                loops += 1 if self.simulate(move, x, y, path) else 0
-                checked.add((x, y))
-            # Otherwise, add move to path and proceed
-            path.add(move)
-            move = new_move
-            new_move = self.encounter(move)
-        # Add last move to path
-        path.add(move)
-        return self.obtain_positions(path), loops
+import numba  # type: ignore
+import numpy as np
+from numba import njit, prange  # type: ignore
+
+from utils import CoordTuple, timefunc
+from utils.parsing import find_markers, read_char_grid
+
+OBSTACLE = ord("#")
+# Up, right, down, left: turning right moves to the next direction
+VECTORS = np.array([(-1, 0), (0, 1), (1, 0), (0, -1)])
+# Jump target when the guard walks out of the grid
+EXIT = -1
+
+
+def initialize_guard(grid: np.ndarray) -> CoordTuple:
+    guards = find_markers(grid, "^")["^"]
+    if len(guards) == 0:
+        return -1, -1
+    return int(guards[0, 0]), int(guards[0, 1])
+
+
+@njit(cache=True)
+def jump_table(obstacles: np.ndarray) -> np.ndarray:
+    """For each direction and (flat) cell, the cell where the guard stops in front
+    of the next obstacle, or EXIT if there is none"""
+    height, width = obstacles.shape
+    jump = np.full((len(VECTORS), height * width), EXIT, dtype=np.int64)
+    for d in range(len(VECTORS)):
+        dx, dy = VECTORS[d]
+        # Visit the cells so that the next cell in the direction comes first
+        x_range = range(height - 1, -1, -1) if dx > 0 else range(height)
+        y_range = range(width - 1, -1, -1) if dy > 0 else range(width)
+        for x in x_range:
+            for y in y_range:
+                xn, yn = x + dx, y + dy
+                if not (0 <= xn < height and 0 <= yn < width):
+                    continue
+                if obstacles[xn, yn]:
+                    jump[d, x * width + y] = x * width + y
+                else:
+                    jump[d, x * width + y] = jump[d, xn * width + yn]
+    return jump
+
+
+@njit(cache=True)
+def guard_walk(
+    obstacles: np.ndarray, start: int
+) -> tuple[int, np.ndarray, np.ndarray, np.ndarray]:
+    """Walk the guard out of the grid. Returns the number of visited cells, and for
+    each visited cell (except the start) the position and direction of the guard
+    just before it first entered it. Raises if the guard never leaves the grid"""
+    height, width = obstacles.shape
+    visited = np.zeros(height * width, dtype=np.bool_)
+    seen = np.zeros(height * width * len(VECTORS), dtype=np.bool_)
+    cells = np.empty(height * width, dtype=np.int64)
+    pre_cells = np.empty(height * width, dtype=np.int64)
+    pre_dirs = np.empty(height * width, dtype=np.int64)
+    visited[start] = True
+    x, y = divmod(start, width)
+    d, n_cells = 0, 0
+    while True:
+        state = (x * width + y) * len(VECTORS) + d
+        if seen[state]:
+            raise ValueError("The guard is stuck in a loop")
+        seen[state] = True
+
+        xn, yn = x + VECTORS[d, 0], y + VECTORS[d, 1]
+        if not (0 <= xn < height and 0 <= yn < width):
+            break
+        if obstacles[xn, yn]:
+            d = (d + 1) % len(VECTORS)
+            continue
+        if not visited[xn * width + yn]:
+            visited[xn * width + yn] = True
+            cells[n_cells] = xn * width + yn
+            pre_cells[n_cells], pre_dirs[n_cells] = x * width + y, d
+            n_cells += 1
+        x, y = xn, yn
+    return n_cells + 1, cells[:n_cells], pre_cells[:n_cells], pre_dirs[:n_cells]
+
+
+@njit(cache=True)
+def creates_loop(
+    jump: np.ndarray,
+    width: int,
+    obstacle: int,
+    cell: int,
+    d: int,
+    seen: np.ndarray,
+    stamp: int,
+) -> bool:
+    """Check if the guard starting from (cell, d) loops once an obstacle is added.
+    The guard jumps from turn to turn, and visited (cell, direction) states are
+    marked with `stamp` in `seen`, so that it doesn't need to be cleared"""
+    xo, yo = divmod(obstacle, width)
+    while True:
+        state = cell * len(VECTORS) + d
+        if seen[state] == stamp:
+            return True
+        seen[state] = stamp
+
+        # Stop in front of the added obstacle if it comes before the jump target
+        target = jump[d, cell]
+        x, y = divmod(cell, width)
+        dx, dy = VECTORS[d]
+        k = (xo - x) * dx + (yo - y) * dy
+        if k > 0 and xo == x + k * dx and yo == y + k * dy:
+            xt, yt = divmod(target, width)
+            if target == EXIT or k <= (xt - x) * dx + (yt - y) * dy:
+                target = cell + (k - 1) * (dx * width + dy)
+        if target == EXIT:
+            return False
+        cell, d = target, (d + 1) % len(VECTORS)
+
+
+@njit(cache=True, parallel=True)
+def count_loops(
+    jump: np.ndarray,
+    width: int,
+    candidates: np.ndarray,
+    pre_cells: np.ndarray,
+    pre_dirs: np.ndarray,
+    n_chunks: int,
+) -> int:
+    """Number of added obstacles making the guard loop. The guard starts right in
+    front of each of them, and the candidates are split in chunks evaluated in
+    parallel (each with its own state array)"""
+    chunk_size = -(-len(candidates) // n_chunks)
+    loops = np.zeros(n_chunks, dtype=np.int64)
+    for chunk in prange(n_chunks):
+        seen = np.zeros(jump.shape[1] * len(VECTORS), dtype=np.int64)
+        end = min((chunk + 1) * chunk_size, len(candidates))
+        for i in range(chunk * chunk_size, end):
+            loops[chunk] += creates_loop(
+                jump, width, candidates[i], pre_cells[i], pre_dirs[i], seen, i + 1
+            )
+    return loops.sum()
 
 
 @timefunc
 def main(filename: str):
-    grid = [list(line) for line in read_input(filename)]
-    walker = GridWalker(
-        initialize_guard(grid),
-        grid,
-    )
-    positions, loops = walker.explore_grid()
+    grid = read_char_grid(filename)
+    obstacles = grid == OBSTACLE
+    x, y = initialize_guard(grid)
+    width = grid.shape[1]
+    positions, candidates, pre_cells, pre_dirs = guard_walk(obstacles, x * width + y)
     print(f"Result of part 1: {positions}")
+    loops = count_loops(
+        jump_table(obstacles),
+        width,
+        candidates,
+        pre_cells,
+        pre_dirs,
+        numba.get_num_threads(),
+    )
     print(f"Result of part 2: {loops}")
 
 
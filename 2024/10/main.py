@@ -2,7 +2,12 @@ from collections import Counter, deque
 
 import numpy as np
 
-from utils import ConstraintFunArgs, CoordTuple, get_neighbors, read_input
+from utils import ConstraintFunArgs, CoordTuple, get_neighbors
+from utils.parsing import read_char_grid
+
+# Height of the impassable "." cells: no height is one below it
+IMPASSABLE = 11
+HEIGHTS = {**{str(height): height for height in range(10)}, ".": IMPASSABLE}
 
 
 def constraint(fun_args: ConstraintFunArgs) -> bool:
@@ -37,15 +42,7 @@ def trailing_path(
 
 
 def main(filename: str):
-    topomap = np.array(
-        list(
-            map(
-                lambda line: list(map(int, (c if c != "." else -2 for c in line))),
-                read_input(filename),
-            )
-        ),
-        dtype=int,
-    )
+    topomap = read_char_grid(filename, HEIGHTS).astype(int)
     res_1, res_2 = np.array(
         [trailing_path((x, y), topomap) for (x, y) in np.argwhere(topomap == 0)],
         dtype=int,
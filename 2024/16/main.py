@@ -1,48 +1,43 @@
-import heapq
-import math
-from collections import defaultdict
-from typing import Generator
-
 import numpy as np
 
-from utils import (
-    ConstraintFun,
-    ConstraintFunArgs,
-    CoordTuple,
-    read_input,
+from utils import CoordTuple, read_input
+from utils.grid import GridGraph
+from utils.search import (
+    StateGraph,
+    predecessors,
+    shortest_paths,
+    states_on_shortest_paths,
 )
 
-GeneralisedNode = tuple[CoordTuple, CoordTuple]
 VECTORS = [(-1, 0), (0, 1), (1, 0), (0, -1)]
 
 
-def constraint(fun_args: ConstraintFunArgs) -> bool:
-    """Define constraint for neighbors"""
-    xx, yy, _, _, grid = fun_args
-    return grid[xx, yy] != "#"
-
-
-def get_neighbors(
-    node: CoordTuple,
-    grid: np.ndarray,
-    constraint: ConstraintFun = constraint,
-) -> Generator[tuple[CoordTuple, CoordTuple], None, None]:
-    """Simple function to obtain the neighbors coordinates of a point on a grid.
-    The grid bounds are considered. Obstacles/constraints are considered"""
-    x, y = node
-    for dx, dy in VECTORS:
-        xx, yy = (x + dx, y + dy)
-        # Check if out of bounds
-        if 0 <= xx < grid.shape[0] and 0 <= yy < grid.shape[1]:
-            # Check constraint
-            if constraint((xx, yy, x, y, grid)):
-                yield (xx, yy), (dx, dy)
-
-
-class Path:
-    def __init__(self):
-        self.dist = math.inf
-        self.path = set()
+def create_state_graph(grid: np.ndarray) -> StateGraph:
+    """Graph of the (node, head) states of the reindeer, encoded as 4 * node + head.
+    Moving forward costs 1, rotating and moving costs 1001 (180 turns are not allowed)
+    """
+    grid_graph = GridGraph(grid.shape, mask=grid != "#", directions=VECTORS)
+    nodes = np.repeat(np.arange(len(grid_graph)), grid_graph.degree())
+    neighbors = grid_graph.indices.astype(np.int64)
+    # Recover the head of each move from the flat index difference
+    moves = neighbors - nodes
+    neigh_heads = np.select(
+        [moves == dx * grid.shape[1] + dy for dx, dy in VECTORS], range(len(VECTORS))
+    )
+
+    sources, targets, weights = [], [], []
+    for head in range(len(VECTORS)):
+        allowed = neigh_heads != (head + 2) % len(VECTORS)
+        sources.append(4 * nodes[allowed] + head)
+        targets.append(4 * neighbors[allowed] + neigh_heads[allowed])
+        weights.append(np.where(neigh_heads[allowed] == head, 1, 1001))
+
+    return StateGraph.from_edges(
+        4 * len(grid_graph),
+        np.concatenate(sources),
+        np.concatenate(targets),
+        np.concatenate(weights),
+    )
 
 
 def modified_dijkstra(
@@ -56,55 +51,24 @@ def modified_dijkstra(
     - shortest distance
     - set of nodes belonging to shortest paths
     """
-
-    # Initialise distance dictionary, having a (node,head): Path() structure
-    # Each dictionary value is a Path object storing:
-    # - The shortest distance to this (node,head) tuple
-    # - The set of nodes belonging to the shortest paths so far
-    dists: defaultdict[GeneralisedNode, Path] = defaultdict(lambda: Path())
-
-    # Initialise queue - from start, moving east
-    queue = [(0, start, (0, 1))]
-    dists[(start, (0, 1))].dist = 0
-    dists[(start, (0, 1))].path = {start}
-
-    while queue:
-        # Pop the element of the queue with the shortest distance
-        dist, node, head = heapq.heappop(queue)
-
-        # If we arrived at the end node, continue
-        if node == end:
-            continue
-
-        for neigh, neigh_head in get_neighbors(node, grid, constraint):
-            current_node = (node, head)
-            current_path = dists[current_node].path
-            # Prevent 180 turns
-            if neigh not in current_path:
-                # If direction is same, add 1
-                if neigh_head == head:
-                    new_dist = dist + 1
-                # Else, Do a step & rotation
-                else:
-                    new_dist = dist + 1001
-                # Only consider this new path if it's better to any path we've
-                # found arriving in (neigh, neigh_head)
-                neigh_node = (neigh, neigh_head)
-                if new_dist < dists[neigh_node].dist:
-                    dists[neigh_node].dist = new_dist
-                    dists[neigh_node].path = current_path | {neigh}
-                    heapq.heappush(queue, (new_dist, neigh, neigh_head))
-                # If instead we have a duplicate best path, expand the existing path
-                elif new_dist == dists[neigh_node].dist:
-                    dists[neigh_node].path.update(current_path)
+    graph = create_state_graph(grid)
+    start_node = start[0] * grid.shape[1] + start[1]
+    end_node = end[0] * grid.shape[1] + end[1]
+    # From start, moving east
+    dists, _ = shortest_paths(graph, [4 * start_node + 1], queue="bucket")
 
     # Find minimum path among those arriving in end from different directions
-    min_dist = min(dists[(end, head)].dist for head in VECTORS)
-    path_tiles = set()
-    for head in VECTORS:
-        if dists[(end, head)].dist == min_dist:
-            path_tiles.update(dists[(end, head)].path)
-    return min_dist, path_tiles
+    end_states = 4 * end_node + np.arange(len(VECTORS))
+    min_dist = dists[end_states].min()
+    # Mark the states on any shortest path & project them onto the grid
+    on_path = states_on_shortest_paths(
+        predecessors(graph, dists), end_states[dists[end_states] == min_dist]
+    )
+    path_tiles = {
+        divmod(int(node), grid.shape[1])
+        for node in np.unique(on_path.nonzero()[0] // 4)
+    }
+    return int(min_dist), path_tiles  # type: ignore
 
 
 def main(filename: str):
@@ -113,7 +77,7 @@ def main(filename: str):
     end = (1, len(maze[0]) - 2)
     dist, tiles = modified_dijkstra(start, maze, end)
     print(f"Result of part 1: {dist}")
-    print(f"Result of part 1: {len(tiles)}")
+    print(f"Result of part 2: {len(tiles)}")
 
 
 if __name__ == "__main__":
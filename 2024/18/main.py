@@ -1,56 +1,28 @@
-import heapq
-import math
-from collections import defaultdict, deque
+from collections import deque
 
 import numpy as np
 
-from utils import ConstraintFunArgs, CoordTuple, diff_tuple, get_neighbors, read_input
-
-
-def constraint(fun_args: ConstraintFunArgs) -> bool:
-    """Define constraint for neighbors"""
-    xx, yy, _, _, grid = fun_args
-    return grid[xx, yy] == 0
+from utils import CoordTuple, diff_tuple, read_input
+from utils.grid import GridGraph
+from utils.search import StateGraph, predecessors, shortest_path, shortest_paths
 
 
 def shortest_path_dijkstra(
     start: CoordTuple, end: CoordTuple, grid: np.ndarray
 ) -> set[CoordTuple]:
-    """Dijkstra's algo for shortest path calculation between a start and end node.
-    Returns the shortest path"""
-
-    # Initialise distance dictionary and visited set
-    dists = defaultdict(lambda: math.inf, {start: 0.0})
-    visited = set()
-
-    # Initialise queue
-    queue = [(0, start, {start})]
-    heapq.heapify(queue)
-
-    while queue:
-        # Pop the element of the queue with the shortest distance
-        dist, node, path = heapq.heappop(queue)
-
-        # If we arrived at the end node, return the end
-        if node == end:
-            return path
-
-        # Nodes can get added to the priority queue multiple times. We only
-        # process a node the first time we remove it from the priority queue.
-        if node in visited:
-            continue
-
-        visited.add(node)
-
-        for neighbor in get_neighbors(node, grid, constraint=constraint):
-            new_dist = dist + 1
-            # Only consider this new path if it's better than any path we've
-            # already found
-            if new_dist < dists[neighbor]:
-                dists[neighbor] = new_dist
-                heapq.heappush(queue, (new_dist, neighbor, path | {neighbor}))
-
-    return set()
+    """Shortest path calculation between a start and end node, avoiding corrupted
+    bytes. Returns the shortest path (empty if the end can't be reached)"""
+    grid_graph = GridGraph(grid.shape, mask=grid == 0)
+    graph = StateGraph.from_grid(grid_graph)
+    targets = np.zeros(len(grid_graph), dtype=bool)
+    targets[grid_graph.index(end)] = True
+    dists, target = shortest_paths(
+        graph, [grid_graph.index(start)], targets, queue="bucket"
+    )
+    if target == -1:
+        return set()
+    path = shortest_path(predecessors(graph, dists), target)
+    return {grid_graph.coord(node) for node in path}
 
 
 def find_first_stop(
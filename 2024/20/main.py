@@ -1,6 +1,4 @@
-import heapq
-import math
-from collections import Counter, defaultdict
+from collections import Counter
 from itertools import product
 from typing import Generator
 
@@ -10,9 +8,10 @@ from utils import (
     ConstraintFun,
     ConstraintFunArgs,
     CoordTuple,
-    get_neighbors,
     read_input,
 )
+from utils.grid import GridGraph
+from utils.search import StateGraph, shortest_paths
 
 
 def manhattan(a, b):
@@ -27,44 +26,18 @@ def constraint_track(fun_args: ConstraintFunArgs) -> bool:
 
 
 def shortest_path_dijkstra(
-    start: CoordTuple, end: CoordTuple, grid: np.ndarray
+    start: CoordTuple, grid: np.ndarray
 ) -> dict[CoordTuple, float]:
-    """Dijkstra's algo for shortest path calculation between a start and any node.
+    """Shortest path calculation between a start and any node of the track.
     Returns a dict of shortest path length per node"""
-
-    # Normal mode: track constraint
-    constraint_fun = constraint_track
-
-    # Initialise distance dictionary and visited set
-    dists = defaultdict(lambda: math.inf, {start: 0.0})
-    visited = set()
-
-    # Initialise queue
-    queue = [(0.0, start)]
-    heapq.heapify(queue)
-
-    while queue:
-        # Pop the element of the queue with the shortest distance
-        dist, node = heapq.heappop(queue)
-
-        if node == end:
-            continue
-        # Nodes can get added to the priority queue multiple times. We only
-        # process a node the first time we remove it from the priority queue.
-        if node in visited:
-            continue
-
-        visited.add(node)
-
-        for neighbor in get_neighbors(node, grid, constraint=constraint_fun):
-            new_dist = dist + 1
-            # Only consider this new path if it's better than any path we've
-            # already found
-            if new_dist < dists[neighbor]:
-                dists[neighbor] = new_dist
-                heapq.heappush(queue, (new_dist, neighbor))
-
-    return dists
+    grid_graph = GridGraph(grid.shape, mask=grid != "#")
+    dists, _ = shortest_paths(
+        StateGraph.from_grid(grid_graph), [grid_graph.index(start)], queue="bucket"
+    )
+    return {
+        grid_graph.coord(int(node)): dists[node]
+        for node in np.isfinite(dists).nonzero()[0]
+    }
 
 
 def get_nth_neighbors(
@@ -116,9 +89,9 @@ def main(filename: str):
     end = tuple(np.transpose((grid == "E").nonzero())[0])
 
     # Find best paths from start to any node
-    start_paths = shortest_path_dijkstra(start, end, grid)
+    start_paths = shortest_path_dijkstra(start, grid)
     # Find best paths from end to any node
-    end_paths = shortest_path_dijkstra(end, start, grid)
+    end_paths = shortest_path_dijkstra(end, grid)
 
     # Obtain the pairs of valid_cheats that are at most 2 units apart
     cheats = find_cheats(start_paths, end_paths, grid, start_paths[end], 2)
@@ -1,59 +1,74 @@
-import numpy as np
-from numpy.lib.stride_tricks import sliding_window_view
-
-from utils import read_input, timefunc
+from typing import Optional
 
+import numba  # type: ignore
+import numpy as np
+from numba import njit, prange  # type: ignore
 
-def mix(values: np.ndarray, numbers: np.ndarray) -> np.ndarray:
-    return values ^ numbers
-
+from utils import timefunc
+from utils.parsing import read_integers
 
-def prune(numbers: np.ndarray) -> np.ndarray:
-    # Modulo is equivalent to bitshift
-    return numbers & ((1 << 24) - 1)
+# Modulo is equivalent to bitmask
+PRUNE_MASK = (1 << 24) - 1
+# Price changes are in [-9, 9]: a window of 4 changes is encoded in base 19
+BASE = 19
+N_WINDOWS = BASE**4
 
 
-def sequence(numbers: np.ndarray, n: int) -> np.ndarray:
-    X = numbers.copy()
-    Y = np.zeros(shape=(n, len(numbers)), dtype=int)
-    for i in range(n):
-        X = prune(mix(X << 6, X))
-        X = prune(mix(X >> 5, X))
-        X = prune(mix(X << 11, X))
-        Y[i, :] = X
+@njit(cache=True)
+def next_secret(secret: int) -> int:
+    secret = ((secret << 6) ^ secret) & PRUNE_MASK
+    secret = ((secret >> 5) ^ secret) & PRUNE_MASK
+    return ((secret << 11) ^ secret) & PRUNE_MASK
 
-    return Y
 
+@njit(cache=True, parallel=True)
+def simulate_market(
+    numbers: np.ndarray, n: int, n_chunks: int
+) -> tuple[int, np.ndarray]:
+    """Sum of the last secret numbers of the buyers, and the bananas obtained with
+    each (encoded) window of 4 price changes.
+    Buyers are streamed in chunks (evaluated in parallel), each with its own
+    bananas array and its own array of the last buyer that saw each window, so
+    that memory doesn't depend on the number of buyers."""
+    chunk_size = -(-len(numbers) // n_chunks)
+    sums = np.zeros(n_chunks, dtype=np.int64)
+    # (int32 keeps the arrays of a chunk in cache)
+    bananas = np.zeros((n_chunks, N_WINDOWS), dtype=np.int32)
+    for chunk in prange(n_chunks):
+        seen = np.zeros(N_WINDOWS, dtype=np.int32)
+        for buyer in range(
+            chunk * chunk_size, min((chunk + 1) * chunk_size, len(numbers))
+        ):
+            secret = numbers[buyer]
+            price, window = secret % 10, 0
+            for i in range(n):
+                secret = next_secret(secret)
+                new_price = secret % 10
+                # Rolling encoding of the last 4 changes
+                window = (window * BASE + new_price - price + 9) % N_WINDOWS
+                price = new_price
+                # Only the first occurrence of a window counts
+                if i >= 3 and seen[window] != buyer + 1:
+                    seen[window] = buyer + 1
+                    bananas[chunk, window] += price
+            sums[chunk] += secret
+    return sums.sum(), bananas.sum(axis=0, dtype=np.int64)
 
-def highest_price(numbers: np.ndarray, n: int) -> int:
-    # Create sequence of numbers, modulo 10 (last digit)
-    prices = sequence(numbers, n) % 10
-    # Calculate diff by row and shift by 10
-    # (to generate values in the [0...19] range)
-    diffs = np.diff(prices, axis=0) + 10
-    # Obtain 4-sized rolling windows and encode each window using base 19
-    windows = (
-        sliding_window_view(diffs + 10, axis=0, window_shape=4)
-        * 19 ** np.arange(4)[::-1]
-    ).sum(-1)
-    # Create empty array of bananas
-    bananas = np.zeros(shape=(windows.max() + 1,), dtype=int)
-    for buyer, price in zip(windows.T, prices.T):
-        # For each buyer, obtain the windows idx (as base19 encoded)
-        # and the idx to retrieve the prices corresponding to the first appearance
-        # of that window
-        window_idx, price_idx = np.unique(buyer, return_index=True)
-        # Update the bananas array: each window is update with the associated price
-        bananas[window_idx] += price[price_idx + 4]
 
-    return bananas.max()
+def market(
+    numbers: np.ndarray, n: int, n_chunks: Optional[int] = None
+) -> tuple[int, int]:
+    """Sum of the last secret numbers, and highest number of bananas"""
+    n_chunks = n_chunks or numba.get_num_threads()
+    total, bananas = simulate_market(numbers, n, max(1, min(n_chunks, len(numbers))))
+    return int(total), int(bananas.max())
 
 
 @timefunc
 def main(filename: str):
-    numbers = np.array(list(map(int, read_input(filename))), dtype=int)
-    print(f"Result of part 1: {sequence(numbers, 2000)[-1, :].sum()}")
-    print(f"Result of part 2: {highest_price(numbers, 2000)}")
+    total, bananas = market(read_integers(filename), 2000)
+    print(f"Result of part 1: {total}")
+    print(f"Result of part 2: {bananas}")
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from utils import read_input
+from utils.parsing import find_markers, read_char_grid
 import numpy as np
 from collections import Counter
 
@@ -30,10 +30,10 @@ def beam_splitter(diagram: np.ndarray, splitters: list[tuple[int,int]], y_start:
 
 
 def main(filename: str):
-    diagram = np.array([list(line) for line in read_input(filename)], dtype=str)
-    y_start = np.where(diagram == 'S')[1][0]
-    x_splitter, y_splitter = np.where(diagram == '^')
-    splitters = list(zip(x_splitter, y_splitter))
+    diagram = read_char_grid(filename)
+    markers = find_markers(diagram, "S^")
+    y_start = markers["S"][0, 1]
+    splitters = list(zip(*markers["^"].T))
     count, counter = beam_splitter(diagram, splitters, y_start)
     print(f"Result of part 1: {count}")
     print(f"Result of part 2: {counter}")
@@ -1,53 +1,190 @@
-from utils import read_input
 import numpy as np
-from scipy.spatial.distance import pdist
+from numba import njit  # type: ignore
+from scipy.spatial import cKDTree
 
-def create_circuits(connections: np.ndarray, n_junctions: int, n_shortest: int | None) -> tuple[set[frozenset[int]], tuple[int, int]]:
-    if n_shortest is None:
-        n_shortest = len(connections)
+from utils.parsing import read_integer_rows
 
-    last_junctions = (-1, -1)
-    # Initialise circuits
-    circuits: dict[int, set] = dict()
-    for i in range(n_junctions):
-        circuits[i] = set([i])
-    
-    for conn in connections[:n_shortest]:
-        c1, c2 = conn
-        # If they are already in the same circuit, skip
-        if circuits[c1] is circuits[c2]:
+# Nearest neighbours first listed for each junction when building the spanning tree
+INITIAL_NEIGHBORS = 16
+# Bound of the junctions whose neighbours are all listed
+NO_BOUND = np.iinfo(np.int64).max
+
+
+@njit(cache=True)
+def find(parents: np.ndarray, x: int) -> int:
+    """Root of the circuit of x, compressing the path along the way"""
+    root = x
+    while parents[root] != root:
+        root = parents[root]
+    while parents[x] != root:
+        parent = parents[x]
+        parents[x] = root
+        x = parent
+    return root
+
+
+@njit(cache=True)
+def connect(parents: np.ndarray, sizes: np.ndarray, edges: np.ndarray) -> int:
+    """Merge circuits along the edges (in order), by size. Returns the index of the
+    edge that puts all junctions in a single circuit, or -1"""
+    n_circuits = 0
+    for i in range(len(parents)):
+        n_circuits += parents[i] == i
+    for k in range(len(edges)):
+        a, b = find(parents, edges[k, 0]), find(parents, edges[k, 1])
+        if a == b:
             continue
-        # Merge circuits
-        new_circuit = circuits[c1].union(circuits[c2])
+        if sizes[a] < sizes[b]:
+            a, b = b, a
+        parents[b] = a
+        sizes[a] += sizes[b]
+        n_circuits -= 1
+        if n_circuits == 1:
+            return k
+    return -1
+
+
+@njit(cache=True)
+def roots(parents: np.ndarray) -> np.ndarray:
+    """Circuit of each junction"""
+    labels = np.empty_like(parents)
+    for i in range(len(parents)):
+        labels[i] = find(parents, i)
+    return labels
+
+
+def create_circuits(edges: np.ndarray, n_junctions: int) -> tuple[np.ndarray, int]:
+    """Sizes of the circuits after connecting the edges, and the index of the edge
+    completing a single circuit (-1 if there isn't one)"""
+    parents = np.arange(n_junctions)
+    sizes = np.ones(n_junctions, dtype=np.int64)
+    last = connect(parents, sizes, edges)
+    return sizes[parents == np.arange(n_junctions)], last
+
+
+def distinct_edges(edges: np.ndarray, n_junctions: int) -> np.ndarray:
+    """Distinct edges (i < j), without loops"""
+    edges = np.sort(edges[edges[:, 0] != edges[:, 1]], axis=1)
+    keys = np.unique(edges[:, 0] * n_junctions + edges[:, 1])
+    return np.stack(np.divmod(keys, n_junctions), axis=1)
+
 
-        for node in new_circuit:
-            circuits[node] = new_circuit
-        
-        if len(new_circuit) == n_junctions:
-            last_junctions = c1, c2
-            break
+def sort_edges(data: np.ndarray, edges: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Edges (i < j) sorted by squared length, then by junction indices, with their
+    squared lengths"""
+    edges = np.sort(edges, axis=1)
+    lengths = ((data[edges[:, 0]] - data[edges[:, 1]]) ** 2).sum(axis=1)
+    order = np.lexsort((edges[:, 0] * len(data) + edges[:, 1], lengths))
+    return edges[order], lengths[order]
 
-    return set(map(frozenset, circuits.values())), last_junctions
+
+def shortest_edges(data: np.ndarray, n_edges: int) -> np.ndarray:
+    """The n_edges shortest connections, sorted. The k nearest neighbours of every
+    junction give at least n_edges distinct pairs for k = 2 * n_edges / n, so the
+    n_edges-th shortest of these pairs bounds the radius of the search"""
+    n_edges = min(n_edges, len(data) * (len(data) - 1) // 2)
+    if n_edges == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    tree = cKDTree(data)
+    k = min(-(-2 * n_edges // len(data)), len(data) - 1)
+    _, neighbors = tree.query(data, k=k + 1)
+    candidates = distinct_edges(
+        np.stack([np.repeat(np.arange(len(data)), k + 1), neighbors.ravel()], axis=1),
+        len(data),
+    )
+    _, lengths = sort_edges(data, candidates)
+    # (slightly enlarged so that rounding doesn't drop the pairs at the cutoff)
+    radius = np.sqrt(lengths[n_edges - 1]) * (1 + 1e-9)
+    edges, _ = sort_edges(data, tree.query_pairs(radius, output_type="ndarray"))
+    return edges[:n_edges]
+
+
+def nearest_edges(
+    tree: cKDTree, data: np.ndarray, k: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Edges from each junction to its k nearest neighbours (sorted, with their
+    squared lengths), and the squared distance beyond which the neighbours of each
+    junction are not listed (NO_BOUND if they all are)"""
+    _, neighbors = tree.query(data, k=k + 1)
+    bounds = ((data[neighbors[:, -1]] - data) ** 2).sum(axis=1)
+    if k + 1 >= len(data):
+        bounds[:] = NO_BOUND
+    # (edges listed by both their junctions appear twice in a row, which doesn't
+    # change the first edge leaving a circuit)
+    sources = np.repeat(np.arange(len(data)), k + 1)
+    edges = np.stack([sources, neighbors.ravel()], axis=1)
+    edges, lengths = sort_edges(data, edges[edges[:, 0] != edges[:, 1]])
+    return edges, lengths, bounds
+
+
+@njit(cache=True)
+def min_outgoing_edges(
+    edges: np.ndarray, lengths: np.ndarray, bounds: np.ndarray, labels: np.ndarray
+) -> np.ndarray:
+    """Indices of the shortest (i.e. first) edge leaving each circuit, for the
+    circuits where it is known: it must be shorter than the bound of every junction
+    of the circuit, since farther neighbours are not listed"""
+    n_junctions = len(labels)
+    circuit_bounds = np.full(n_junctions, NO_BOUND, dtype=np.int64)
+    for i in range(n_junctions):
+        circuit_bounds[labels[i]] = min(circuit_bounds[labels[i]], bounds[i])
+    first = np.full(n_junctions, -1, dtype=np.int64)
+    for k in range(len(edges)):
+        # The edge leaves the circuits of both its junctions
+        a, b = labels[edges[k, 0]], labels[edges[k, 1]]
+        if a != b:
+            if first[a] < 0:
+                first[a] = k
+            if first[b] < 0:
+                first[b] = k
+    chosen = np.zeros(len(edges), dtype=np.bool_)
+    for circuit in range(n_junctions):
+        k = first[circuit]
+        if k >= 0 and lengths[k] < circuit_bounds[circuit]:
+            chosen[k] = True
+    return np.flatnonzero(chosen)
+
+
+def last_connection(data: np.ndarray) -> np.ndarray:
+    """Connection completing a single circuit when connecting the closest junctions
+    first: the longest edge of the minimum spanning tree. The tree is built with
+    Borůvka's algorithm, where the shortest edge leaving each circuit is part of it.
+    The nearest neighbours listed for each junction double whenever they are not
+    enough to find the edge leaving any circuit"""
+    if len(data) < 2:
+        return np.array([-1, -1])
+    tree = cKDTree(data)
+    parents = np.arange(len(data))
+    sizes = np.ones(len(data), dtype=np.int64)
+    k = min(INITIAL_NEIGHBORS, len(data) - 1)
+    edges, lengths, bounds = nearest_edges(tree, data, k)
+    longest = (-1, -1, -1)
+    while True:
+        chosen = min_outgoing_edges(edges, lengths, bounds, roots(parents))
+        if len(chosen) == 0:
+            k = min(2 * k, len(data) - 1)
+            edges, lengths, bounds = nearest_edges(tree, data, k)
+            continue
+        # (in the order the connections would be made)
+        last = chosen[-1]
+        longest = max(longest, (lengths[last], *edges[last]))
+        if connect(parents, sizes, edges[chosen]) >= 0:
+            return np.array(longest[1:])
 
 
 def main(filename: str):
-    data = np.array([list(map(int, line.split(','))) for line in read_input(filename)], dtype=np.int64)
-    distances = pdist(data, metric='euclidean')
-    c_idx_x, c_idx_y = np.triu_indices(len(data), k=1)
-    c_idx = np.array(list(zip(c_idx_x, c_idx_y)), dtype=int)
-    assert len(distances) == len(c_idx)
-    if 'example' in filename:
+    data = read_integer_rows(filename)
+    if "example" in filename:
         n = 10
     else:
         n = 1000
-    sorted_connections = c_idx[np.argsort(distances)]
-    
-    circuits, _ = create_circuits(sorted_connections, len(data), n)
-    circuit_sizes = [len(circuit) for circuit in circuits]
-    print(f"Result of part 1: {np.prod(sorted(circuit_sizes)[-3:])}")
 
-    _, last_junctions = create_circuits(sorted_connections, len(data), None)
+    circuit_sizes, _ = create_circuits(shortest_edges(data, n), len(data))
+    print(f"Result of part 1: {np.prod(np.sort(circuit_sizes)[-3:])}")
+
+    last_junctions = last_connection(data)
     print(f"Result of part 2: {np.prod(data[last_junctions, 0])}")
 
+
 if __name__ == "__main__":
     main("2025/08/input.txt")
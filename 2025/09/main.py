@@ -1,94 +1,74 @@
-from utils import read_input, CoordTuple
-from itertools import combinations
 import numpy as np
-from scipy.spatial.distance import pdist
+from scipy import ndimage
 
-Edge = tuple[int, int, int]  # (x, y_min, y_max)
-FloatTuple = tuple[float, float]
+from utils.parsing import read_integer_rows
 
-def create_rectangle(u: np.ndarray, v: np.ndarray) -> tuple[int,int,int,int]:
-    """Create a rectangle defined by two corner points u and v (inclusive)."""
-    x_min, y_min = np.minimum(u, v)
-    x_max, y_max = np.maximum(u, v)
-    return x_min, x_max, y_min, y_max 
+# Candidate rectangles checked at once, from the largest
+CHUNK_SIZE = 4096
 
 
+def compress(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Compressed coordinates of the values, and the number of tiles in each cell of
+    the compressed axis. Each distinct value gets an even index, and the (possibly
+    empty) gap between two consecutive values gets the odd index in between"""
+    unique, inverse = np.unique(values, return_inverse=True)
+    sizes = np.ones(2 * len(unique) - 1, dtype=np.int64)
+    sizes[1::2] = np.diff(unique) - 1
+    return 2 * inverse, sizes
 
-def get_edges(polygon: np.ndarray) -> tuple[list[Edge], list[Edge]]:
-    """Extract horizontal and vertical edges from a polygon defined by its vertices."""
-    h_edges = []
-    v_edges = []
-    x0, y0 = polygon[0]
-    np.append(polygon, [polygon[0]], axis=0)  # Close the polygon
-    for point in polygon:
-        x, y = point
-        if x == x0:
-            # Vertical edge
-            v_edges.append((x, min(y0, y), max(y0, y)))
-        else:
-            # Horizontal edge
-            h_edges.append((y, min(x0, x), max(x0, x)))
-        
-        x0, y0 = x, y
-    return h_edges, v_edges
 
+def outside_prefix_sums(polygon: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Compressed vertices of the polygon, and the 2D prefix sums of the (non-empty)
+    cells of the compressed grid outside of it. All the tiles of a compressed cell
+    are either inside or outside, since the boundary only changes at vertex
+    coordinates."""
+    x, x_sizes = compress(polygon[:, 0])
+    y, y_sizes = compress(polygon[:, 1])
+    width, height = len(x_sizes), len(y_sizes)
+    # Rasterise the boundary (edges are horizontal or vertical), then its interior
+    inside = np.zeros((width, height), dtype=bool)
+    for x0, y0, x1, y1 in zip(x, y, np.roll(x, -1), np.roll(y, -1)):
+        inside[min(x0, x1) : max(x0, x1) + 1, min(y0, y1) : max(y0, y1) + 1] = True
+    inside = ndimage.binary_fill_holes(inside)
 
+    prefix = np.zeros((width + 1, height + 1), dtype=np.int64)
+    # (empty gaps between consecutive coordinates don't matter)
+    outside = ~inside & (x_sizes[:, None] > 0) & (y_sizes[None, :] > 0)
+    prefix[1:, 1:] = outside.cumsum(axis=0).cumsum(axis=1)
+    return np.stack([x, y], axis=1), prefix
 
-def is_point_in_polygon(point: CoordTuple | FloatTuple, edges: list[tuple[int,int,int]]) -> bool:
-    """Determine if a point is inside a polygon using the ray-casting algorithm.
-    Use only vertical edges for simplicity. Point on edge is considered inside."""
-    x, y = point
-    crossings = 0
-    for edge_x, y_min, y_max in edges:
-        if x > edge_x and y_min <= y < y_max:
-            crossings += 1
-    return crossings % 2 == 1
 
-def is_rectangle_in_polygon(u: np.ndarray, v: np.ndarray, vertex_set: set[CoordTuple], v_edges: list[Edge], h_edges: list[Edge]) -> bool:
-    """Check if the rectangle defined by corners u and v is fully contained within the polygon.
-    """
-    x_min, x_max, y_min, y_max = create_rectangle(u, v)
-    rec_vertexes = [ (x_min, y_min), (x_min, y_max), (x_max, y_min), (x_max, y_max) ]
-    
-    # Check if all rectangle vertexes are inside the polygon
-    for vertex in rec_vertexes:
-        if vertex not in vertex_set:
-            if not is_point_in_polygon(vertex, v_edges):
-                return False
-    
-    # Check for edge crossing
-    for x_edge, y1, y2 in v_edges:
-        if x_min < x_edge < x_max: 
-            if not (y2 <= y_min or y1 >= y_max): 
-                return False
-    for y_edge, x1, x2 in h_edges:
-        if y_min < y_edge < y_max: 
-            if not (x2 <= x_min or x1 >= x_max):
-                return False
-    
-    # Check center point to ensure rectangle isn't completely outside
-    center_x = (x_min + x_max) / 2
-    center_y = (y_min + y_max) / 2
-    if not is_point_in_polygon((center_x, center_y), v_edges): 
-        return False
-    
-    return True
+def count_outside(prefix: np.ndarray, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """Number of compressed cells outside of the polygon in each rectangle with
+    (compressed) opposite corners u and v"""
+    x_min, y_min = np.minimum(u, v).T
+    x_max, y_max = np.maximum(u, v).T + 1
+    return (
+        prefix[x_max, y_max]
+        - prefix[x_min, y_max]
+        - prefix[x_max, y_min]
+        + prefix[x_min, y_min]
+    )
+
 
 def main(filename: str):
-    polygon = np.array([list(map(int, line.split(','))) for line in read_input(filename)], dtype=np.int64)
-    def rectangle_area(u: np.ndarray, v: np.ndarray) -> int:
-        return np.prod(abs(u - v) + 1)
-    areas = pdist(polygon, metric=rectangle_area).astype(np.int64)
-    print(f"Result of part 1: {areas.max()}")
-   
-    h_edges, v_edges = get_edges(polygon)
-    vertex_set = set(map(tuple, polygon))
-    areas_2 = []
-    for u, v in combinations(polygon, 2):
-        if is_rectangle_in_polygon(u,v, vertex_set, v_edges, h_edges):
-            areas_2.append(rectangle_area(u, v))
+    polygon = read_integer_rows(filename)
+    # Areas of the rectangles of all pairs of red tiles, from the largest
+    first, second = np.triu_indices(len(polygon), k=1)
+    areas = np.prod(np.abs(polygon[first] - polygon[second]) + 1, axis=1)
+    order = np.argsort(areas, kind="stable")[::-1]
+    print(f"Result of part 1: {areas[order[0]]}")
+
+    vertices, prefix = outside_prefix_sums(polygon)
+    for start in range(0, len(order), CHUNK_SIZE):
+        chunk = order[start : start + CHUNK_SIZE]
+        contained = (
+            count_outside(prefix, vertices[first[chunk]], vertices[second[chunk]]) == 0
+        )
+        if np.any(contained):
+            print(f"Result of part 2: {areas[chunk[np.argmax(contained)]]}")
+            break
 
-    print(f"Result of part 2: {max(areas_2)}")
 
 if __name__ == "__main__":
     main("2025/09/input.txt")
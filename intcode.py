@@ -0,0 +1,305 @@
+"""Shared Intcode virtual machine for the 2019 days.
+
+Instructions are decoded once into a compact table (opcode + parameter modes packed
+in a single integer) and executed by a numba-compiled dispatch loop. The table is
+invalidated cell by cell on writes, so self-modifying programs are still supported.
+Memory starts as a copy of the program and grows on demand.
+
+Machines communicate through channels (deques of integers): a machine runs in batch
+until it halts or blocks on an empty input channel, and a `Scheduler` steps a set of
+connected machines (chains, feedback loops, networks) until none can make progress.
+"""
+
+from collections import deque
+from enum import IntEnum
+from typing import Generator, Optional
+
+import numpy as np
+from numba import njit  # type: ignore
+
+
+class Status(IntEnum):
+    HALTED = 0
+    OUTPUT = 1  # The output buffer is full
+    NEED_INPUT = 2  # Blocked on an input instruction with no input available
+    NEED_MEMORY = 3  # Tried to access an address beyond the current memory
+
+
+# Layout of the registers array shared with the compiled loop
+IP, BASE, INPUT_PTR, N_OUTPUTS, ADDRESS = range(5)
+N_REGISTERS = 5
+
+# Number of parameters per opcode (index is the opcode)
+N_PARAMS = np.array([0, 3, 3, 1, 1, 2, 2, 3, 3, 1], dtype=np.int64)
+OUTPUT_BUFFER_SIZE = 1024
+
+Channel = deque[int]
+
+
+def load_program(filename: str) -> np.ndarray:
+    return np.loadtxt(filename, delimiter=",", dtype=np.int64)
+
+
+@njit(cache=True)
+def _decode(value: int) -> int:
+    """Pack opcode (8 bits) and the three parameter modes (2 bits each)"""
+    return (
+        value % 100
+        | ((value // 100) % 10) << 8
+        | ((value // 1000) % 10) << 10
+        | ((value // 10000) % 10) << 12
+    )
+
+
+@njit(cache=True)
+def _address(memory: np.ndarray, pointer: int, mode: int, base: int) -> int:
+    """Resolve the address referred to by the parameter stored at `pointer`"""
+    if mode == 0:
+        return memory[pointer]
+    elif mode == 1:
+        return pointer
+    elif mode == 2:
+        return base + memory[pointer]
+    raise ValueError("Unsupported parameter mode")
+
+
+@njit(cache=True)
+def _execute(
+    memory: np.ndarray,
+    decoded: np.ndarray,
+    registers: np.ndarray,
+    inputs: np.ndarray,
+    outputs: np.ndarray,
+) -> int:
+    """Run the program until it halts, blocks on input, fills the `outputs` buffer or
+    needs more memory. The machine state is saved back in `registers`."""
+    ip = registers[IP]
+    base = registers[BASE]
+    input_ptr = registers[INPUT_PTR]
+    n_outputs = registers[N_OUTPUTS]
+    size = memory.shape[0]
+
+    while True:
+        if ip >= size:
+            registers[ADDRESS] = ip
+            status = Status.NEED_MEMORY
+            break
+
+        instruction = decoded[ip]
+        if instruction == 0:
+            instruction = _decode(memory[ip])
+            decoded[ip] = instruction
+        op = instruction & 0xFF
+        if op == 99:
+            status = Status.HALTED
+            break
+        if op == 0 or op > 9:
+            raise ValueError("Unknown opcode")
+
+        # Resolve all the parameter addresses before executing anything, so that the
+        # instruction can be resumed as a whole after a memory increase
+        n_params = N_PARAMS[op]
+        if ip + n_params >= size:
+            registers[ADDRESS] = ip + n_params
+            status = Status.NEED_MEMORY
+            break
+        a1 = _address(memory, ip + 1, (instruction >> 8) & 3, base)
+        a2 = a1
+        a3 = a1
+        if n_params >= 2:
+            a2 = _address(memory, ip + 2, (instruction >> 10) & 3, base)
+        if n_params >= 3:
+            a3 = _address(memory, ip + 3, (instruction >> 12) & 3, base)
+        highest = max(a1, a2, a3)
+        if highest >= size:
+            registers[ADDRESS] = highest
+            status = Status.NEED_MEMORY
+            break
+        if min(a1, a2, a3) < 0:
+            raise IndexError("Negative Intcode address")
+
+        if op == 1:
+            memory[a3] = memory[a1] + memory[a2]
+            decoded[a3] = 0
+            ip += 4
+        elif op == 2:
+            memory[a3] = memory[a1] * memory[a2]
+            decoded[a3] = 0
+            ip += 4
+        elif op == 3:
+            if input_ptr >= inputs.shape[0]:
+                status = Status.NEED_INPUT
+                break
+            memory[a1] = inputs[input_ptr]
+            decoded[a1] = 0
+            input_ptr += 1
+            ip += 2
+        elif op == 4:
+            outputs[n_outputs] = memory[a1]
+            n_outputs += 1
+            ip += 2
+            if n_outputs == outputs.shape[0]:
+                status = Status.OUTPUT
+                break
+        elif op == 5:
+            ip = memory[a2] if memory[a1] != 0 else ip + 3
+        elif op == 6:
+            ip = memory[a2] if memory[a1] == 0 else ip + 3
+        elif op == 7:
+            memory[a3] = 1 if memory[a1] < memory[a2] else 0
+            decoded[a3] = 0
+            ip += 4
+        elif op == 8:
+            memory[a3] = 1 if memory[a1] == memory[a2] else 0
+            decoded[a3] = 0
+            ip += 4
+        else:
+            base += memory[a1]
+            ip += 2
+
+    registers[IP] = ip
+    registers[BASE] = base
+    registers[INPUT_PTR] = input_ptr
+    registers[N_OUTPUTS] = n_outputs
+    return status
+
+
+class Intcode:
+    """Class for IntCode.
+    Inputs are consumed from the `inputs` channel and outputs are appended to the
+    `outputs` channel: sharing a channel between two machines connects them."""
+
+    def __init__(
+        self,
+        program: np.ndarray,
+        inputs: Optional[Channel] = None,
+        outputs: Optional[Channel] = None,
+    ):
+        self.program = np.asarray(program, dtype=np.int64)
+        self.inputs: Channel = deque() if inputs is None else inputs
+        self.outputs: Channel = deque() if outputs is None else outputs
+        self.reset()
+
+    def reset(self):
+        """Restore the program and empty the channels (in place, to keep connections)"""
+        self.memory = self.program.copy()
+        self.decoded = np.zeros(self.memory.shape, dtype=np.int64)
+        self.registers = np.zeros(N_REGISTERS, dtype=np.int64)
+        self.inputs.clear()
+        self.outputs.clear()
+        self.status: Optional[Status] = None
+
+    @property
+    def halted(self) -> bool:
+        return self.status is Status.HALTED
+
+    @property
+    def runnable(self) -> bool:
+        """Whether running the machine can make any progress"""
+        return not self.halted and (
+            self.status is not Status.NEED_INPUT or len(self.inputs) > 0
+        )
+
+    def push(self, *values: int):
+        """Append values to the input channel"""
+        self.inputs.extend(values)
+
+    def drain(self) -> list[int]:
+        """Pop all the values from the output channel"""
+        outputs = list(self.outputs)
+        self.outputs.clear()
+        return outputs
+
+    def _grow(self, address: int):
+        """Grow memory (at least doubling it) so that `address` is addressable"""
+        new_size = max(2 * self.memory.shape[0], address + 1)
+        self.memory = np.concatenate(
+            (self.memory, np.zeros(new_size - self.memory.shape[0], dtype=np.int64))
+        )
+        self.decoded = np.concatenate(
+            (self.decoded, np.zeros(new_size - self.decoded.shape[0], dtype=np.int64))
+        )
+
+    def run(self, max_outputs: Optional[int] = None) -> Status:
+        """Run until the program halts, blocks on input or has produced `max_outputs`
+        outputs (if specified). All the available inputs are handed over to the
+        compiled loop in a single batch."""
+        if max_outputs is not None and max_outputs <= 0:
+            # Nothing may be output, so don't execute anything (a machine that never
+            # ran counts as paused on a full output buffer)
+            return Status.OUTPUT if self.status is None else self.status
+        n_outputs = 0
+        while True:
+            buffer_size = (
+                OUTPUT_BUFFER_SIZE if max_outputs is None else max_outputs - n_outputs
+            )
+            buffer = np.zeros(buffer_size, dtype=np.int64)
+            inputs = np.fromiter(self.inputs, dtype=np.int64, count=len(self.inputs))
+            self.registers[INPUT_PTR] = 0
+            self.registers[N_OUTPUTS] = 0
+            self.status = Status(
+                _execute(self.memory, self.decoded, self.registers, inputs, buffer)
+            )
+            # Consume inputs and publish outputs
+            for _ in range(self.registers[INPUT_PTR]):
+                self.inputs.popleft()
+            self.outputs.extend(buffer[: self.registers[N_OUTPUTS]].tolist())
+            n_outputs += int(self.registers[N_OUTPUTS])
+
+            if self.status is Status.NEED_MEMORY:
+                self._grow(int(self.registers[ADDRESS]))
+            elif self.status is Status.OUTPUT and (
+                max_outputs is None or n_outputs < max_outputs
+            ):
+                continue
+            else:
+                return self.status
+
+    def coroutine(self) -> Generator[list[int], Optional[int], list[int]]:
+        """Generator interface: yields the outputs produced every time the machine
+        blocks on input, and resumes with the value sent to it.
+        The outputs produced before halting are returned (`StopIteration.value`)."""
+        self.run()
+        while not self.halted:
+            value = yield self.drain()
+            if value is not None:
+                self.push(value)
+            self.run()
+        return self.drain()
+
+
+def connect(*machines: Intcode, loop: bool = False):
+    """Chain machines so that each one feeds its outputs to the next one.
+    With `loop`, the last machine also feeds the first one (feedback loop)."""
+    pairs = list(zip(machines[:-1], machines[1:]))
+    if loop:
+        pairs.append((machines[-1], machines[0]))
+    for source, target in pairs:
+        # Pending inputs of the target are preserved
+        source.outputs.extend(target.inputs)
+        target.inputs = source.outputs
+
+
+class Scheduler:
+    """Cooperative scheduler for a set of (connected) machines.
+    Each machine is run in batch until it halts or blocks on input, and machines are
+    visited round-robin until none of them can make progress."""
+
+    def __init__(self, machines: list[Intcode]):
+        self.machines = machines
+
+    def step(self) -> bool:
+        """Run each runnable machine once. Returns whether any progress was made"""
+        progress = False
+        for machine in self.machines:
+            if machine.runnable:
+                machine.run()
+                progress = True
+        return progress
+
+    def run(self) -> list[Status]:
+        """Run until all machines are halted or idle (blocked on an empty channel).
+        Channels can then be inspected/fed by the caller before running again."""
+        while self.step():
+            pass
+        return [machine.status for machine in self.machines]  # type: ignore
@@ -0,0 +1,241 @@
+"""Run every `YYYY/DD/main.py` solver across a process pool and write a timing report.
+
+Example:
+    python run_all.py --years 2023 2024 --jobs 8 --timeout 60
+"""
+
+import argparse
+import ast
+import contextlib
+import importlib
+import inspect
+import io
+import json
+import multiprocessing as mp
+import os
+import re
+import resource
+import signal
+import sys
+import time
+import traceback
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from multiprocessing.connection import Connection, wait
+from pathlib import Path
+from typing import Optional
+
+from utils import timefunc
+
+ROOT = Path(__file__).resolve().parent
+ANSWER_REGEX = re.compile(r"Res\w* (?:of|for) part ?(\d+)\s*:?\s*(.*)")
+
+
+@dataclass
+class DayReport:
+    """Outcome of a single solver run"""
+
+    day: str
+    status: str
+    input_file: Optional[str] = None
+    wall_time: Optional[float] = None
+    peak_rss_mb: Optional[float] = None
+    answers: dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def discover_days(years: Optional[list[str]] = None) -> list[str]:
+    """Find all the `YYYY/DD` folders that contain a `main.py` solver"""
+    days = sorted(
+        f"{path.parent.parent.name}/{path.parent.name}"
+        for path in ROOT.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/main.py")
+    )
+    if years:
+        days = [day for day in days if day.split("/")[0] in years]
+    return days
+
+
+def takes_input(day: str) -> bool:
+    """Whether the solver's `main` takes the input file as an argument.
+    Older solvers hardcode `input.txt` and take no arguments."""
+    tree = ast.parse((ROOT / day / "main.py").read_text())
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "main":
+            return bool(node.args.args or node.args.posonlyargs)
+    return False
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of the current process, in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak / 1024**2 if sys.platform == "darwin" else peak / 1024
+
+
+def _run_day(day: str, input_file: Optional[str], conn: Connection):
+    """Worker entry point: import the solver, run `main` and send back a report"""
+    # Lead a process group, so that the processes started by the solver can be
+    # killed along with the worker
+    os.setpgrp()
+    os.chdir(ROOT)
+    report = DayReport(day=day, status="ok", input_file=input_file)
+    stdout = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(stdout):
+            main = importlib.import_module(day.replace("/", ".") + ".main").main
+            # Reuse the `timefunc` timing if the solver is already decorated
+            timed_main = main if hasattr(main, "elapsed") else timefunc(main)
+            # Older solvers hardcode their input and take no arguments
+            if inspect.signature(main).parameters:
+                timed_main(input_file)
+            else:
+                timed_main()
+        report.wall_time = timed_main.elapsed
+    except Exception:
+        report.status = "error"
+        report.error = traceback.format_exc(limit=-3)
+
+    for line in stdout.getvalue().splitlines():
+        match = ANSWER_REGEX.search(line)
+        if match:
+            report.answers[match.group(1)] = match.group(2).strip()
+    report.peak_rss_mb = _peak_rss_mb()
+    conn.send(report)
+    conn.close()
+
+
+def _kill_group(process: mp.process.BaseProcess):
+    """Kill a worker and every process left in its group (e.g. a solver's pool)"""
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        # The worker hasn't created its group yet, or the group is already gone
+        if process.is_alive():
+            process.kill()
+
+
+def run_days(
+    days: list[str], input_name: str, jobs: int, timeout: float
+) -> list[DayReport]:
+    """Run the solvers with at most `jobs` concurrent processes.
+    Every day gets a fresh process, so that peak RSS is measured per day and
+    a solver exceeding `timeout` seconds can be killed without affecting the others.
+    """
+    ctx = mp.get_context("spawn")
+    reports: dict[str, DayReport] = {}
+    pending = deque(days)
+    running: dict[str, tuple[mp.process.BaseProcess, Connection, float]] = {}
+
+    while pending or running:
+        # Fill the pool
+        while pending and len(running) < jobs:
+            day = pending.popleft()
+            input_file = f"{day}/{input_name}"
+            if input_name != "input.txt" and not takes_input(day):
+                reports[day] = DayReport(day=day, status="unsupported_input")
+                continue
+            if not (ROOT / input_file).exists():
+                reports[day] = DayReport(day=day, status="missing_input")
+                continue
+            recv_conn, send_conn = ctx.Pipe(duplex=False)
+            # Not a daemon, so that solvers can use process pools themselves
+            process = ctx.Process(target=_run_day, args=(day, input_file, send_conn))
+            process.start()
+            send_conn.close()
+            running[day] = (process, recv_conn, time.monotonic() + timeout)
+
+        if not running:
+            continue
+
+        # Wait for the first result (or process death) up to the closest deadline
+        next_deadline = min(deadline for _, _, deadline in running.values())
+        wait(
+            [conn for _, conn, _ in running.values()],
+            timeout=max(0.0, next_deadline - time.monotonic()),
+        )
+
+        now = time.monotonic()
+        for day, (process, conn, deadline) in list(running.items()):
+            if conn.poll():
+                try:
+                    reports[day] = conn.recv()
+                except EOFError:
+                    # The worker died before reporting (e.g. OOM-killed)
+                    process.join()
+                    reports[day] = DayReport(
+                        day=day,
+                        status="crashed",
+                        error=f"Exit code: {process.exitcode}",
+                    )
+            elif now >= deadline:
+                _kill_group(process)
+                reports[day] = DayReport(day=day, status="timeout", wall_time=timeout)
+            else:
+                continue
+            process.join()
+            # Pool workers are not daemons, and outlive a killed or crashed solver
+            _kill_group(process)
+            conn.close()
+            del running[day]
+            print(_format_line(reports[day]), flush=True)
+
+    return [reports[day] for day in days]
+
+
+def _format_line(report: DayReport) -> str:
+    wall_time = f"{report.wall_time:8.3f}s" if report.wall_time is not None else " " * 9
+    peak_rss = f"{report.peak_rss_mb:8.1f}MB" if report.peak_rss_mb else " " * 10
+    return f"{report.day}  {report.status:<17} {wall_time} {peak_rss}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--years", nargs="*", help="Restrict to these years")
+    parser.add_argument(
+        "--days", nargs="*", help="Restrict to these days (e.g. 2023/17)"
+    )
+    parser.add_argument(
+        "--input-name",
+        default="input.txt",
+        help="Input file name inside each day folder (e.g. example.txt)",
+    )
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--timeout", type=float, default=120.0, help="Per-day timeout in seconds"
+    )
+    parser.add_argument("--output", default="run_report.json")
+    parser.add_argument(
+        "--top", type=int, default=10, help="Number of slowest days to summarise"
+    )
+    args = parser.parse_args()
+
+    days = discover_days(args.years)
+    if args.days:
+        days = [day for day in days if day in args.days]
+
+    start = time.perf_counter()
+    reports = run_days(days, args.input_name, args.jobs, args.timeout)
+    total_time = time.perf_counter() - start
+
+    with open(ROOT / args.output, "w") as file:
+        json.dump(
+            {"total_time": total_time, "days": [asdict(r) for r in reports]},
+            file,
+            indent=2,
+        )
+
+    # Summary of the slowest days
+    print(f"\nSlowest {args.top} days:")
+    timed = [r for r in reports if r.wall_time is not None]
+    for report in sorted(timed, key=lambda r: -r.wall_time)[: args.top]:  # type: ignore
+        print(_format_line(report))
+    statuses = [r.status for r in reports]
+    print(
+        f"\nRan {len(reports)} days in {total_time:.2f}s: "
+        + ", ".join(f"{s}={statuses.count(s)}" for s in sorted(set(statuses)))
+    )
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
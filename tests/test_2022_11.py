@@ -0,0 +1,36 @@
+import importlib
+
+day = importlib.import_module("2022.11.main")
+
+# The divisors have an lcm above 3e9, so squaring reduced worries overflows int64.
+# Both monkeys always throw to each other.
+MONKEYS = [
+    ["Monkey 0:", "Starting items: 79, 98", "Operation: new = old * old"]
+    + ["Test: divisible by 65521", "If true: throw to monkey 1"]
+    + ["If false: throw to monkey 1"],
+    ["Monkey 1:", "Starting items: 54", "Operation: new = old + 3"]
+    + ["Test: divisible by 65537", "If true: throw to monkey 0"]
+    + ["If false: throw to monkey 0"],
+]
+
+
+def play_reference(n_rounds: int, modulus: int) -> list[int]:
+    """Plain simulation of the rounds, with Python integers"""
+    items = [[79, 98], [54]]
+    counts = [0, 0]
+    for _ in range(n_rounds):
+        for monkey in (0, 1):
+            for worry in items[monkey]:
+                counts[monkey] += 1
+                worry = worry * worry if monkey == 0 else worry + 3
+                items[1 - monkey].append(worry % modulus)
+            items[monkey] = []
+    return counts
+
+
+def test_play_reduces_overflowed_worries():
+    monkeys = day.MonkeyBusiness(MONKEYS)
+    assert monkeys.maximum_divisor == 65521 * 65537
+    assert monkeys.play(is_first_part=False, n_rounds=300) == play_reference(
+        300, 65521 * 65537
+    )
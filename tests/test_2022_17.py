@@ -0,0 +1,22 @@
+import importlib
+
+import numpy as np
+import pytest
+
+day = importlib.import_module("2022.17.main")
+
+# Column 6 is rarely reached, so the surface gets deeper than 256 rows
+DEEP_JETS = "<<<<><<<><<<<<>>>><<><<<<<>><><><<<<><<<"
+
+
+@pytest.mark.parametrize("ring_size", [16, 256])
+def test_simulate_tower_grows_the_ring_for_deep_surfaces(ring_size):
+    jets = np.array([1 if jet == ">" else -1 for jet in DEEP_JETS], dtype=np.int8)
+    rocks = day.create_rocks(day.SHAPES, day.WIDTH)
+    rock_heights = (rocks > 0).sum(axis=1)
+
+    assert day.simulate_tower(rocks, rock_heights, jets, 2022, ring_size) == 3398
+    assert (
+        day.simulate_tower(rocks, rock_heights, jets, 1000000000000, ring_size)
+        == 1680000000000
+    )
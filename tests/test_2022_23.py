@@ -0,0 +1,13 @@
+import importlib
+
+day = importlib.import_module("2022.23.main")
+
+
+def test_elves_stopping_within_10_rounds(tmp_path, capsys):
+    grid = ["...#..#..#.", ".#.......##", "#.###..###.", "....##..#.#"]
+    filename = tmp_path / "input.txt"
+    filename.write_text("\n".join(grid) + "\n")
+    day.main(str(filename))
+    output = capsys.readouterr().out
+    assert "Result of part 1: 100" in output
+    assert "Result of part 2: 9" in output
@@ -0,0 +1,20 @@
+import importlib
+
+import numpy as np
+import pytest
+
+day = importlib.import_module("2023.17.main")
+
+
+@pytest.mark.parametrize("max_straight, min_straights", [(3, 0), (10, 4)])
+def test_engines_match_the_heapq_baseline(max_straight, min_straights):
+    grid = np.random.default_rng(0).integers(1, 10, size=(25, 30))
+    end = (grid.shape[0] - 1, grid.shape[1] - 1)
+    results = {
+        engine: day.shortest_path_dijkstra(
+            (0, 0), grid, max_straight, min_straights, end, engine
+        )
+        for engine in day.ENGINES
+    }
+    assert set(day.ENGINES) == {"dial", "graph", "heapq"}
+    assert len(set(results.values())) == 1
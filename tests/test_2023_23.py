@@ -0,0 +1,52 @@
+import importlib
+
+import numpy as np
+import pytest
+
+day = importlib.import_module("2023.23.main")
+
+
+def lattice_maze(n: int, exit_junction: tuple[int, int]) -> tuple[np.ndarray, int, int]:
+    """Grid of an n x n lattice of junctions joined by corridors (of uneven lengths,
+    to avoid ties). The entrance is above the top-left junction, and the exit leaves
+    the grid from the given junction on the perimeter."""
+    rows = np.cumsum([2, *range(2, n + 1)])
+    cols = np.cumsum([2, *range(n, 1, -1)])
+    grid = np.full((rows[-1] + 3, cols[-1] + 3), "#")
+    for row in rows:
+        grid[row, cols[0] : cols[-1] + 1] = "."
+    for col in cols:
+        grid[rows[0] : rows[-1] + 1, col] = "."
+    grid[: rows[0], cols[0]] = "."
+
+    i, j = exit_junction
+    if i == n - 1:
+        grid[rows[i] :, cols[j]] = "."
+        end = (grid.shape[0] - 1, cols[j])
+    elif j == 0:
+        grid[rows[i], : cols[j]] = "."
+        end = (rows[i], 0)
+    elif j == n - 1:
+        grid[rows[i], cols[j] :] = "."
+        end = (rows[i], grid.shape[1] - 1)
+    else:
+        raise ValueError("The exit junction must be on the perimeter.")
+    width = grid.shape[1]
+    return grid, int(cols[0]), int(end[0] * width + end[1])
+
+
+@pytest.mark.parametrize("exit_junction", [(4, 0), (2, 0), (4, 2), (1, 4), (4, 4)])
+def test_longest_path_matches_exhaustive_search(exit_junction):
+    grid, start, end = lattice_maze(5, exit_junction)
+    graph = day.compress_graph(start, end, day.create_grid_graph(grid).to_lists())
+    neighbors, weights, label_start, label_end = day.junction_arrays(start, end, graph)
+    expected = day.longest_path_bitmask(
+        neighbors, weights, label_start, label_end, 0, 0
+    )
+
+    boundary = day.outer_boundary(grid != "#")
+    for n_workers in (1, 2):
+        assert (
+            day.longest_path_parallel(start, end, graph, boundary, n_workers=n_workers)
+            == expected
+        )
@@ -0,0 +1,24 @@
+import numpy as np
+
+from intcode import Intcode, Status
+
+# Outputs 1, 2, 3 and halts
+COUNTER = np.array([104, 1, 104, 2, 104, 3, 99])
+
+
+def test_run_stops_after_max_outputs():
+    machine = Intcode(COUNTER)
+    assert machine.run(max_outputs=2) is Status.OUTPUT
+    assert machine.drain() == [1, 2]
+    assert machine.run() is Status.HALTED
+    assert machine.drain() == [3]
+
+
+def test_run_without_output_budget_executes_nothing():
+    machine = Intcode(COUNTER)
+    assert machine.run(max_outputs=0) is Status.OUTPUT
+    assert machine.drain() == []
+    assert machine.run(max_outputs=1) is Status.OUTPUT
+    assert machine.drain() == [1]
+    assert machine.run(max_outputs=0) is Status.OUTPUT
+    assert machine.drain() == []
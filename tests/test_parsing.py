@@ -0,0 +1,19 @@
+import numpy as np
+import pytest
+
+from utils.parsing import read_char_grid
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_read_char_grid_line_endings(tmp_path, newline):
+    path = tmp_path / "grid.txt"
+    path.write_bytes(newline.join(["#.#", "..#", ""]).encode())
+    grid = read_char_grid(str(path), {".": 0, "#": 255})
+    np.testing.assert_array_equal(grid, [[255, 0, 255], [0, 0, 255]])
+
+
+def test_read_char_grid_unmapped_character(tmp_path):
+    path = tmp_path / "grid.txt"
+    path.write_text("#.\n.x\n")
+    with pytest.raises(ValueError):
+        read_char_grid(str(path), {".": 0, "#": 1})
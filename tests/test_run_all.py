@@ -0,0 +1,16 @@
+import run_all
+
+
+def test_takes_input():
+    assert not run_all.takes_input("2019/01")
+    assert run_all.takes_input("2022/01")
+
+
+def test_run_days_skips_hardcoded_inputs_for_other_input_names():
+    reports = run_all.run_days(
+        ["2019/01", "2022/01"], "example.txt", jobs=2, timeout=60
+    )
+    assert [report.status for report in reports] == ["unsupported_input", "ok"]
+    assert reports[0].input_file is None
+    assert reports[1].input_file == "2022/01/example.txt"
+    assert set(reports[1].answers) == {"1", "2"}
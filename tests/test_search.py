@@ -0,0 +1,102 @@
+import numpy as np
+import pytest
+
+from utils.grid import GridGraph
+from utils.search import (
+    StateGraph,
+    predecessors,
+    shortest_path,
+    shortest_paths,
+    states_on_shortest_paths,
+)
+
+
+def weighted_graph() -> StateGraph:
+    # 0 -1-> 1 -2-> 2 -3-> 3 -1-> 4, with the longer shortcuts 0 -4-> 2 and 1 -6-> 3
+    sources = np.array([0, 0, 1, 1, 2, 3])
+    targets = np.array([1, 2, 2, 3, 3, 4])
+    weights = np.array([1, 4, 2, 6, 3, 1])
+    return StateGraph.from_edges(5, sources, targets, weights)
+
+
+@pytest.mark.parametrize("queue", ["heap", "bucket"])
+def test_shortest_paths_queues(queue):
+    graph = weighted_graph()
+    dists, target = shortest_paths(graph, [0], queue=queue)
+    np.testing.assert_array_equal(dists, [0, 1, 3, 6, 7])
+    assert target == -1
+
+    # Stop at the first target, from several sources
+    targets = np.array([False, False, False, True, True])
+    dists, target = shortest_paths(graph, [1, 2], targets, queue=queue)
+    assert target == 3
+    assert dists[target] == 3
+    assert np.isinf(dists[0])
+
+
+def test_a_star_heuristic():
+    grid_graph = GridGraph((5, 5))
+    graph = StateGraph.from_grid(grid_graph)
+    start, end = grid_graph.index((0, 0)), grid_graph.index((0, 4))
+    targets = np.zeros(len(grid_graph), dtype=bool)
+    targets[end] = True
+    coords = np.array([grid_graph.coord(node) for node in range(len(grid_graph))])
+    manhattan = np.abs(coords - (0, 4)).sum(axis=1)
+
+    dists, target = shortest_paths(graph, [start], targets)
+    assert target == end and dists[end] == 4
+    assert dists[grid_graph.index((2, 0))] == 2
+
+    # A* goes straight to the end, without settling the cells away from it
+    dists, target = shortest_paths(graph, [start], targets, heuristic=manhattan)
+    assert target == end and dists[end] == 4
+    assert np.isinf(dists[grid_graph.index((2, 0))])
+
+    with pytest.raises(ValueError):
+        shortest_paths(graph, [start], targets, heuristic=manhattan, queue="bucket")
+
+
+def test_predecessors_on_multiple_shortest_paths():
+    # Three shortest paths of length 2 to 3 (through 1, through 2 and direct),
+    # and a longer one through 4
+    sources = np.array([0, 0, 0, 0, 1, 2, 4])
+    targets = np.array([1, 2, 3, 4, 3, 3, 3])
+    weights = np.array([1, 1, 2, 2, 1, 1, 1])
+    graph = StateGraph.from_edges(5, sources, targets, weights)
+    dists, _ = shortest_paths(graph, [0])
+    np.testing.assert_array_equal(dists, [0, 1, 1, 2, 2])
+
+    preds = predecessors(graph, dists)
+    preds_of = [
+        set(preds.indices[preds.indptr[node] : preds.indptr[node + 1]].tolist())
+        for node in range(5)
+    ]
+    assert preds_of == [set(), {0}, {0}, {0, 1, 2}, {0}]
+
+    np.testing.assert_array_equal(
+        states_on_shortest_paths(preds, [3]), [True, True, True, True, False]
+    )
+    assert shortest_path(preds, 4) == [0, 4]
+    assert shortest_path(preds, 3) in ([0, 3], [0, 1, 3], [0, 2, 3])
+
+
+@pytest.mark.parametrize("queue", ["heap", "bucket"])
+def test_shortest_paths_without_sources(queue):
+    graph = StateGraph.from_edges(3, np.array([0, 1]), np.array([1, 2]))
+    dists, target = shortest_paths(graph, [], queue=queue)
+    assert np.all(np.isinf(dists))
+    assert target == -1
+
+
+def test_shortest_path_through_zero_weight_cycles():
+    # 0 -> 1 <-> 2 -> 3, where 1 and 2 are joined by zero-weight edges, and a
+    # zero-weight cycle also goes through the source
+    sources = np.array([0, 4, 1, 2, 2, 0])
+    targets = np.array([4, 0, 2, 1, 3, 1])
+    weights = np.array([0, 0, 0, 0, 1, 1])
+    graph = StateGraph.from_edges(5, sources, targets, weights)
+    dists, _ = shortest_paths(graph, [0])
+    np.testing.assert_array_equal(dists, [0, 1, 1, 2, 0])
+
+    path = shortest_path(predecessors(graph, dists), 3, sources=[0])
+    assert path == [0, 1, 2, 3]
@@ -102,8 +102,11 @@ def timefunc(func):
         result = func(*args, **kwargs)
         time_elapsed = time.perf_counter() - start
         print(f"Function: {func.__name__}, Time: {time_elapsed}")
+        # Keep the last timing around for programmatic consumers (e.g. `run_all`)
+        time_closure.elapsed = time_elapsed
         return result
 
+    time_closure.elapsed = None
     return time_closure
 
 
@@ -0,0 +1,146 @@
+"""Sparse cellular automata on unbounded integer lattices.
+
+Only the live cells are stored, as integer coordinates packed into int64 keys (each
+axis gets a fixed number of bits, with a bias so that fields stay non-negative).
+Neighbours are counted by adding the neighbourhood offsets to all the live cells at
+once and grouping the results with `np.unique`, so memory scales with the number of
+live cells rather than with the bounding box.
+
+Trailing "mirror" axes can be declared when the automaton is symmetric under sign
+flips and permutations of those axes (e.g. extra dimensions of a flat initial slice).
+Only the canonical representative of each orbit (non-negative sorted coordinates) is
+stored, and neighbour counts are reweighted by the orbit sizes.
+"""
+
+import itertools
+import math
+from typing import Iterable
+
+import numpy as np
+
+
+def moore_offsets(dimension: int) -> np.ndarray:
+    """Offsets of the 3 ** dimension - 1 neighbours of a cell"""
+    offsets = np.array(list(itertools.product((-1, 0, 1), repeat=dimension)))
+    return offsets[np.abs(offsets).sum(axis=1) > 0]
+
+
+class SparseAutomaton:
+    """Life-like automaton: a dead cell with a neighbour count in `birth` becomes
+    live, a live cell with a neighbour count in `survive` stays live.
+    `cells` are the initial live cells, as an (n, dimension) array of coordinates,
+    and the last `mirror_axes` axes must be symmetric (see module docstring).
+    """
+
+    def __init__(
+        self,
+        cells: np.ndarray,
+        offsets: np.ndarray,
+        birth: Iterable[int],
+        survive: Iterable[int],
+        mirror_axes: int = 0,
+    ):
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.dimension = self.offsets.shape[1]
+        self.mirror_axes = mirror_axes
+        self.birth = np.zeros(len(self.offsets) + 1, dtype=bool)
+        self.birth[list(birth)] = True
+        self.survive = np.zeros(len(self.offsets) + 1, dtype=bool)
+        self.survive[list(survive)] = True
+        if self.birth[0]:
+            raise ValueError("Births without live neighbours are not supported.")
+
+        # Split the 64-bit keys between axes
+        self.bits = 63 // self.dimension
+        self.bias = 1 << (self.bits - 1)
+        self.idx = 0
+        cells = self._canonical(np.asarray(cells, dtype=np.int64))
+        self.keys = np.unique(self._pack(cells))
+        self._check_bounds()
+
+    def _pack(self, cells: np.ndarray) -> np.ndarray:
+        keys = np.zeros(len(cells), dtype=np.int64)
+        for axis in range(self.dimension):
+            keys |= (cells[:, axis] + self.bias) << (self.bits * axis)
+        return keys
+
+    def _unpack(self, keys: np.ndarray) -> np.ndarray:
+        field = (1 << self.bits) - 1
+        return np.stack(
+            [
+                ((keys >> (self.bits * axis)) & field) - self.bias
+                for axis in range(self.dimension)
+            ],
+            axis=-1,
+        )
+
+    def _canonical(self, cells: np.ndarray) -> np.ndarray:
+        """Representative of the orbit of each cell (non-negative sorted mirror
+        coordinates)"""
+        if not self.mirror_axes:
+            return cells
+        cells = cells.copy()
+        mirror = cells[..., -self.mirror_axes :]
+        cells[..., -self.mirror_axes :] = np.sort(np.abs(mirror), axis=-1)
+        return cells
+
+    def _orbit_sizes(self, cells: np.ndarray) -> np.ndarray:
+        """Number of cells in the orbit of each canonical cell"""
+        if not self.mirror_axes:
+            return np.ones(len(cells), dtype=np.int64)
+        mirror = cells[:, -self.mirror_axes :]
+        # Sign flips of the non-zero coordinates, times distinct permutations
+        # (the product of the factorials of the multiplicities is accumulated
+        # along the runs of equal sorted values)
+        sizes = (2 ** (mirror > 0).sum(axis=1)) * math.factorial(self.mirror_axes)
+        run = np.ones(len(cells), dtype=np.int64)
+        for axis in range(1, self.mirror_axes):
+            run = np.where(mirror[:, axis] == mirror[:, axis - 1], run + 1, 1)
+            sizes //= run
+        return sizes
+
+    def _check_bounds(self):
+        # Neighbours of the live cells must also fit in the packed fields
+        if len(self.keys) and np.abs(self.cells).max() >= self.bias - 1:
+            raise ValueError("The live cells exceed the packed coordinate range.")
+
+    @property
+    def cells(self) -> np.ndarray:
+        """Coordinates of the (canonical) live cells"""
+        return self._unpack(self.keys)
+
+    def population(self) -> int:
+        """Number of live cells (including the mirror images)"""
+        return int(self._orbit_sizes(self.cells).sum())
+
+    def step(self):
+        cells = self.cells
+        # Every live cell contributes to its neighbours (and to itself, with a zero
+        # weight, so that live cells without live neighbours are counted too)
+        neighbors = self._canonical(cells[:, None, :] + self.offsets[None, :, :])
+        targets = np.concatenate(
+            (self._pack(neighbors.reshape(-1, self.dimension)), self.keys)
+        )
+        orbit_sizes = self._orbit_sizes(cells)
+        weights = np.concatenate(
+            (np.repeat(orbit_sizes, len(self.offsets)), np.zeros(len(cells)))
+        )
+        candidates, inverse = np.unique(targets, return_inverse=True)
+        # Neighbours reached from a canonical cell are weighted by its orbit size, and
+        # spread over the orbit of the candidate
+        counts = np.rint(
+            np.bincount(inverse, weights=weights)
+            / self._orbit_sizes(self._unpack(candidates))
+        ).astype(np.int64)
+
+        alive = np.isin(candidates, self.keys, assume_unique=True)
+        self.keys = candidates[
+            np.where(alive, self.survive[counts], self.birth[counts])
+        ]
+        self.idx += 1
+        self._check_bounds()
+
+    def run(self, n_steps: int) -> "SparseAutomaton":
+        for _ in range(n_steps):
+            self.step()
+        return self
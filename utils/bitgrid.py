@@ -0,0 +1,236 @@
+"""Bit-packed boolean grids.
+
+A grid of shape (height, width) is stored as a (height + 2, n_words) array of uint64
+words: column `c` of a row is bit `c % 64` of word `c // 64`, and the first and last
+rows are zero padding. Neighbour planes are obtained with word shifts, and neighbour
+counts are kept bit-sliced (one word array per bit of the count), so that a
+generation costs a few word operations per 64 cells. The word-level helpers are
+compiled with numba, so that they can also be used inside other kernels.
+"""
+
+from typing import Callable, Optional
+
+import numpy as np
+from numba import njit  # type: ignore
+
+# Stack of bit-packed planes, e.g. the bits of a count (least significant first)
+Planes = np.ndarray
+# Takes the alive words and the bit-sliced neighbour count of some rows, and
+# returns the new alive words of these rows
+Rule = Callable[[np.ndarray, Planes], np.ndarray]
+# Takes the padded words and the (padded) indices of some rows, and returns the
+# neighbour planes of these rows
+Neighbourhood = Callable[[np.ndarray, np.ndarray], Planes]
+# Takes the (padded) indices of some rows, and returns the (padded) indices of the
+# rows whose neighbourhood reads any of them
+Dependents = Callable[[np.ndarray], np.ndarray]
+
+ZERO = np.uint64(0)
+ONE = np.uint64(1)
+LAST = np.uint64(63)
+
+
+def pack_bits(mask: np.ndarray) -> np.ndarray:
+    """Pack a 2D boolean array into padded uint64 words"""
+    height, width = mask.shape
+    n_words = -(-width // 64)
+    bits = np.zeros((height + 2, n_words * 64), dtype=np.uint8)
+    bits[1:-1, :width] = mask
+    return np.packbits(bits, axis=1, bitorder="little").view("<u8").astype(np.uint64)
+
+
+def unpack_bits(words: np.ndarray, width: int) -> np.ndarray:
+    """Unpack padded uint64 words into a 2D boolean array"""
+    bits = np.unpackbits(
+        words[1:-1].astype("<u8").view(np.uint8), axis=1, bitorder="little"
+    )
+    return bits[:, :width].astype(bool)
+
+
+def popcount(words: np.ndarray) -> int:
+    return int(np.unpackbits(words.astype("<u8").view(np.uint8)).sum())
+
+
+@njit(cache=True)
+def shift_west(words: np.ndarray) -> np.ndarray:
+    """Plane of the western neighbours: column c gets the value of column c - 1"""
+    shifted = np.empty_like(words)
+    for row in range(words.shape[0]):
+        carry = ZERO
+        for j in range(words.shape[1]):
+            shifted[row, j] = (words[row, j] << ONE) | carry
+            carry = words[row, j] >> LAST
+    return shifted
+
+
+@njit(cache=True)
+def shift_east(words: np.ndarray) -> np.ndarray:
+    """Plane of the eastern neighbours: column c gets the value of column c + 1"""
+    shifted = np.empty_like(words)
+    for row in range(words.shape[0]):
+        carry = ZERO
+        for j in range(words.shape[1] - 1, -1, -1):
+            shifted[row, j] = (words[row, j] >> ONE) | carry
+            carry = words[row, j] << LAST
+    return shifted
+
+
+@njit(cache=True)
+def moore_planes(words: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """The 8 neighbour planes of the given (padded) rows: for the rows above and
+    below, the words themselves and their west/east shifts, and for the row
+    itself only the shifts"""
+    n_words = words.shape[1]
+    planes = np.empty((8, rows.shape[0], n_words), dtype=words.dtype)
+    for i in range(rows.shape[0]):
+        plane = 0
+        for k in range(3):
+            row = rows[i] + k - 1
+            for j in range(n_words):
+                word = words[row, j]
+                previous = words[row, j - 1] if j > 0 else ZERO
+                following = words[row, j + 1] if j < n_words - 1 else ZERO
+                planes[plane, i, j] = (word << ONE) | (previous >> LAST)
+                planes[plane + 1, i, j] = (word >> ONE) | (following << LAST)
+                if k != 1:
+                    planes[plane + 2, i, j] = word
+            plane += 2 if k == 1 else 3
+    return planes
+
+
+@njit(cache=True)
+def bit_sum(planes: np.ndarray) -> np.ndarray:
+    """Bit-sliced count of the set planes for each cell (least significant first),
+    with a ripple of half adders"""
+    # The count can't exceed the number of planes
+    n_planes, n_bits = planes.shape[0], 0
+    while n_planes >> n_bits:
+        n_bits += 1
+    flat = np.ascontiguousarray(planes).reshape(n_planes, -1)
+    counter = np.zeros((n_bits, flat.shape[1]), dtype=planes.dtype)
+    for j in range(flat.shape[1]):
+        for k in range(n_planes):
+            carry = flat[k, j]
+            for i in range(min(k + 1, n_bits)):
+                bit = counter[i, j]
+                counter[i, j], carry = bit ^ carry, bit & carry
+    return counter.reshape((n_bits,) + planes.shape[1:])
+
+
+@njit(cache=True)
+def bit_add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Bit-sliced sum of two bit-sliced counts (ripple-carry adder)"""
+    n_bits = max(a.shape[0], b.shape[0])
+    flat_a = np.ascontiguousarray(a).reshape(a.shape[0], -1)
+    flat_b = np.ascontiguousarray(b).reshape(b.shape[0], -1)
+    result = np.empty((n_bits + 1, flat_a.shape[1]), dtype=a.dtype)
+    for j in range(flat_a.shape[1]):
+        carry = ZERO
+        for i in range(n_bits):
+            bit_a = flat_a[i, j] if i < a.shape[0] else ZERO
+            bit_b = flat_b[i, j] if i < b.shape[0] else ZERO
+            result[i, j] = bit_a ^ bit_b ^ carry
+            carry = (bit_a & bit_b) | (carry & (bit_a ^ bit_b))
+        result[n_bits, j] = carry
+    return result.reshape((n_bits + 1,) + a.shape[1:])
+
+
+@njit(cache=True)
+def count_equals(counter: np.ndarray, k: int) -> np.ndarray:
+    """Cells whose bit-sliced count equals k"""
+    flat = np.ascontiguousarray(counter).reshape(counter.shape[0], -1)
+    result = np.zeros(flat.shape[1], dtype=counter.dtype)
+    if k >> counter.shape[0]:
+        return result.reshape(counter.shape[1:])
+    for j in range(flat.shape[1]):
+        equal = ~ZERO
+        for i in range(counter.shape[0]):
+            equal &= flat[i, j] if (k >> i) & 1 else ~flat[i, j]
+        result[j] = equal
+    return result.reshape(counter.shape[1:])
+
+
+@njit(cache=True)
+def count_at_least(counter: np.ndarray, k: int) -> np.ndarray:
+    """Cells whose bit-sliced count is at least k"""
+    flat = np.ascontiguousarray(counter).reshape(counter.shape[0], -1)
+    result = np.zeros(flat.shape[1], dtype=counter.dtype)
+    if k >> counter.shape[0]:
+        return result.reshape(counter.shape[1:])
+    for j in range(flat.shape[1]):
+        # Compare from the most significant bit
+        greater, equal = ZERO, ~ZERO
+        for i in range(counter.shape[0] - 1, -1, -1):
+            if (k >> i) & 1:
+                equal &= flat[i, j]
+            else:
+                greater |= equal & flat[i, j]
+                equal &= ~flat[i, j]
+        result[j] = greater | equal
+    return result.reshape(counter.shape[1:])
+
+
+class BitLife:
+    """Two-state automaton on a bit-packed grid.
+    `rule` computes the next generation from the neighbour count given by
+    `neighbourhood` (the Moore neighbourhood by default). Cells outside `mask` are
+    always dead. Rows are only recomputed if they changed in the last generation,
+    or if their neighbourhood reads a row that changed: the `dependents` of the
+    changed rows (by default their adjacent rows, as in the Moore neighbourhood).
+    """
+
+    def __init__(
+        self,
+        alive: np.ndarray,
+        rule: Rule,
+        mask: Optional[np.ndarray] = None,
+        neighbourhood: Neighbourhood = moore_planes,
+        dependents: Optional[Dependents] = None,
+    ):
+        self.shape = alive.shape
+        self.words = pack_bits(alive)
+        self.mask = pack_bits(
+            np.ones(alive.shape, dtype=bool) if mask is None else mask
+        )
+        self.words &= self.mask
+        self.rule = rule
+        self.neighbourhood = neighbourhood
+        self.dependents = dependents
+        self.idx = 0
+        # Padded indices of the rows that changed in the last generation
+        self.dirty = np.arange(1, self.shape[0] + 1)
+
+    @property
+    def grid(self) -> np.ndarray:
+        return unpack_bits(self.words, self.shape[1])
+
+    @property
+    def stable(self) -> bool:
+        return len(self.dirty) == 0
+
+    def population(self) -> int:
+        return popcount(self.words)
+
+    def step(self) -> "BitLife":
+        if self.dependents is None:
+            rows = np.concatenate((self.dirty - 1, self.dirty, self.dirty + 1))
+        else:
+            rows = np.concatenate((self.dirty, self.dependents(self.dirty)))
+        rows = np.unique(rows)
+        rows = rows[(rows >= 1) & (rows <= self.shape[0])]
+        counter = bit_sum(self.neighbourhood(self.words, rows))
+        new = self.rule(self.words[rows], counter) & self.mask[rows]
+        changed = (new != self.words[rows]).any(axis=1)
+        self.words[rows] = new
+        self.dirty = rows[changed]
+        self.idx += 1
+        return self
+
+    def run_until_stable(self, max_steps: Optional[int] = None) -> int:
+        """Step until a generation doesn't change anything.
+        Returns the number of generations that changed the grid."""
+        n_steps = 0
+        while not self.stable and (max_steps is None or n_steps < max_steps):
+            self.step()
+            n_steps += not self.stable
+        return n_steps
@@ -0,0 +1,107 @@
+"""Cliques of undirected graphs stored as bitsets.
+
+Vertices are integers in `[0, n)`, and the neighbours of vertex `v` are the set bits
+of the Python integer `adjacency[v]`. Set operations on vertices (intersections,
+differences, sizes) are then single integer operations, whatever the degree.
+"""
+
+import heapq
+from typing import Iterable, Iterator, Optional
+
+Bitset = int
+
+
+def iter_bits(bits: Bitset) -> Iterator[int]:
+    """Indices of the set bits, in increasing order"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+def adjacency_bitsets(n: int, edges: Iterable[tuple[int, int]]) -> list[Bitset]:
+    """Bitset adjacency of an undirected graph with n vertices"""
+    adjacency = [0] * n
+    for i, j in edges:
+        adjacency[i] |= 1 << j
+        adjacency[j] |= 1 << i
+    return adjacency
+
+
+def count_triangles(adjacency: list[Bitset], vertices: Optional[Bitset] = None) -> int:
+    """Number of triangles of the subgraph induced by `vertices` (all by default).
+    Each triangle u < v < w is counted once, from its lowest edge"""
+    if vertices is None:
+        vertices = (1 << len(adjacency)) - 1
+    count = 0
+    for u in iter_bits(vertices):
+        # Neighbours of u with a higher index
+        higher = adjacency[u] & vertices & ~((2 << u) - 1)
+        for v in iter_bits(higher):
+            count += (higher & adjacency[v] & ~((2 << v) - 1)).bit_count()
+    return count
+
+
+def degeneracy_order(adjacency: list[Bitset]) -> list[int]:
+    """Vertices ordered by repeatedly removing a vertex of minimum degree"""
+    degrees = [neighbors.bit_count() for neighbors in adjacency]
+    queue = [(degree, v) for v, degree in enumerate(degrees)]
+    heapq.heapify(queue)
+    remaining = (1 << len(adjacency)) - 1
+    order = []
+    while queue:
+        degree, v = heapq.heappop(queue)
+        # Skip outdated entries
+        if not remaining >> v & 1 or degree != degrees[v]:
+            continue
+        order.append(v)
+        remaining ^= 1 << v
+        for u in iter_bits(adjacency[v] & remaining):
+            degrees[u] -= 1
+            heapq.heappush(queue, (degrees[u], u))
+    return order
+
+
+def _expand(
+    adjacency: list[Bitset],
+    clique: list[int],
+    candidates: Bitset,
+    excluded: Bitset,
+    best: list[int],
+):
+    """Pivoted Bron–Kerbosch step: extend `clique` with the `candidates`, keeping
+    the largest clique found in `best`"""
+    if not candidates:
+        if len(clique) > len(best):
+            best[:] = clique
+        return
+    # Even adding all the candidates can't beat the best clique
+    if len(clique) + candidates.bit_count() <= len(best):
+        return
+    # Pivot with the most candidates as neighbours: these are covered by its branch
+    pivot = max(
+        iter_bits(candidates | excluded),
+        key=lambda u: (candidates & adjacency[u]).bit_count(),
+    )
+    for v in iter_bits(candidates & ~adjacency[pivot]):
+        _expand(
+            adjacency,
+            clique + [v],
+            candidates & adjacency[v],
+            excluded & adjacency[v],
+            best,
+        )
+        candidates ^= 1 << v
+        excluded |= 1 << v
+
+
+def maximum_clique(adjacency: list[Bitset]) -> list[int]:
+    """Largest clique (sorted vertices), with pivoted Bron–Kerbosch. The top level
+    follows the degeneracy order, so that each branch only gets the later
+    neighbours of its vertex (at most the degeneracy of the graph)"""
+    best: list[int] = []
+    later = (1 << len(adjacency)) - 1
+    for v in degeneracy_order(adjacency):
+        later ^= 1 << v
+        _expand(adjacency, [v], adjacency[v] & later, adjacency[v] & ~later, best)
+    return sorted(best)
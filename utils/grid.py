@@ -0,0 +1,110 @@
+"""Array-backed grid graphs.
+
+Cells are identified by their flat (row-major) index and the adjacency is stored in
+CSR form: the neighbors of node `i` are `indices[indptr[i] : indptr[i + 1]]`.
+Construction is vectorised over whole directions at a time, and obstacles/constraints
+are expressed as arrays rather than as per-cell Python callbacks.
+"""
+
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+
+from utils import CoordTuple
+
+DIRECTIONS_4: tuple[CoordTuple, ...] = ((1, 0), (-1, 0), (0, 1), (0, -1))
+DIRECTIONS_8: tuple[CoordTuple, ...] = DIRECTIONS_4 + (
+    (1, 1),
+    (1, -1),
+    (-1, 1),
+    (-1, -1),
+)
+
+# Takes the values of the source and target cells of all the candidate edges along
+# one direction, and returns a boolean array of the edges to keep
+EdgeConstraint = Callable[[np.ndarray, np.ndarray, CoordTuple], np.ndarray]
+
+
+def _shift_slices(delta: int, size: int) -> tuple[slice, slice]:
+    """Source and target slices along one axis for a shift of `delta`"""
+    return (
+        slice(max(0, -delta), size - max(0, delta)),
+        slice(max(0, delta), size - max(0, -delta)),
+    )
+
+
+class GridGraph:
+    """Graph of the cells of a 2D grid.
+
+    `mask` marks the traversable cells (default: all of them).
+    `constraint` filters the edges based on the `values` of their endpoints.
+    With `periodic`, the grid wraps around its borders.
+    """
+
+    def __init__(
+        self,
+        shape: CoordTuple,
+        mask: Optional[np.ndarray] = None,
+        constraint: Optional[EdgeConstraint] = None,
+        values: Optional[np.ndarray] = None,
+        directions: Sequence[CoordTuple] = DIRECTIONS_4,
+        periodic: bool = False,
+    ):
+        self.shape = shape
+        self.size = shape[0] * shape[1]
+        self.directions = tuple(directions)
+        index = np.arange(self.size, dtype=np.int64).reshape(shape)
+
+        # Dense (direction, source) table of targets, -1 where there is no edge
+        targets = np.full((len(self.directions), self.size), -1, dtype=np.int64)
+        for k, (dx, dy) in enumerate(self.directions):
+            target_grid = targets[k].reshape(shape)
+            if periodic:
+                target_grid[:] = np.roll(index, shift=(-dx, -dy), axis=(0, 1))
+            else:
+                src_x, dst_x = _shift_slices(dx, shape[0])
+                src_y, dst_y = _shift_slices(dy, shape[1])
+                target_grid[src_x, src_y] = index[dst_x, dst_y]
+
+        valid = targets >= 0
+        if mask is not None:
+            flat_mask = mask.ravel()
+            valid &= flat_mask[np.newaxis, :]
+            valid &= flat_mask[np.where(valid, targets, 0)]
+        if constraint is not None:
+            if values is None:
+                raise ValueError("Edge constraints require the `values` array.")
+            flat_values = values.ravel()
+            for k, direction in enumerate(self.directions):
+                sources = np.flatnonzero(valid[k])
+                valid[k, sources] = constraint(
+                    flat_values[sources], flat_values[targets[k, sources]], direction
+                )
+
+        # Compress: transposing groups the edges by source node
+        dtype = np.int32 if self.size < 2**31 else np.int64
+        self.indices = targets.T[valid.T].astype(dtype)
+        self.indptr = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(valid.sum(axis=0), out=self.indptr[1:])
+
+    def __len__(self) -> int:
+        return self.size
+
+    def index(self, coord: CoordTuple) -> int:
+        return coord[0] * self.shape[1] + coord[1]
+
+    def coord(self, index: int) -> CoordTuple:
+        x, y = divmod(index, self.shape[1])
+        return x, y
+
+    def neighbors(self, node: int) -> np.ndarray:
+        return self.indices[self.indptr[node] : self.indptr[node + 1]]
+
+    def degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def to_lists(self) -> list[list[int]]:
+        """Adjacency lists indexed by node, for algorithms written in pure Python"""
+        indices = self.indices.tolist()
+        indptr = self.indptr.tolist()
+        return [indices[indptr[i] : indptr[i + 1]] for i in range(self.size)]
@@ -0,0 +1,148 @@
+"""Input readers for large files.
+
+Lines can be streamed one at a time instead of being collected in a list, and
+numeric or grid inputs can be parsed straight into NumPy arrays: the file is
+memory-mapped as a uint8 array and scanned in bulk (with numba for the integers),
+so that no Python object is created per line or per value.
+"""
+
+import os
+from typing import Generator, Optional
+
+import numpy as np
+from numba import njit  # type: ignore
+
+NEWLINE = ord("\n")
+CARRIAGE_RETURN = ord("\r")
+MINUS = ord("-")
+ZERO_CHAR = ord("0")
+NINE_CHAR = ord("9")
+
+
+def stream_lines(
+    input_file: str, line_strip: bool = True
+) -> Generator[str, None, None]:
+    """Same as `read_input`, but yields the lines one at a time"""
+    with open(input_file, "r") as file:
+        for line in file:
+            yield line.strip() if line_strip else line.rstrip("\n")
+
+
+def map_bytes(input_file: str) -> np.ndarray:
+    """Read-only uint8 array backed by a memory map of the file"""
+    # Empty files can't be mapped
+    if os.path.getsize(input_file) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.asarray(np.memmap(input_file, dtype=np.uint8, mode="r"))
+
+
+@njit(cache=True)
+def _parse_integers(data: np.ndarray, signed: bool) -> tuple[np.ndarray, np.ndarray]:
+    """All the integers of a byte array, and the number of integers on each line"""
+    # First pass: count lines and integers
+    n_lines, n_values = 1, 0
+    in_number = False
+    for byte in data:
+        is_digit = ZERO_CHAR <= byte <= NINE_CHAR
+        n_values += is_digit and not in_number
+        n_lines += byte == NEWLINE
+        in_number = is_digit
+
+    # Second pass: accumulate the digits
+    values = np.empty(n_values, dtype=np.int64)
+    row_counts = np.zeros(n_lines, dtype=np.int64)
+    k, row, value = -1, 0, 0
+    negative, in_number = False, False
+    for i in range(len(data)):
+        byte = data[i]
+        if ZERO_CHAR <= byte <= NINE_CHAR:
+            if not in_number:
+                k += 1
+                row_counts[row] += 1
+                negative = signed and i > 0 and data[i - 1] == MINUS
+                value = 0
+            value = value * 10 + (byte - ZERO_CHAR)
+            values[k] = -value if negative else value
+            in_number = True
+        else:
+            row += byte == NEWLINE
+            in_number = False
+    return values, row_counts
+
+
+def read_integers(input_file: str, signed: bool = True) -> np.ndarray:
+    """All the integers of the file (whatever the separators), as a 1D int64 array.
+    A minus sign right before a number makes it negative, unless `signed` is False
+    (e.g. for ranges such as 2-4)"""
+    values, _ = _parse_integers(map_bytes(input_file), signed)
+    return values
+
+
+def read_integer_rows(input_file: str, signed: bool = True) -> np.ndarray:
+    """Integers of a file with the same number of integers on each (non-empty)
+    line, e.g. comma-separated values, as a 2D int64 array"""
+    values, row_counts = _parse_integers(map_bytes(input_file), signed)
+    row_counts = row_counts[row_counts > 0]
+    if len(row_counts) == 0:
+        return values.reshape(0, 0)
+    if np.any(row_counts != row_counts[0]):
+        raise ValueError(f"Lines of {input_file} have different numbers of integers")
+    return values.reshape(len(row_counts), row_counts[0])
+
+
+def read_char_grid(
+    input_file: str, codes: Optional[dict[str, int]] = None
+) -> np.ndarray:
+    """Rectangular grid file as a 2D uint8 array. Cells are character codes, or
+    are translated with the `codes` map (which must cover every character)"""
+    data = map_bytes(input_file)
+    # Windows line endings: drop the carriage returns (this copies the data)
+    carriage_returns = data == CARRIAGE_RETURN
+    if np.any(carriage_returns):
+        data = data[~carriage_returns]
+    # Ignore the trailing newlines
+    end = len(data)
+    while end and data[end - 1] == NEWLINE:
+        end -= 1
+    data = data[:end]
+
+    newlines = np.flatnonzero(data == NEWLINE)
+    width = newlines[0] if len(newlines) else len(data)
+    height = len(newlines) + 1
+    if len(data) != height * (width + 1) - 1 or np.any(
+        newlines != np.arange(1, height) * (width + 1) - 1
+    ):
+        raise ValueError(f"Lines of {input_file} have different lengths")
+    # View the grid through the newlines
+    grid = np.lib.stride_tricks.as_strided(
+        data, shape=(height, width), strides=(width + 1, 1), writeable=False
+    )
+    if codes is None:
+        return np.ascontiguousarray(grid)
+
+    # Every code is valid, so the mapped characters are tracked separately
+    table = np.zeros(256, dtype=np.uint8)
+    mapped = np.zeros(256, dtype=bool)
+    for char, code in codes.items():
+        table[ord(char)] = code
+        mapped[ord(char)] = True
+    if not np.all(mapped[grid]):
+        raise ValueError(f"{input_file} contains characters missing from {codes}")
+    return table[grid]
+
+
+def find_markers(grid: np.ndarray, markers: str) -> dict[str, np.ndarray]:
+    """Positions (as an (n, 2) array) of each marker character of a character grid"""
+    marker_codes = np.frombuffer(markers.encode(), dtype=np.uint8)
+    positions = np.argwhere(np.isin(grid, marker_codes))
+    found = grid[positions[:, 0], positions[:, 1]]
+    return {
+        marker: positions[found == code] for marker, code in zip(markers, marker_codes)
+    }
+
+
+def read_digit_grid(input_file: str) -> np.ndarray:
+    """Grid of single digits, as a 2D uint8 array"""
+    grid = read_char_grid(input_file)
+    grid -= ZERO_CHAR
+    return grid
@@ -0,0 +1,283 @@
+"""Shortest path search on integer-encoded states.
+
+States are integers in `[0, n_states)` and the (weighted, directed) state graph is
+stored in CSR form. Distances and visited flags live in flat arrays, and the search
+loops are compiled with numba. Two priority queues are available:
+- "heap": a binary heap, for arbitrary weights (and A* heuristics)
+- "bucket": Dial's circular bucket queue, for small non-negative integer weights
+"""
+
+import heapq
+from collections import deque
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import numpy as np
+from numba import njit  # type: ignore
+
+from utils.grid import GridGraph
+
+
+@dataclass
+class StateGraph:
+    """Weighted directed graph in CSR form: the edges leaving node `i` are
+    `indices[indptr[i] : indptr[i + 1]]`, with costs `weights[...]`"""
+
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+
+    @property
+    def n_states(self) -> int:
+        return self.indptr.shape[0] - 1
+
+    @classmethod
+    def from_edges(
+        cls,
+        n_states: int,
+        sources: np.ndarray,
+        targets: np.ndarray,
+        weights: Optional[np.ndarray] = None,
+    ) -> "StateGraph":
+        """Build the CSR structure from (vectorised) edge lists"""
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(n_states + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=n_states), out=indptr[1:])
+        if weights is None:
+            weights = np.ones(len(sources), dtype=np.int64)
+        return cls(
+            indptr,
+            targets[order].astype(np.int64),
+            np.asarray(weights)[order].astype(np.int64),
+        )
+
+    @classmethod
+    def from_grid(
+        cls, grid_graph: GridGraph, costs: Optional[np.ndarray] = None
+    ) -> "StateGraph":
+        """Graph of the grid cells, where moving into a cell costs `costs[cell]`
+        (unit costs by default)"""
+        indices = grid_graph.indices.astype(np.int64)
+        weights = (
+            np.ones(len(indices), dtype=np.int64)
+            if costs is None
+            else costs.ravel()[indices].astype(np.int64)
+        )
+        return cls(grid_graph.indptr, indices, weights)
+
+    def edge_sources(self) -> np.ndarray:
+        """Source node of every edge"""
+        return np.repeat(np.arange(self.n_states), np.diff(self.indptr))
+
+    def reverse(self) -> "StateGraph":
+        return StateGraph.from_edges(
+            self.n_states, self.indices, self.edge_sources(), self.weights
+        )
+
+
+@njit(cache=True)
+def _search_heap(indptr, indices, weights, sources, targets, heuristic):
+    n_states = indptr.shape[0] - 1
+    dists = np.full(n_states, np.inf)
+    visited = np.zeros(n_states, dtype=np.bool_)
+    if sources.shape[0] == 0:
+        return dists, -1
+
+    queue = [(heuristic[sources[0]], sources[0])]
+    dists[sources[0]] = 0.0
+    for source in sources[1:]:
+        dists[source] = 0.0
+        heapq.heappush(queue, (heuristic[source], source))
+
+    while queue:
+        _, node = heapq.heappop(queue)
+        # Nodes can get added to the queue multiple times. We only
+        # process a node the first time we remove it from the queue.
+        if visited[node]:
+            continue
+        visited[node] = True
+        if targets[node]:
+            return dists, node
+
+        dist = dists[node]
+        for edge in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[edge]
+            new_dist = dist + weights[edge]
+            if new_dist < dists[neighbor]:
+                dists[neighbor] = new_dist
+                heapq.heappush(queue, (new_dist + heuristic[neighbor], neighbor))
+
+    return dists, -1
+
+
+@njit(cache=True)
+def _search_bucket(indptr, indices, weights, sources, targets):
+    n_states = indptr.shape[0] - 1
+    n_buckets = weights.max() + 1 if weights.shape[0] > 0 else 1
+    dists = np.full(n_states, np.iinfo(np.int64).max)
+    visited = np.zeros(n_states, dtype=np.bool_)
+
+    # Buckets are linked lists over a pool of entries. Every successful relaxation
+    # pushes a new entry, so the pool can't hold more than (#edges + #sources)
+    pool_node = np.empty(indices.shape[0] + sources.shape[0], dtype=np.int64)
+    pool_next = np.empty_like(pool_node)
+    heads = np.full(n_buckets, -1, dtype=np.int64)
+    n_entries = 0
+    pending = 0
+
+    for source in sources:
+        dists[source] = 0
+        pool_node[n_entries] = source
+        pool_next[n_entries] = heads[0]
+        heads[0] = n_entries
+        n_entries += 1
+        pending += 1
+
+    current = 0
+    while pending > 0:
+        # Move to the next non-empty bucket
+        bucket = current % n_buckets
+        while heads[bucket] == -1:
+            current += 1
+            bucket = current % n_buckets
+        entry = heads[bucket]
+        heads[bucket] = pool_next[entry]
+        pending -= 1
+
+        node = pool_node[entry]
+        if visited[node] or dists[node] != current:
+            continue
+        visited[node] = True
+        if targets[node]:
+            return dists, node
+
+        for edge in range(indptr[node], indptr[node + 1]):
+            neighbor = indices[edge]
+            new_dist = current + weights[edge]
+            if new_dist < dists[neighbor]:
+                dists[neighbor] = new_dist
+                bucket = new_dist % n_buckets
+                pool_node[n_entries] = neighbor
+                pool_next[n_entries] = heads[bucket]
+                heads[bucket] = n_entries
+                n_entries += 1
+                pending += 1
+
+    return dists, -1
+
+
+def shortest_paths(
+    graph: StateGraph,
+    sources: Sequence[int],
+    targets: Optional[np.ndarray] = None,
+    heuristic: Optional[np.ndarray] = None,
+    queue: str = "heap",
+) -> tuple[np.ndarray, int]:
+    """Dijkstra's algo (or A* if an admissible `heuristic` array is given) from a set
+    of source states.
+    If a boolean `targets` mask is given, the search stops at the first target state
+    settled, otherwise all reachable states are settled.
+    Returns the (float) array of distances, `inf` if not reached, and the target
+    state that was reached (-1 if none).
+    """
+    sources_array = np.asarray(sources, dtype=np.int64)
+    targets_mask = (
+        np.zeros(graph.n_states, dtype=np.bool_) if targets is None else targets
+    )
+    if queue == "heap":
+        heuristic_array = (
+            np.zeros(graph.n_states) if heuristic is None else heuristic.astype(float)
+        )
+        return _search_heap(
+            graph.indptr,
+            graph.indices,
+            graph.weights,
+            sources_array,
+            targets_mask,
+            heuristic_array,
+        )
+    elif queue == "bucket":
+        if heuristic is not None:
+            raise ValueError("The bucket queue does not support heuristics.")
+        int_dists, target = _search_bucket(
+            graph.indptr, graph.indices, graph.weights, sources_array, targets_mask
+        )
+        dists = int_dists.astype(float)
+        dists[int_dists == np.iinfo(np.int64).max] = np.inf
+        return dists, target
+    else:
+        raise ValueError(f"Queue {queue} is not supported.")
+
+
+def predecessors(graph: StateGraph, dists: np.ndarray) -> StateGraph:
+    """Graph of all the shortest-path predecessors: the edges leaving node `i` point
+    to the nodes that precede `i` on some shortest path"""
+    sources = graph.edge_sources()
+    on_path = np.isfinite(dists[sources]) & (
+        dists[sources] + graph.weights == dists[graph.indices]
+    )
+    return StateGraph.from_edges(
+        graph.n_states,
+        graph.indices[on_path],
+        sources[on_path],
+        graph.weights[on_path],
+    )
+
+
+@njit(cache=True)
+def _backtrack(indptr, indices, targets):
+    on_path = np.zeros(indptr.shape[0] - 1, dtype=np.bool_)
+    stack = list(targets)
+    while stack:
+        node = stack.pop()
+        if on_path[node]:
+            continue
+        on_path[node] = True
+        for edge in range(indptr[node], indptr[node + 1]):
+            if not on_path[indices[edge]]:
+                stack.append(indices[edge])
+    return on_path
+
+
+def states_on_shortest_paths(
+    predecessors_graph: StateGraph, targets: Sequence[int]
+) -> np.ndarray:
+    """Boolean mask of the states lying on any shortest path to `targets`"""
+    return _backtrack(
+        predecessors_graph.indptr,
+        predecessors_graph.indices,
+        np.asarray(targets, dtype=np.int64),
+    )
+
+
+def shortest_path(
+    predecessors_graph: StateGraph,
+    target: int,
+    sources: Optional[Sequence[int]] = None,
+) -> list[int]:
+    """One shortest path (from a source to `target`), as a list of states.
+    The sources default to the states without predecessors (they must be given if a
+    zero-weight cycle goes through one of them). Predecessors are explored
+    breadth-first and each state is queued once, so zero-weight cycles can't trap
+    the walk."""
+    indptr, indices = predecessors_graph.indptr, predecessors_graph.indices
+    source_set = None if sources is None else set(sources)
+    # Next state towards the target, for the states queued so far
+    successors = {target: -1}
+    queue = deque([target])
+    while queue:
+        node = queue.popleft()
+        if (
+            indptr[node] == indptr[node + 1]
+            if source_set is None
+            else node in source_set
+        ):
+            path = [node]
+            while successors[path[-1]] != -1:
+                path.append(successors[path[-1]])
+            return path
+        for predecessor in indices[indptr[node] : indptr[node + 1]].tolist():
+            if predecessor not in successors:
+                successors[predecessor] = node
+                queue.append(predecessor)
+    raise ValueError(f"State {target} can't be reached from the sources.")